@@ -0,0 +1,11 @@
+"""
+NLDBQ batch runner - answer a file of questions headlessly, results streamed to JSONL.
+
+    python batch.py questions.txt --out results.jsonl --concurrency 8 --rpm OpenAI=300
+"""
+import sys
+
+from src.agents.batch import main
+
+if __name__ == "__main__":
+    sys.exit(main())
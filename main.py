@@ -1,3 +1,4 @@
+import argparse
 import logging
 import subprocess
 import os
@@ -13,9 +14,24 @@ def run_streamlit():
     streamlit_file = os.path.join(os.path.dirname(__file__), "src", "ui", "app.py")
     subprocess.run(["streamlit", "run", streamlit_file])
 
+def run_api(host: str, port: int, workers: int):
+    import uvicorn
+    uvicorn.run("src.api.server:app", host=host, port=port, workers=workers)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="NLDBQ - Natural Language Database Querying")
+    parser.add_argument("--api", action="store_true", help="run the headless HTTP query service instead of the UI")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="API worker processes")
+    return parser.parse_args()
+
 
 
 if __name__ == "__main__":
+    args = parse_args()
     setup_logging()
-    proc = run_streamlit()
-    
\ No newline at end of file
+    if args.api:
+        run_api(args.host, args.port, args.workers)
+    else:
+        proc = run_streamlit()
@@ -1,52 +1,288 @@
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_ollama import ChatOllama
-from langchain_groq import ChatGroq
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
 
 from langchain.agents import create_agent
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langchain.agents.middleware import TodoListMiddleware 
 
 from src.config.prompt import system_prompt, OLLAMA_REACT_PROMPT
-from src.agents.tools import db_tool_manager
+from src.config.settings import (
+    EMBEDDINGS, LLM_CACHE_ENABLED, SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_THRESHOLD,
+    TEMPLATE_MAX, TEMPLATE_MIN_SUPPORT, TEMPLATE_PATH, TEMPLATES_ENABLED,
+)
+from src.agents.embeddings import get_embeddings
+from src.agents.memory import HistoryTrimMiddleware, get_checkpointer
+from src.agents.events import message_text
+from src.agents.semantic_cache import CacheHit, SemanticCache
+from src.agents.query_templates import TemplateLibrary, TemplateMatch
+from src.agents.tools import db_tool_manager, prefetch_for_question, run_query
+from src.db.sql_validator import check_read_only
+from src.db.async_exec import run_in_db_executor
+from src.db.db_schema_wrapper import db_schema_wrapper
+from src.telemetry.metrics import REGISTRY
+from src.telemetry.tracing import LLMTracer, span, trace
+
+logger = logging.getLogger(__name__)
 
 # Cache for agents
 _agents_cache = {}
+_agents_lock = threading.Lock()
+_semantic_cache: Optional[SemanticCache] = None
+_template_library: Optional[TemplateLibrary] = None
+
+# Provider SDKs are imported on first use - each one costs hundreds of ms at startup
+PROVIDERS = {
+    "OpenAI": ("langchain_openai", "ChatOpenAI"),
+    "Anthropic": ("langchain_anthropic", "ChatAnthropic"),
+    "Groq": ("langchain_groq", "ChatGroq"),
+    "Gemini": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+    "Ollama": ("langchain_ollama", "ChatOllama"),
+}
 
 def get_llm(provider: str, model: str):
     """Get LLM instance."""
-    kwargs = {"model": model, "temperature": 0}
-    if provider == "OpenAI": return ChatOpenAI(**kwargs)
-    if provider == "Anthropic": return ChatAnthropic(**kwargs)
-    if provider == "Groq": return ChatGroq(**kwargs)
-    if provider == "Gemini": return ChatGoogleGenerativeAI(**kwargs)
-    if provider == "Ollama": return ChatOllama(**kwargs)
-    raise ValueError(f"Unknown provider: {provider}")
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}")
+    module, class_name = PROVIDERS[provider]
+    chat_model = getattr(importlib.import_module(module), class_name)
+    llm = chat_model(model=model, temperature=0, callbacks=[LLMTracer(f"{provider}:{model}")])
+    if LLM_CACHE_ENABLED:
+        from src.agents.llm_cache import CachedChatModel
+        llm = CachedChatModel.wrap(llm, provider)
+    return llm
+
+def build_agent(llm, prompt: str = system_prompt):
+    """Agent graph around any chat model (real provider or the benchmark's scripted model)."""
+    return create_agent(
+        model=llm,
+        tools=db_tool_manager.get_tools(),
+        system_prompt=prompt,
+        checkpointer=get_checkpointer(),
+        middleware=[TodoListMiddleware(), HistoryTrimMiddleware()]
+    )
 
 def get_agent(provider: str, model: str):
     """Get cached agent."""
     key = f"{provider}:{model}"
     if key not in _agents_cache:
-        checkpointer = MemorySaver()
-        llm = get_llm(provider, model)
-        tools = db_tool_manager.get_tools()
-        prompt = OLLAMA_REACT_PROMPT if provider == "Ollama" else system_prompt
-        
-        agent = create_agent(
-            model=llm,
-            tools=tools,
-            system_prompt=prompt,
-            checkpointer=checkpointer,
-            middleware=[TodoListMiddleware()] 
-        )
-        _agents_cache[key] = agent
+        with _agents_lock:  # the background warm-up and the first request may race for the same agent
+            if key not in _agents_cache:
+                prompt = OLLAMA_REACT_PROMPT if provider == "Ollama" else system_prompt
+                _agents_cache[key] = build_agent(get_llm(provider, model), prompt)
     return _agents_cache[key]
 
-def stream_agent(agent, prompt, config):
-    yield from agent.stream(
-        {"messages": [("user", prompt)]}, 
-        config, 
-        stream_mode=["messages", "updates"]  # Both token + step streaming
-    )
\ No newline at end of file
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Process-wide question -> SQL cache (None when disabled)."""
+    global _semantic_cache
+    if SEMANTIC_CACHE_ENABLED and _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            get_embeddings(EMBEDDINGS), SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES
+        )
+    return _semantic_cache
+
+def get_template_library() -> Optional[TemplateLibrary]:
+    """Process-wide learned query templates (None when disabled)."""
+    global _template_library
+    if TEMPLATES_ENABLED and _template_library is None:
+        _template_library = TemplateLibrary(TEMPLATE_PATH, TEMPLATE_MAX, TEMPLATE_MIN_SUPPORT)
+    return _template_library
+
+def _template_gauges():
+    library = _template_library
+    if library is not None:
+        for key, value in library.stats().items():
+            yield f"nldbq_templates_{key}", {}, value
+
+REGISTRY.register_collector(_template_gauges)
+
+class RunRecorder:
+    """Watches "updates" chunks for the last successful execute_sql and the final answer."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql: Optional[str] = None
+        self.answer: str = ""
+        self._calls: Dict[str, str] = {}
+
+    def observe(self, chunk: Any):
+        if not (isinstance(chunk, tuple) and len(chunk) == 2 and chunk[0] == "updates"):
+            return
+        for update in chunk[1].values():
+            if not isinstance(update, dict):
+                continue
+            for msg in update.get("messages", []) or []:
+                if isinstance(msg, AIMessage):
+                    for call in msg.tool_calls or []:
+                        if call["name"] == "execute_sql":
+                            self._calls[call["id"]] = call["args"].get("query", "")
+                    if not msg.tool_calls and message_text(msg).strip():
+                        self.answer = message_text(msg).strip()
+                elif isinstance(msg, ToolMessage) and msg.name == "execute_sql":
+                    sql = self._calls.pop(msg.tool_call_id, None)
+                    if sql and message_text(msg).startswith("✅"):
+                        self.sql = sql
+
+    @property
+    def succeeded(self) -> bool:
+        return bool(self.sql and self.answer)
+
+def _cached_run_chunks(hit: CacheHit, result: str, rows: int):
+    """Synthetic "updates" chunks shaped like a tool call + final answer."""
+    yield ("updates", {"tools": {"messages": [ToolMessage(
+        content=result, name="execute_sql", tool_call_id="semantic_cache",
+    )]}})
+    yield ("updates", {"semantic_cache": {"messages": [AIMessage(content=(
+        f"⚡ Answered from semantic cache (matched \"{hit.question}\", similarity {hit.similarity:.2f}). "
+        f"{rows} row(s) returned - see the results table.\n\n```sql\n{hit.sql}\n```"
+    ))]}})
+
+def _answer_from_semantic_cache(prompt: str) -> Optional[List[Any]]:
+    """Chunks answering prompt from a cached run, or None on a miss / failed re-execution."""
+    cache = get_semantic_cache()
+    if cache is None:
+        return None
+    with span("cache", "semantic_lookup") as s:
+        hit = cache.lookup(prompt)
+        s.set(cache_hit=hit is not None)
+    if hit is None:
+        return None
+    try:
+        if check_read_only(hit.sql, db_schema_wrapper.sql_dialect()):
+            raise ValueError("cached SQL is not a read-only query")
+        page, result = run_query(hit.sql)  # stored like execute_sql: result id, grid and downloads
+    except Exception as e:
+        logger.warning(f"⚠️ Cached SQL failed, falling back to the agent: {e}")
+        return None
+    return list(_cached_run_chunks(hit, result, len(page.rows)))
+
+def _template_run_chunks(match: TemplateMatch, result: str, rows: int):
+    """Synthetic "updates" chunks for a template fast-path answer."""
+    yield ("updates", {"tools": {"messages": [ToolMessage(
+        content=result, name="execute_sql", tool_call_id="query_template",
+    )]}})
+    params = ", ".join(match.params.values()) or "no parameters"
+    yield ("updates", {"query_template": {"messages": [AIMessage(content=(
+        f"⚡ Answered from a learned query template ({params}; learned from "
+        f"\"{match.template.examples[-1]}\"). {rows} row(s) returned - see the results table.\n\n"
+        f"```sql\n{match.sql}\n```"
+    ))]}})
+
+def _answer_from_template(prompt: str) -> Optional[List[Any]]:
+    """Chunks answering prompt by filling a learned template, or None to run the full agent."""
+    library = get_template_library()
+    if library is None:
+        return None
+    start = time.perf_counter()
+    with span("cache", "template_match") as s:
+        match = library.match(prompt)
+        s.set(cache_hit=match is not None)
+    if match is None:
+        return None
+    try:
+        if check_read_only(match.sql, db_schema_wrapper.sql_dialect()):
+            raise ValueError("filled template is not a read-only query")
+        page, result = run_query(match.sql)
+        if not page.rows:
+            raise ValueError("no rows - the parameters may not fit this template")
+    except Exception as e:
+        logger.info(f"↩️ Template fallback to the agent: {e}")
+        library.record_fallback(match.template)
+        return None
+    library.record_hit(match.template, 1000 * (time.perf_counter() - start))
+    REGISTRY.counter("nldbq_template_hits_total", "Questions answered by a learned query template").inc()
+    return list(_template_run_chunks(match, result, len(page.rows)))
+
+# Node after which an answer with no tool calls ends the run; fast-path turns are recorded "as" it
+_FINAL_NODE = "TodoListMiddleware.after_model"
+
+def _thread_id(config) -> Optional[str]:
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+def _has_history(state) -> bool:
+    return bool(state is not None and state.values.get("messages"))
+
+def _fast_turn(prompt: str, chunks: List[Any]) -> Dict[str, List[Any]]:
+    """The question + the fast path's answer (with its result preview) as checkpoint messages."""
+    result, answer = "", ""
+    for _, update in chunks:
+        for msg in next(iter(update.values()))["messages"]:
+            if isinstance(msg, ToolMessage):
+                result = message_text(msg)
+            elif isinstance(msg, AIMessage):
+                answer = message_text(msg)
+    if result and result not in answer:
+        answer = f"{answer}\n\n{result}"
+    return {"messages": [HumanMessage(content=prompt), AIMessage(content=answer)]}
+
+def _answer_fast(prompt: str) -> Optional[List[Any]]:
+    """Semantic cache first (same question), then learned templates (same shape)."""
+    cached = _answer_from_semantic_cache(prompt)
+    return cached if cached is not None else _answer_from_template(prompt)
+
+def _remember_run(prompt: str, recorder: RunRecorder):
+    cache = get_semantic_cache()
+    if cache and recorder.succeeded:
+        cache.add(prompt, recorder.sql, recorder.answer)
+    library = get_template_library()
+    if library and recorder.succeeded:
+        library.learn(prompt, recorder.sql, 1000 * (time.perf_counter() - recorder.started))
+
+def stream_agent(agent, prompt, config, fast_path: bool = True):
+    """fast_path=False always runs the agent (no semantic cache / template answers)."""
+    with trace(prompt):
+        # Follow-ups ("show more rows") depend on the conversation: no shared cache/template either way
+        first_turn = _thread_id(config) is None or not _has_history(agent.get_state(config))
+        cached = _answer_fast(prompt) if first_turn and fast_path else None
+        if cached is not None:
+            if _thread_id(config) is not None:
+                agent.update_state(config, _fast_turn(prompt, cached), as_node=_FINAL_NODE)
+            yield from cached
+            return
+
+        prefetch_for_question(prompt)
+        recorder = RunRecorder()
+        for chunk in agent.stream(
+            {"messages": [("user", prompt)]}, 
+            config, 
+            stream_mode=["messages", "updates"]  # Both token + step streaming
+        ):
+            recorder.observe(chunk)
+            yield chunk
+        if first_turn:
+            _remember_run(prompt, recorder)
+
+async def astream_agent(agent, prompt, config, fast_path: bool = True):
+    """Async twin of stream_agent: agent.astream + DB tools on the bounded executor.
+
+    Cancelling the consuming task (client gone, request abandoned) stops the run at the
+    next await: the LLM stream is closed and queued tool/DB work is dropped.
+    """
+    with trace(prompt):
+        first_turn = _thread_id(config) is None or not _has_history(await agent.aget_state(config))
+        cached = await run_in_db_executor(_answer_fast, prompt) if first_turn and fast_path else None
+        if cached is not None:
+            if _thread_id(config) is not None:
+                await agent.aupdate_state(config, _fast_turn(prompt, cached), as_node=_FINAL_NODE)
+            for chunk in cached:
+                yield chunk
+            return
+
+        prefetch_for_question(prompt)
+        recorder = RunRecorder()
+        try:
+            async for chunk in agent.astream(
+                {"messages": [("user", prompt)]},
+                config,
+                stream_mode=["messages", "updates"]
+            ):
+                recorder.observe(chunk)
+                yield chunk
+        except asyncio.CancelledError:
+            logger.info(f"🛑 Agent run cancelled: {prompt[:60]}")
+            raise
+        if first_turn:
+            await run_in_db_executor(_remember_run, prompt, recorder)
\ No newline at end of file
@@ -0,0 +1,390 @@
+"""
+Batch Runner - Many questions through get_agent/stream_agent without the chat UI.
+Questions come from a .txt (one per line) or .jsonl file ({"question", "id"?, "provider"?, "model"?})
+and run on a thread pool (LLM calls are I/O bound) or, with --processes, a process pool.
+LLM calls are rate limited per provider, transient provider errors are retried with
+exponential backoff, and every finished item is appended to a JSONL file at once, so an
+interrupted run picks up where it stopped. The semantic cache / template fast path is off unless
+--fast-path is given, and each record says what served it.
+
+Run:     python batch.py questions.txt --out results.jsonl --concurrency 8 --rpm OpenAI=300
+Resume:  rerun the same command; items already recorded as "ok" are skipped
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.config.models import default_llm
+from src.config.settings import BATCH_BACKOFF, BATCH_CONCURRENCY, BATCH_MAX_BACKOFF, BATCH_RETRIES, BATCH_RPM
+from src.db.result_store import RESULT_ID_RE
+from src.telemetry.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth another attempt: timeouts, conflicts, rate limits and provider-side failures
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+_RETRYABLE_WORDS = ("ratelimit", "rate limit", "timeout", "timed out", "overloaded", "unavailable",
+                    "connection", "429", "503")
+
+_limiters: Dict[str, "RateLimiter"] = {}
+_limiters_lock = threading.Lock()
+_rpm: Dict[str, float] = {}
+
+
+class BatchItem(NamedTuple):
+    id: str
+    question: str
+    provider: str
+    model: str
+
+
+class RateLimiter:
+    """Token bucket: at most `per_minute` acquisitions a minute, bursts of one second's worth."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, float(int(self.rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self) -> float:
+        """Block until a call may go out; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self.waited += waited
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimitCallback(BaseCallbackHandler):
+    """Holds every chat-model call of a run until the provider's bucket has room."""
+
+    def __init__(self, limiter: RateLimiter, provider: str):
+        self.limiter = limiter
+        self.provider = provider
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        waited = self.limiter.acquire()
+        if waited:
+            REGISTRY.counter("nldbq_batch_rate_wait_seconds_total", "Seconds LLM calls were held by the rate limiter").inc(
+                waited, provider=self.provider
+            )
+
+
+def parse_rpm(spec: str) -> Dict[str, float]:
+    """"60" -> every provider; "OpenAI=300,Groq=30" -> per provider (a bare number sets the default)."""
+    limits: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        provider, _, value = part.rpartition("=")
+        limits[provider.strip() or "*"] = float(value)
+    return limits
+
+
+def get_limiter(provider: str) -> Optional[RateLimiter]:
+    per_minute = _rpm.get(provider, _rpm.get("*", 0.0))
+    if per_minute <= 0:
+        return None
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = RateLimiter(per_minute)
+        return _limiters[provider]
+
+
+def configure_limits(rpm: Dict[str, float], share: int = 1):
+    """Set per-provider limits; each of `share` processes gets an equal slice of the budget."""
+    _rpm.clear()
+    _rpm.update({provider: value / max(1, share) for provider, value in rpm.items()})
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def load_questions(path: str, provider: str, model: str) -> List[BatchItem]:
+    """Items in file order. Ids default to a hash of the question so reruns line up for resume."""
+    items: List[BatchItem] = []
+    seen: Dict[str, int] = {}
+    with open(path) as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{n}: not valid JSON ({e})")
+            else:
+                entry = {"question": line}
+            question = (entry.get("question") or "").strip()
+            if not question:
+                raise ValueError(f"{path}:{n}: 'question' is required")
+            item_id = str(entry.get("id") or hashlib.sha1(question.encode()).hexdigest()[:12])
+            seen[item_id] = seen.get(item_id, 0) + 1
+            if seen[item_id] > 1:
+                item_id = f"{item_id}-{seen[item_id]}"
+            items.append(BatchItem(item_id, question, entry.get("provider") or provider, entry.get("model") or model))
+    return items
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids recorded as "ok" in an existing output file (a line cut short by a crash is ignored)."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                done.add(record.get("id"))
+    return done
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    text = f"{type(exc).__name__} {exc}".lower()
+    return any(word in text for word in _RETRYABLE_WORDS)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+FAST_PATH_NODES = ("semantic_cache", "query_template")
+
+
+def _run_once(item: BatchItem, attempt: int, agent_factory: Callable, fast_path: bool = False) -> Dict[str, Any]:
+    from src.agents.agent import RunRecorder, stream_agent
+    from src.telemetry.tracing import trace
+
+    agent = agent_factory(item.provider, item.model)
+    config: Dict[str, Any] = {"configurable": {"thread_id": f"batch_{item.id}_{attempt}"}}
+    limiter = get_limiter(item.provider)
+    if limiter is not None:
+        config["callbacks"] = [RateLimitCallback(limiter, item.provider)]
+    recorder = RunRecorder()
+    result_ids: List[str] = []
+    served_by = "agent"
+    with trace(item.question) as question_trace:
+        for chunk in stream_agent(agent, item.question, config, fast_path=fast_path):
+            recorder.observe(chunk)
+            if isinstance(chunk, tuple) and chunk[0] == "updates":
+                result_ids += RESULT_ID_RE.findall(str(chunk[1]))
+                served_by = next((node for node in FAST_PATH_NODES if node in chunk[1]), served_by)
+    if not recorder.answer:
+        raise RuntimeError("Agent finished without an answer")
+    llm_spans = [s for s in question_trace.spans if s.kind == "llm"]
+    return {
+        "sql": recorder.sql,
+        "answer": recorder.answer,
+        "served_by": served_by,
+        "result_ids": list(dict.fromkeys(result_ids)),
+        "llm_calls": len(llm_spans),
+        "tokens_in": sum(s.attrs.get("tokens_in", 0) for s in llm_spans),
+        "tokens_out": sum(s.attrs.get("tokens_out", 0) for s in llm_spans),
+        "timings_ms": question_trace.by_kind(),
+    }
+
+
+def run_item(item: BatchItem, retries: int = BATCH_RETRIES, backoff: float = BATCH_BACKOFF,
+             agent_factory: Optional[Callable] = None, fast_path: bool = False) -> Dict[str, Any]:
+    """One question with retries -> the JSONL record (never raises)."""
+    if agent_factory is None:
+        from src.agents.agent import get_agent
+        agent_factory = get_agent
+    record: Dict[str, Any] = {"id": item.id, "question": item.question, "provider": item.provider, "model": item.model}
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            record.update(_run_once(item, attempt, agent_factory, fast_path), status="ok", error=None)
+            break
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}"[:500])
+            if attempt >= retries or not _retryable(e):
+                break
+            delay = _retry_after(e) or backoff_delay(attempt, backoff, BATCH_MAX_BACKOFF)
+            REGISTRY.counter("nldbq_batch_retries_total", "Batch items retried after a transient error").inc(
+                provider=item.provider
+            )
+            logger.warning(f"🔁 {item.id}: {type(e).__name__} - retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+    record["attempts"] = attempt + 1
+    record["elapsed_ms"] = round(1000 * (time.perf_counter() - start), 2)
+    record["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    REGISTRY.counter("nldbq_batch_items_total", "Batch items finished").inc(status=record["status"])
+    return record
+
+
+def _init_process(rpm: Dict[str, float], processes: int):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(name)s | %(levelname)s | %(message)s")
+    configure_limits(rpm, share=processes)
+
+
+def run_batch(
+    items: List[BatchItem],
+    out_path: str,
+    concurrency: int = BATCH_CONCURRENCY,
+    processes: bool = False,
+    retries: int = BATCH_RETRIES,
+    backoff: float = BATCH_BACKOFF,
+    rpm: Optional[Dict[str, float]] = None,
+    resume: bool = True,
+    agent_factory: Optional[Callable] = None,
+    fast_path: bool = False,
+) -> Dict[str, Any]:
+    """Run `items`, appending one JSON line per finished item to `out_path`; returns a summary."""
+    rpm = rpm if rpm is not None else parse_rpm(BATCH_RPM)
+    done = completed_ids(out_path) if resume else set()
+    pending = [item for item in items if item.id not in done]
+    if done:
+        logger.info(f"⏭️ Resuming: {len(items) - len(pending)} of {len(items)} items already done")
+    directory = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(directory, exist_ok=True)
+    torn = False  # last line cut short by a crash: start ours on a fresh line
+    if resume and os.path.exists(out_path) and os.path.getsize(out_path):
+        with open(out_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+
+    if processes:
+        if agent_factory is not None:
+            raise ValueError("agent_factory is only supported with threads (it must be importable in workers)")
+        executor = ProcessPoolExecutor(concurrency, initializer=_init_process, initargs=(rpm, concurrency))
+    else:
+        configure_limits(rpm)
+        executor = ThreadPoolExecutor(concurrency, thread_name_prefix="nldbq-batch")
+
+    counts = {"ok": 0, "error": 0, "skipped": len(items) - len(pending)}
+    elapsed: List[float] = []
+    start = time.perf_counter()
+    interrupted = False
+    with open(out_path, "a" if resume else "w") as out:
+        if torn:
+            out.write("\n")
+        queue: Iterator[BatchItem] = iter(pending)
+        running: Dict[Future, BatchItem] = {}
+
+        def _submit():
+            # Keep only a few items queued per worker so Ctrl+C does not leave hundreds behind
+            while len(running) < 2 * concurrency:
+                item = next(queue, None)
+                if item is None:
+                    return
+                if processes:
+                    future = executor.submit(run_item, item, retries, backoff, None, fast_path)
+                else:
+                    future = executor.submit(run_item, item, retries, backoff, agent_factory, fast_path)
+                running[future] = item
+
+        try:
+            _submit()
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item = running.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:  # worker process died
+                        record = {"id": item.id, "question": item.question, "status": "error",
+                                  "error": f"{type(e).__name__}: {e}"[:500]}
+                    out.write(json.dumps(record, default=str) + "\n")
+                    out.flush()
+                    counts[record["status"]] += 1
+                    if record.get("elapsed_ms") is not None:
+                        elapsed.append(record["elapsed_ms"])
+                    n = counts["ok"] + counts["error"]
+                    icon = "✅" if record["status"] == "ok" else "❌"
+                    logger.info(f"{icon} [{n}/{len(pending)}] {item.id} {record.get('elapsed_ms', 0):.0f} ms"
+                                + (f" - {record['error']}" if record["status"] != "ok" else ""))
+                _submit()
+        except KeyboardInterrupt:
+            interrupted = True
+            logger.warning("🛑 Interrupted - finished items are saved; rerun the same command to resume")
+        finally:
+            executor.shutdown(wait=not interrupted, cancel_futures=True)
+
+    wall = time.perf_counter() - start
+    ran = counts["ok"] + counts["error"]
+    return {
+        **counts,
+        "total": len(items),
+        "interrupted": interrupted,
+        "wall_s": round(wall, 2),
+        "per_minute": round(60 * ran / wall, 1) if wall and ran else 0.0,
+        "p50_ms": round(statistics.median(elapsed), 1) if elapsed else None,
+        "p95_ms": round(sorted(elapsed)[round(0.95 * (len(elapsed) - 1))], 1) if elapsed else None,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a file of questions through the NLDBQ agent")
+    parser.add_argument("questions", help=".txt (one question per line) or .jsonl with a 'question' field")
+    parser.add_argument("--out", default="batch_results.jsonl", help="JSONL results, appended as items finish")
+    parser.add_argument("--provider", default=default_llm["provider"])
+    parser.add_argument("--model", default=default_llm["model"])
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="questions in flight")
+    parser.add_argument("--processes", action="store_true",
+                        help="use a process pool instead of threads (CPU-bound local models)")
+    parser.add_argument("--retries", type=int, default=BATCH_RETRIES, help="retries per item on transient errors")
+    parser.add_argument("--backoff", type=float, default=BATCH_BACKOFF, help="base backoff in seconds (doubles per retry)")
+    parser.add_argument("--rpm", default=BATCH_RPM, help='LLM calls per minute: "60" or "OpenAI=300,Groq=30"')
+    fast = parser.add_mutually_exclusive_group()
+    fast.add_argument("--fast-path", dest="fast_path", action="store_true",
+                      help="allow answers from the semantic cache / query templates")
+    fast.add_argument("--no-fast-path", dest="fast_path", action="store_false",
+                      help="always run the agent (default)")
+    parser.set_defaults(fast_path=False)
+    parser.add_argument("--no-resume", dest="resume", action="store_false", help="overwrite --out instead of resuming")
+    parser.add_argument("--limit", type=int, default=0, help="only the first N questions")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(name)s | %(levelname)s | %(message)s")
+    items = load_questions(args.questions, args.provider, args.model)
+    if args.limit:
+        items = items[:args.limit]
+    summary = run_batch(
+        items, args.out, concurrency=max(1, args.concurrency), processes=args.processes,
+        retries=args.retries, backoff=args.backoff, rpm=parse_rpm(args.rpm), resume=args.resume,
+        fast_path=args.fast_path,
+    )
+    print(f"\n📦 {summary['ok']} ok, {summary['error']} failed, {summary['skipped']} skipped of {summary['total']}"
+          f" in {summary['wall_s']}s ({summary['per_minute']}/min, p50 {summary['p50_ms']} ms,"
+          f" p95 {summary['p95_ms']} ms) -> {args.out}")
+    return 130 if summary["interrupted"] else (1 if summary["error"] else 0)
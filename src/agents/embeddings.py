@@ -0,0 +1,50 @@
+"""
+Embeddings - Provider embeddings plus a local hashing embedder for offline use.
+The hashing embedder needs no network or model download, so caches and the
+schema index stay testable in a sandbox.
+"""
+import hashlib
+import math
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from src.utils.text import tokenize
+
+
+class HashingEmbedder(Embeddings):
+    """Feature-hashed bag of words + character trigrams, L2-normalized."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _bucket(self, feature: str) -> int:
+        return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=4).digest(), "little") % self.dim
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for word in tokenize(text):
+            vector[self._bucket("w:" + word)] += 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                vector[self._bucket("c:" + padded[i:i + 3])] += 0.25
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(t) for t in texts]
+
+
+def get_embeddings(spec: str) -> Embeddings:
+    """Embeddings from a spec: 'hashing', 'openai:<model>' or 'ollama:<model>'."""
+    provider, _, model = spec.partition(":")
+    provider = provider.strip().lower()
+    if provider == "hashing":
+        return HashingEmbedder(int(model) if model else 512)
+    if provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=model or "text-embedding-3-small")
+    if provider == "ollama":
+        from langchain_ollama import OllamaEmbeddings
+        return OllamaEmbeddings(model=model or "nomic-embed-text")
+    raise ValueError(f"Unknown embeddings spec: {spec}")
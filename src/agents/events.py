@@ -0,0 +1,51 @@
+"""
+Agent Events - Flatten stream_agent/astream_agent chunks into typed, JSON-ready events.
+Shared by the HTTP service and batch runner so every consumer sees the same shapes:
+token, tool_call, tool_result, plan and answer.
+"""
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+
+def message_text(msg: Any) -> str:
+    """Plain text of a message whose content may be a string or a list of parts."""
+    content = getattr(msg, "content", "")
+    if isinstance(content, list):
+        return "".join(p.get("text", "") if isinstance(p, dict) else str(p) for p in content)
+    return str(content or "")
+
+
+def chunk_events(chunk: Any) -> List[Dict[str, Any]]:
+    """Events for one ("messages" | "updates", data) chunk."""
+    if not (isinstance(chunk, tuple) and len(chunk) == 2):
+        return []
+    mode, data = chunk
+    events = []
+
+    if mode == "messages":
+        msg = data[0] if isinstance(data, tuple) else data
+        if isinstance(msg, AIMessageChunk):
+            text = message_text(msg)
+            if text:
+                events.append({"type": "token", "text": text})
+        return events
+
+    if mode != "updates" or not isinstance(data, dict):
+        return events
+    for node, update in data.items():
+        if not isinstance(update, dict):
+            continue
+        if update.get("todos"):
+            events.append({"type": "plan", "node": node, "todos": [
+                {"content": t.get("content", ""), "status": t.get("status", "pending")} for t in update["todos"]
+            ]})
+        for msg in update.get("messages", []) or []:
+            if isinstance(msg, AIMessage):
+                for call in msg.tool_calls or []:
+                    events.append({"type": "tool_call", "node": node, "name": call["name"], "args": call["args"]})
+                if not msg.tool_calls and message_text(msg).strip():
+                    events.append({"type": "answer", "node": node, "text": message_text(msg).strip()})
+            elif isinstance(msg, ToolMessage):
+                events.append({"type": "tool_result", "node": node, "name": msg.name, "content": message_text(msg)})
+    return events
@@ -0,0 +1,299 @@
+"""
+LLM Response Cache - Opt-in, on-disk cache around any chat model built by get_llm.
+A request is keyed by provider, model, temperature, messages and tool schemas; the streamed
+response is stored chunk by chunk in SQLite (LRU, bounded by LLM_CACHE_MAX_BYTES) and
+replayed the same way on a hit, so repeated evals, demos and benchmark runs skip the provider.
+
+Result ids and fetch_more_rows handles are random per run, so they are masked in the key and
+the ones a cached response refers to are swapped for the current run's on replay.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel, generate_from_stream
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.config.settings import LLM_CACHE_MAX_BYTES, LLM_CACHE_PATH
+from src.db.result_store import RESULT_ID_RE
+from src.db.sql_stream import CONTINUATION_RE
+from src.telemetry.metrics import REGISTRY
+from src.telemetry.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_VOLATILE_RES = (RESULT_ID_RE, CONTINUATION_RE)
+
+_cache: Optional["LLMResponseCache"] = None
+_lock = threading.Lock()
+
+
+def volatile_tokens(messages: Sequence[BaseMessage]) -> List[str]:
+    """Per-run ids (result ids, continuation handles) in order of first appearance."""
+    tokens: List[str] = []
+    for msg in messages:
+        text = msg.content if isinstance(msg.content, str) else json.dumps(msg.content, default=str)
+        for pattern in _VOLATILE_RES:
+            for token in pattern.findall(text):
+                if token not in tokens:
+                    tokens.append(token)
+    return tokens
+
+
+def _mask(text: str, tokens: Sequence[str]) -> str:
+    for i, token in enumerate(tokens):
+        text = re.sub(rf"\b{token}\b", f"<v{i}>", text)
+    return text
+
+
+def _message_key(msg: BaseMessage) -> Dict[str, Any]:
+    """What the provider sees of a message - ids and provider metadata vary run to run."""
+    data: Dict[str, Any] = {"type": msg.type, "content": msg.content}
+    if getattr(msg, "tool_calls", None):
+        data["tool_calls"] = [{"name": c["name"], "args": c["args"], "id": c.get("id")} for c in msg.tool_calls]
+    for attr in ("tool_call_id", "name"):
+        if getattr(msg, attr, None):
+            data[attr] = getattr(msg, attr)
+    return data
+
+
+def request_key(provider: str, model: BaseChatModel, messages: Sequence[BaseMessage],
+                tools: Sequence[Dict], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> str:
+    payload = json.dumps({
+        "provider": provider,
+        "llm": model._llm_type,
+        "model": getattr(model, "model_name", None) or getattr(model, "model", None),
+        "temperature": getattr(model, "temperature", None),
+        "messages": [_message_key(m) for m in messages],
+        "tools": list(tools),
+        "stop": stop,
+        "kwargs": {k: v for k, v in kwargs.items() if k != "tools"},
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(_mask(payload, volatile_tokens(messages)).encode()).hexdigest()
+
+
+def _as_chunk(message: AIMessage) -> AIMessageChunk:
+    return AIMessageChunk(
+        content=message.content,
+        additional_kwargs=message.additional_kwargs,
+        response_metadata=message.response_metadata,
+        usage_metadata=message.usage_metadata,
+        tool_call_chunks=[
+            {"name": c["name"], "args": json.dumps(c["args"]), "id": c.get("id"), "index": i}
+            for i, c in enumerate(message.tool_calls or [])
+        ],
+    )
+
+
+class LLMResponseCache:
+    """SQLite table of recorded responses (a JSON list of chunk messages per key), LRU by bytes."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # batch worker processes share the file
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY, provider TEXT, model TEXT, chunks TEXT, volatile TEXT,"
+            " bytes INTEGER, latency_ms REAL, created REAL, last_used REAL, hits INTEGER DEFAULT 0)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_ms = 0.0
+
+    def get(self, key: str, volatile: Sequence[str]) -> Optional[List[AIMessageChunk]]:
+        """Recorded chunks with the recorded run's volatile ids swapped for `volatile`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chunks, volatile, latency_ms FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            self.saved_ms += row[2] or 0.0
+        text = row[0]
+        for old, new in zip(json.loads(row[1]), volatile):
+            if old != new:
+                text = re.sub(rf"\b{old}\b", new, text)
+        chunks = messages_from_dict(json.loads(text))
+        for chunk in chunks:
+            chunk.usage_metadata = None  # nothing was spent this time
+        return chunks
+
+    def put(self, key: str, provider: str, model: str, chunks: List[AIMessageChunk],
+            volatile: Sequence[str], latency_ms: float):
+        messages = []
+        for chunk in chunks:
+            data = message_to_dict(chunk)
+            data["data"]["id"] = None  # the replaying run assigns its own id
+            messages.append(data)
+        text = json.dumps(messages, default=str)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses"
+                " (key, provider, model, chunks, volatile, bytes, latency_ms, created, last_used, hits)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, provider, model, text, json.dumps(list(volatile)), len(text), latency_ms, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self.max_bytes <= 0:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed, victims = 0, []
+        for key, size in self._conn.execute("SELECT key, bytes FROM llm_responses ORDER BY last_used"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM llm_responses"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "saved_ms": round(self.saved_ms, 2),
+            }
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide response cache shared by every wrapped model."""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES)
+    return _cache
+
+
+def _llm_cache_gauges():
+    if _cache is not None:
+        for key, value in _cache.stats().items():
+            yield f"nldbq_llm_cache_{key}", {}, value
+
+REGISTRY.register_collector(_llm_cache_gauges)
+
+
+class CachedChatModel(BaseChatModel):
+    """Wraps a provider chat model; misses stream from it and are recorded, hits replay the recording."""
+
+    inner: BaseChatModel
+    provider: str
+    store: Any = None  # LLMResponseCache; not BaseChatModel.cache, which only takes a LangChain BaseCache
+    tool_schemas: List[Dict[str, Any]] = []
+    bound_kwargs: Dict[str, Any] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cached-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def bind_tools(self, tools, **kwargs):
+        binding = self.inner.bind_tools(tools, **kwargs)
+        return self.model_copy(update={
+            "tool_schemas": [convert_to_openai_tool(t) for t in tools],
+            "bound_kwargs": dict(getattr(binding, "kwargs", {}) or {}),
+        })
+
+    def _lookup(self, messages, stop, kwargs):
+        call_kwargs = {**self.bound_kwargs, **kwargs}
+        key = request_key(self.provider, self.inner, messages, self.tool_schemas, stop, call_kwargs)
+        volatile = volatile_tokens(messages)
+        with span("cache", "llm_response") as s:
+            chunks = self.store.get(key, volatile)
+            s.set(hit=chunks is not None)
+        REGISTRY.counter("nldbq_llm_cache_lookups_total", "LLM response cache lookups").inc(
+            result="hit" if chunks is not None else "miss"
+        )
+        return key, volatile, call_kwargs, chunks
+
+    def _record(self, key, volatile, chunks, started):
+        model = getattr(self.inner, "model_name", None) or getattr(self.inner, "model", None)
+        self.store.put(key, self.provider, str(model), chunks, volatile, 1000 * (time.perf_counter() - started))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        key, volatile, call_kwargs, cached = self._lookup(messages, stop, kwargs)
+        if cached is not None:
+            for chunk in cached:
+                yield ChatGenerationChunk(message=chunk)
+            return
+        started, recorded = time.perf_counter(), []
+        # No run_manager: the outer stream() already reports every chunk we yield
+        for chunk in self.inner._stream(messages, stop=stop, **call_kwargs):
+            recorded.append(chunk.message)
+            yield chunk
+        self._record(key, volatile, recorded, started)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        key, volatile, call_kwargs, cached = self._lookup(messages, stop, kwargs)
+        if cached is not None:
+            for chunk in cached:
+                yield ChatGenerationChunk(message=chunk)
+            return
+        started, recorded = time.perf_counter(), []
+        async for chunk in self.inner._astream(messages, stop=stop, **call_kwargs):
+            recorded.append(chunk.message)
+            yield chunk
+        self._record(key, volatile, recorded, started)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        key, volatile, call_kwargs, cached = self._lookup(messages, stop, kwargs)
+        if cached is not None:
+            return generate_from_stream(ChatGenerationChunk(message=c) for c in cached)
+        started = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, **call_kwargs)
+        self._record(key, volatile, [_as_chunk(g.message) for g in result.generations[:1]], started)
+        return result
+
+    @classmethod
+    def wrap(cls, model: BaseChatModel, provider: str,
+             cache: Optional[LLMResponseCache] = None) -> "CachedChatModel":
+        """Move the model's callbacks (e.g. LLMTracer) to the wrapper - the wrapper is what gets invoked."""
+        callbacks, model.callbacks = model.callbacks, None
+        return cls(inner=model, provider=provider, store=cache or get_llm_cache(), callbacks=callbacks)
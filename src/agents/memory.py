@@ -0,0 +1,297 @@
+"""
+Conversation Memory - One bounded, persistent checkpointer for every agent + history trimming.
+Threads live in SQLite (or memory) and are dropped once idle for CHECKPOINT_IDLE_TTL or when
+more than CHECKPOINT_MAX_THREADS are open, each keeping its latest CHECKPOINT_KEEP_PER_THREAD
+checkpoints; HistoryTrimMiddleware folds old turns into a short
+summary so neither the checkpoint nor the per-turn prompt grows without bound.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from src.agents.events import message_text
+from src.config.settings import (
+    CHECKPOINT_BACKEND, CHECKPOINT_IDLE_TTL, CHECKPOINT_KEEP_PER_THREAD, CHECKPOINT_MAX_THREADS, CHECKPOINT_PATH,
+    HISTORY_KEEP_TOKENS, HISTORY_MAX_TOKENS,
+)
+from src.telemetry.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation (older turns were trimmed):"
+SUMMARY_MAX_LINES = 20
+
+_checkpointer: Optional["BoundedCheckpointer"] = None
+_lock = threading.Lock()
+
+
+class BoundedCheckpointer(BaseCheckpointSaver):
+    """Delegates to a LangGraph saver, evicts least-recently-used / idle threads and prunes old checkpoints."""
+
+    def __init__(self, backend: BaseCheckpointSaver, max_threads: int, idle_ttl: float, keep_per_thread: int = 0):
+        super().__init__(serde=backend.serde)
+        self.backend = backend
+        self.max_threads = max_threads
+        self.idle_ttl = idle_ttl
+        self.keep_per_thread = keep_per_thread
+        self._last_used: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.pruned = 0
+
+    def track(self, thread_ids: List[str]):
+        """Register threads found in persistent storage (counted as used now)."""
+        now = time.time()
+        with self._lock:
+            for thread_id in thread_ids:
+                self._last_used.setdefault(thread_id, now)
+        self._evict()
+
+    def _touch(self, config: Dict):
+        thread_id = (config.get("configurable") or {}).get("thread_id")
+        if thread_id is None:
+            return
+        with self._lock:
+            self._last_used[thread_id] = time.time()
+            self._last_used.move_to_end(thread_id)
+        self._evict()
+
+    def _evict(self):
+        now = time.time()
+        victims = []
+        with self._lock:
+            while self._last_used:
+                thread_id, last_used = next(iter(self._last_used.items()))
+                over = self.max_threads > 0 and len(self._last_used) > self.max_threads
+                idle = self.idle_ttl > 0 and now - last_used > self.idle_ttl
+                if not (over or idle):
+                    break
+                self._last_used.popitem(last=False)
+                victims.append(thread_id)
+        for thread_id in victims:
+            try:
+                self.backend.delete_thread(thread_id)
+                self.evictions += 1
+                logger.info(f"🧹 Evicted conversation thread {thread_id}")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not evict thread {thread_id}: {e}")
+
+    def _prune(self, config: Dict):
+        """Drop all but the latest keep_per_thread checkpoints (and their writes) of one thread + namespace."""
+        if self.keep_per_thread <= 0:
+            return
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        try:
+            if isinstance(self.backend, InMemorySaver):
+                removed = self._prune_memory(thread_id, checkpoint_ns)
+            elif hasattr(self.backend, "cursor"):
+                removed = self._prune_sqlite(thread_id, checkpoint_ns)
+            else:
+                return
+        except Exception as e:
+            logger.warning(f"⚠️ Could not prune checkpoints of thread {thread_id}: {e}")
+            return
+        if removed:
+            with self._lock:
+                self.pruned += removed
+
+    def _prune_sqlite(self, thread_id: str, checkpoint_ns: str) -> int:
+        # Checkpoint ids are time-ordered (uuid6), the same order SqliteSaver.list uses
+        latest = (
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+            " ORDER BY checkpoint_id DESC LIMIT ?"
+        )
+        args = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_per_thread)
+        with self.backend.cursor() as cur:
+            cur.execute(
+                f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({latest})", args
+            )
+            removed = cur.rowcount
+            cur.execute(
+                f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({latest})", args
+            )
+        return max(removed, 0)
+
+    def _prune_memory(self, thread_id: str, checkpoint_ns: str) -> int:
+        backend = self.backend
+        saved = backend.storage[thread_id][checkpoint_ns]
+        stale = sorted(saved)[:-self.keep_per_thread]
+        if not stale:
+            return 0
+        for checkpoint_id in stale:
+            del saved[checkpoint_id]
+        stale = set(stale)
+        for key in [k for k in list(backend.writes) if k[:2] == (thread_id, checkpoint_ns) and k[2] in stale]:
+            del backend.writes[key]
+        # Channel values live in versioned blobs; keep only the versions a surviving checkpoint points to
+        live = {
+            (channel, version)
+            for checkpoint, _, _ in list(saved.values())
+            for channel, version in backend.serde.loads_typed(checkpoint)["channel_versions"].items()
+        }
+        for key in [k for k in list(backend.blobs) if k[:2] == (thread_id, checkpoint_ns) and k[2:] not in live]:
+            del backend.blobs[key]
+        return len(stale)
+
+    # --- sync API ---
+    def get_tuple(self, config):
+        self._touch(config)
+        return self.backend.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        return self.backend.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        self._touch(config)
+        saved = self.backend.put(config, checkpoint, metadata, new_versions)
+        self._prune(saved)
+        return saved
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        return self.backend.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str):
+        with self._lock:
+            self._last_used.pop(thread_id, None)
+        self.backend.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.backend.get_next_version(current, channel)
+
+    # --- async API: the sync backends are fast but may block on disk, so run them off the loop ---
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "threads": len(self._last_used),
+                "max_threads": self.max_threads,
+                "evictions": self.evictions,
+                "keep_per_thread": self.keep_per_thread,
+                "pruned_checkpoints": self.pruned,
+            }
+
+
+def _sqlite_backend(path: str):
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError:
+        logger.warning("⚠️ langgraph-checkpoint-sqlite not installed - conversation memory is in-process only")
+        return None, []
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    saver = SqliteSaver(conn)
+    saver.setup()
+    thread_ids = [row[0] for row in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+    return saver, thread_ids
+
+
+def get_checkpointer() -> BoundedCheckpointer:
+    """Process-wide checkpointer shared by every cached agent."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _lock:
+            if _checkpointer is None:
+                backend, existing = (None, [])
+                if CHECKPOINT_BACKEND == "sqlite":
+                    backend, existing = _sqlite_backend(CHECKPOINT_PATH)
+                checkpointer = BoundedCheckpointer(
+                    backend or InMemorySaver(), CHECKPOINT_MAX_THREADS, CHECKPOINT_IDLE_TTL,
+                    CHECKPOINT_KEEP_PER_THREAD,
+                )
+                checkpointer.track(existing)
+                _checkpointer = checkpointer
+    return _checkpointer
+
+
+def _summary_lines(messages: List[Any]) -> List[str]:
+    """One line per trimmed question: the question, the SQL it ran and the start of the answer."""
+    lines: List[str] = []
+    for msg in messages:
+        text = message_text(msg).strip()
+        if isinstance(msg, HumanMessage):
+            if text.startswith(SUMMARY_PREFIX):
+                lines += [l for l in text[len(SUMMARY_PREFIX):].splitlines() if l.strip()]
+            else:
+                lines.append(f"- Q: {text[:200]}")
+        elif isinstance(msg, AIMessage) and lines:
+            for call in msg.tool_calls or []:
+                if call["name"] == "execute_sql":
+                    lines[-1] += f" | SQL: {' '.join(str(call['args'].get('query', '')).split())[:300]}"
+            if not msg.tool_calls and text:
+                lines[-1] += f" | A: {' '.join(text.split())[:200]}"
+    return lines[-SUMMARY_MAX_LINES:]
+
+
+def trim_history(messages: List[Any], max_tokens: int, keep_tokens: int) -> Optional[List[Any]]:
+    """Replacement message list (summary + recent turns) or None when no trim is needed.
+
+    Cuts only at a user question so tool calls and their results are never split, and
+    always keeps the current question's turn verbatim.
+    """
+    if max_tokens <= 0 or count_tokens_approximately(messages) <= max_tokens:
+        return None
+    starts = [
+        i for i, m in enumerate(messages)
+        if isinstance(m, HumanMessage) and not message_text(m).startswith(SUMMARY_PREFIX)
+    ]
+    if len(starts) < 2:
+        return None
+    cut = starts[-1]
+    for start in reversed(starts[:-1]):
+        if count_tokens_approximately(messages[start:]) > keep_tokens:
+            break
+        cut = start
+    summary = "\n".join([SUMMARY_PREFIX] + _summary_lines(messages[:cut]))
+    return [HumanMessage(content=summary)] + list(messages[cut:])
+
+
+class HistoryTrimMiddleware(AgentMiddleware):
+    """Before each model call, fold old turns into a summary once the thread exceeds max_tokens."""
+
+    def __init__(self, max_tokens: int = HISTORY_MAX_TOKENS, keep_tokens: int = HISTORY_KEEP_TOKENS):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.keep_tokens = keep_tokens
+
+    def before_model(self, state, runtime) -> Optional[Dict[str, Any]]:
+        trimmed = trim_history(state["messages"], self.max_tokens, self.keep_tokens)
+        if trimmed is None:
+            return None
+        REGISTRY.counter("nldbq_history_trims_total", "Conversation histories folded into a summary").inc()
+        logger.info(f"✂️ Trimmed history: {len(state['messages'])} -> {len(trimmed)} messages")
+        return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *trimmed]}
+
+    async def abefore_model(self, state, runtime) -> Optional[Dict[str, Any]]:
+        return self.before_model(state, runtime)
@@ -0,0 +1,271 @@
+"""
+Query Templates - Question shapes learned from successful runs, answered without the LLM.
+Values that appear both in a question and in its executed SQL ("top 5", 'Sales') become
+slots; a new question that matches a template's shape exactly has its values filled into
+the SQL and is run directly. Templates persist as JSON; anything that fails, returns no
+rows or does not match falls back to the full agent loop.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SQL_STRING_RE = re.compile(r"N?'((?:[^']|'')*)'")
+_NUMBER_RE = re.compile(r"(?<![\w.])\d+(?![\w.])")
+_LIMIT_RE = re.compile(r"\b(?:TOP|LIMIT|FIRST|NEXT)\s*\(?\s*(\d+)", re.IGNORECASE)
+_SLOT_RE = re.compile(r"\{(p\d+)\}")
+MAX_EXAMPLES = 5
+
+
+def normalize_question(question: str) -> str:
+    text = " ".join(question.strip().split()).lower()
+    return text.rstrip("?.! ").replace('"', "").replace("'", "")
+
+
+def _case_of(original: str, spoken: str) -> str:
+    """How the SQL literal was cased relative to the question ("sales" -> 'Sales' is title)."""
+    if original == spoken:
+        return "same"
+    for name in ("title", "upper", "lower"):
+        if original == getattr(spoken, name)():
+            return name
+    return "same"
+
+
+def _apply_case(value: str, case: str) -> str:
+    return value if case == "same" else getattr(value, case)()
+
+
+class TemplateMatch(NamedTuple):
+    template: "Template"
+    sql: str
+    params: Dict[str, str]
+
+
+class Template:
+    """question pattern with {pN} slots + SQL with the same slots."""
+
+    def __init__(self, pattern: str, sql: str, slots: Dict[str, Dict[str, str]]):
+        self.pattern = pattern
+        self.sql = sql
+        self.slots = slots  # pN -> {"kind": "number"|"text", "case": ...}
+        self.examples: List[str] = []
+        self.agent_ms = 0.0  # average agent-loop latency of the runs it was learned from
+        self.hits = 0
+        self.fallbacks = 0
+        self._regex: Optional[re.Pattern] = None
+
+    @property
+    def support(self) -> int:
+        return len(self.examples)
+
+    @property
+    def regex(self) -> re.Pattern:
+        if self._regex is None:
+            parts, pos = [], 0
+            for m in _SLOT_RE.finditer(self.pattern):
+                parts.append(re.escape(self.pattern[pos:m.start()]))
+                kind = self.slots[m.group(1)]["kind"]
+                parts.append(rf"(?P<{m.group(1)}>\d+)" if kind == "number" else rf"(?P<{m.group(1)}>[^,;]+?)")
+                pos = m.end()
+            parts.append(re.escape(self.pattern[pos:]))
+            self._regex = re.compile("^" + "".join(parts) + "$")
+        return self._regex
+
+    def fill(self, params: Dict[str, str]) -> str:
+        def _value(m):
+            slot, value = m.group(1), params[m.group(1)]
+            if self.slots[slot]["kind"] == "number":
+                return str(int(value))
+            return _apply_case(value, self.slots[slot]["case"]).replace("'", "''")
+        return _SLOT_RE.sub(_value, self.sql)
+
+    def to_dict(self) -> Dict:
+        return {
+            "pattern": self.pattern, "sql": self.sql, "slots": self.slots, "examples": self.examples,
+            "agent_ms": self.agent_ms, "hits": self.hits, "fallbacks": self.fallbacks,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Template":
+        template = cls(data["pattern"], data["sql"], data["slots"])
+        template.examples = data.get("examples", [])
+        template.agent_ms = data.get("agent_ms", 0.0)
+        template.hits = data.get("hits", 0)
+        template.fallbacks = data.get("fallbacks", 0)
+        return template
+
+
+def extract_template(question: str, sql: str) -> Optional[Template]:
+    """Slot every value shared by question and SQL; None if the SQL has braces (can't be templated)."""
+    if "{" in sql or "}" in sql:
+        return None
+    pattern = normalize_question(question)
+    if "{" in pattern or "}" in pattern:
+        return None
+    slots: Dict[str, Dict[str, str]] = {}
+
+    # Text: SQL string literals (LIKE wildcards aside) spoken as whole words in the question
+    replacements: List[Tuple[int, int, str]] = []
+    for m in _SQL_STRING_RE.finditer(sql):
+        core = m.group(1).replace("''", "'").strip("%")
+        if len(core) < 2 or "{" in core:
+            continue
+        spoken = re.search(rf"(?<!\w){re.escape(core.lower())}(?!\w)", pattern)
+        if spoken is None:
+            continue
+        slot = f"p{len(slots)}"
+        slots[slot] = {"kind": "text", "case": _case_of(core, spoken.group())}
+        pattern = pattern[:spoken.start()] + "{" + slot + "}" + pattern[spoken.end():]
+        start = m.start(1) + m.group(1).find(core.replace("'", "''"))
+        replacements.append((start, start + len(core.replace("'", "''")), slot))
+
+    # Numbers: a question number used once in the SQL, or as its TOP/LIMIT
+    sql_numbers = [(m.start(), m.end(), m.group()) for m in _NUMBER_RE.finditer(sql)
+                   if not any(a <= m.start() < b for a, b, _ in replacements)
+                   and not _inside_string(sql, m.start())]
+    limits = {m.start(1) for m in _LIMIT_RE.finditer(sql)}
+    for m in list(_NUMBER_RE.finditer(pattern)):
+        value = m.group()
+        uses = [u for u in sql_numbers if u[2] == value]
+        if len(uses) > 1:
+            uses = [u for u in uses if u[0] in limits]
+        if len(uses) != 1 or pattern.count(value) != 1:
+            continue
+        slot = f"p{len(slots)}"
+        slots[slot] = {"kind": "number", "case": "same"}
+        pattern = re.sub(rf"(?<![\w.]){value}(?![\w.])", "{" + slot + "}", pattern, count=1)
+        replacements.append((uses[0][0], uses[0][1], slot))
+
+    for start, end, slot in sorted(replacements, reverse=True):
+        sql = sql[:start] + "{" + slot + "}" + sql[end:]
+    return Template(pattern, sql.strip().rstrip(";"), slots)
+
+
+def _inside_string(sql: str, index: int) -> bool:
+    return any(m.start() < index < m.end() for m in _SQL_STRING_RE.finditer(sql))
+
+
+class TemplateLibrary:
+    """Thread-safe, persisted LRU of templates keyed by question pattern, with hit/latency stats."""
+
+    def __init__(self, path: Optional[str], max_templates: int, min_support: int):
+        self.path = path
+        self.max_templates = max_templates
+        self.min_support = min_support
+        self._templates: "OrderedDict[str, Template]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.fallbacks = 0
+        self.saved_ms = 0.0
+        self.fast_ms = 0.0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                for data in json.load(f):
+                    template = Template.from_dict(data)
+                    self._templates[template.pattern] = template
+            logger.info(f"🧩 Loaded {len(self._templates)} query templates from {self.path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable template file {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump([t.to_dict() for t in self._templates.values()], f, indent=1)
+        os.replace(tmp, self.path)
+
+    def learn(self, question: str, sql: str, agent_ms: float = 0.0) -> Optional[Template]:
+        """Record a successful (question, SQL) run; repeats of the same question don't add support."""
+        template = extract_template(question, sql)
+        if template is None:
+            return None
+        example = normalize_question(question)
+        with self._lock:
+            existing = self._templates.pop(template.pattern, None)
+            if existing is not None and (existing.sql == template.sql or example in existing.examples):
+                # Same question seen again (e.g. UI history after the agent run): keep the executed SQL
+                template = existing
+            elif existing is not None:
+                template.agent_ms = existing.agent_ms  # same shape, newer SQL wins; history restarts
+            if example not in template.examples:
+                template.examples = (template.examples + [example])[-MAX_EXAMPLES:]
+                if agent_ms:
+                    n = len(template.examples)
+                    template.agent_ms = agent_ms if n == 1 else template.agent_ms + (agent_ms - template.agent_ms) / n
+            self._templates[template.pattern] = template
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+            self._save()
+        return template
+
+    def learn_history(self, entries: List[Dict]) -> int:
+        """Mine UI query_history entries ({"question", "sql", ...}); returns how many were usable."""
+        learned = 0
+        for entry in entries:
+            if entry.get("question") and entry.get("sql"):
+                learned += self.learn(entry["question"], entry["sql"]) is not None
+        return learned
+
+    def match(self, question: str) -> Optional[TemplateMatch]:
+        """Template whose shape matches the question exactly (most support first), with its SQL filled."""
+        text = normalize_question(question)
+        with self._lock:
+            self.lookups += 1
+            candidates = sorted(
+                (t for t in self._templates.values() if t.support >= self.min_support and t.fallbacks <= t.hits + 1),
+                key=lambda t: (-t.support, -len(t.pattern)),
+            )
+        for template in candidates:
+            m = template.regex.match(text)
+            if m is not None:
+                params = {slot: value.strip() for slot, value in m.groupdict().items()}
+                return TemplateMatch(template, template.fill(params), params)
+        return None
+
+    def record_hit(self, template: Template, fast_ms: float):
+        with self._lock:
+            template.hits += 1
+            self.hits += 1
+            self.fast_ms += fast_ms
+            self.saved_ms += max(template.agent_ms - fast_ms, 0.0)
+            self._templates.move_to_end(template.pattern)
+            self._save()
+
+    def record_fallback(self, template: Template):
+        with self._lock:
+            template.fallbacks += 1
+            self.fallbacks += 1
+            self._save()
+
+    def templates(self) -> List[Dict]:
+        with self._lock:
+            return [{"pattern": t.pattern, "sql": t.sql, "support": t.support, "hits": t.hits}
+                    for t in self._templates.values()]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "templates": len(self._templates),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "avg_fast_ms": round(self.fast_ms / self.hits, 2) if self.hits else 0.0,
+                "saved_ms": round(self.saved_ms, 2),
+            }
@@ -0,0 +1,87 @@
+"""
+Schema Index - Persistent FAISS index of table schemas behind find_relevant_tables.
+Loads the saved index (same layout as notebook/schema_vector_db) once and answers
+top-k table lookups in memory; builds it from the reflected catalog if missing.
+"""
+import logging
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from src.agents.embeddings import get_embeddings
+from src.config.settings import SCHEMA_INDEX_EMBEDDINGS, SCHEMA_INDEX_PATH
+from src.db.catalog import Table
+
+logger = logging.getLogger(__name__)
+
+
+def table_document(table: Table) -> Document:
+    """One document per table; the DDL carries columns, PK and FK text for matching."""
+    return Document(page_content=table.ddl(), metadata={"table": table.full_name, "type": "schema"})
+
+
+class SchemaIndex:
+    """Lazy-loaded vector index mapping a question to its most relevant tables."""
+
+    def __init__(self, path: str, embeddings_spec: str):
+        self.path = path
+        self.embeddings_spec = embeddings_spec
+        self._store = None
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._store is not None
+
+    def load(self):
+        """Load the persisted index, or build + save it from the catalog when absent."""
+        if self._store is not None:
+            return self._store
+        with self._lock:
+            if self._store is not None:
+                return self._store
+            from langchain_community.vectorstores import FAISS
+            start = time.perf_counter()
+            if os.path.exists(os.path.join(self.path, "index.faiss")):
+                embeddings = get_embeddings(self.embeddings_spec)
+                self._store = FAISS.load_local(self.path, embeddings, allow_dangerous_deserialization=True)
+                logger.info(f"🗂️ Schema index loaded from {self.path} ({time.perf_counter() - start:.2f}s)")
+            else:
+                from src.agents.schema_indexer import SchemaIndexer
+                from src.db.db_schema_wrapper import db_schema_wrapper
+                indexer = SchemaIndexer(self.path, self.embeddings_spec)
+                self._store, _ = indexer.sync(db_schema_wrapper.get_catalog(), full=True)
+                if self._store is None:
+                    raise ValueError("Catalog has no tables to index")
+            return self._store
+
+    def search(self, question: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k distinct tables as (schema.table, distance); lower distance = more relevant."""
+        store = self.load()
+        seen, ranked = set(), []
+        # Indexes built from split documents hold several chunks per table
+        for doc, score in store.similarity_search_with_score(question, k=k * 3):
+            table = doc.metadata.get("table", "").strip()
+            if table and table not in seen:
+                seen.add(table)
+                ranked.append((table, float(score)))
+            if len(ranked) == k:
+                break
+        return ranked
+
+    def reset(self, store=None):
+        """Swap in a freshly (re)built store, or drop the in-memory one."""
+        with self._lock:
+            self._store = store
+
+
+_schema_index: Optional[SchemaIndex] = None
+
+def get_schema_index() -> SchemaIndex:
+    global _schema_index
+    if _schema_index is None:
+        _schema_index = SchemaIndex(SCHEMA_INDEX_PATH, SCHEMA_INDEX_EMBEDDINGS)
+    return _schema_index
@@ -0,0 +1,187 @@
+"""
+Schema Indexer - Incremental re-indexing of the schema vector store.
+Each table's column/PK/FK definition is hashed into a manifest next to the index;
+a sync re-embeds only added or changed tables (in batches) and deletes dropped ones.
+
+CLI:
+    python -m src.agents.schema_indexer              # incremental sync
+    python -m src.agents.schema_indexer --full       # rebuild everything
+    python -m src.agents.schema_indexer --watch 600  # keep syncing every 10 minutes
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from src.agents.embeddings import get_embeddings
+from src.agents.schema_index import SchemaIndex, get_schema_index, table_document
+from src.config.settings import SCHEMA_INDEX_EMBED_BATCH
+from src.db.catalog import Catalog
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+class SyncReport(NamedTuple):
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    full_rebuild: bool
+    seconds: float
+
+    @property
+    def embedded(self) -> int:
+        return len(self.added) + len(self.changed)
+
+
+class SchemaIndexer:
+    """Keeps a FAISS schema index in step with the catalog, one document per table."""
+
+    def __init__(self, path: str, embeddings_spec: str, batch_size: int = SCHEMA_INDEX_EMBED_BATCH):
+        self.path = path
+        self.embeddings_spec = embeddings_spec
+        self.batch_size = batch_size
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, hashes: Dict[str, str]):
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"embeddings": self.embeddings_spec, "tables": hashes}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def _add(self, store, catalog: Catalog, names: List[str]):
+        """Embed in fixed-size batches so one call never carries the whole catalog."""
+        from langchain_community.vectorstores import FAISS
+        embeddings = get_embeddings(self.embeddings_spec)
+        for i in range(0, len(names), self.batch_size):
+            batch = names[i:i + self.batch_size]
+            docs = [table_document(catalog.get(n)) for n in batch]
+            if store is None:
+                store = FAISS.from_documents(docs, embeddings, ids=batch)
+            else:
+                store.add_documents(docs, ids=batch)
+        return store
+
+    def _copy(self, store):
+        from langchain_community.vectorstores import FAISS
+        return FAISS.deserialize_from_bytes(
+            store.serialize_to_bytes(), get_embeddings(self.embeddings_spec), allow_dangerous_deserialization=True
+        )
+
+    def sync(self, catalog: Catalog, store=None, full: bool = False):
+        """Bring the index in line with catalog; returns (store, SyncReport).
+
+        `store` is never modified - an incremental update edits a copy - so it can keep serving
+        searches until the returned store replaces it.
+        """
+        start = time.perf_counter()
+        hashes = {name: catalog.get(name).fingerprint() for name in catalog.table_names()}
+        manifest = self._read_manifest()
+        full = (
+            full or store is None or manifest is None
+            or manifest.get("embeddings") != self.embeddings_spec
+        )
+
+        if full:
+            added, changed, removed = sorted(hashes), [], []
+            store = self._add(None, catalog, added) if added else None
+        else:
+            old = manifest.get("tables", {})
+            added = sorted(n for n in hashes if n not in old)
+            changed = sorted(n for n in hashes if n in old and old[n] != hashes[n])
+            removed = sorted(n for n in old if n not in hashes)
+            stale = changed + removed
+            if stale or added:
+                # The live store keeps serving searches: edit a copy, the caller swaps it in
+                store = self._copy(store)
+            if stale:
+                store.delete(ids=stale)
+            if added or changed:
+                store = self._add(store, catalog, added + changed)
+
+        if store is not None:
+            os.makedirs(self.path, exist_ok=True)
+            store.save_local(self.path)
+            self._write_manifest(hashes)
+        report = SyncReport(added, changed, removed, full, time.perf_counter() - start)
+        logger.info(
+            f"🗂️ Schema index sync: +{len(added)} ~{len(changed)} -{len(removed)} "
+            f"({'full' if full else 'incremental'}, {report.seconds:.2f}s)"
+        )
+        return store, report
+
+
+def sync_schema_index(index: SchemaIndex = None, full: bool = False, refresh_catalog: bool = False) -> SyncReport:
+    """Sync the live schema index against the current catalog and swap it in."""
+    from src.db.db_schema_wrapper import db_schema_wrapper
+    index = index or get_schema_index()
+    if refresh_catalog:
+        db_schema_wrapper.invalidate_schema_cache()
+    catalog = db_schema_wrapper.get_catalog()
+
+    store = None
+    if not full:
+        try:
+            store = index.load()
+        except Exception as e:
+            logger.warning(f"⚠️ Existing schema index unusable, rebuilding: {e}")
+    indexer = SchemaIndexer(index.path, index.embeddings_spec)
+    store, report = indexer.sync(catalog, store=store, full=full)
+    index.reset(store)
+    return report
+
+
+_reindex_thread: Optional[threading.Thread] = None
+
+def start_background_reindex(interval: float) -> threading.Thread:
+    """Daemon thread that re-syncs the index every `interval` seconds (started once)."""
+    global _reindex_thread
+    if _reindex_thread is not None:
+        return _reindex_thread
+
+    def _loop():
+        while True:
+            time.sleep(interval)
+            try:
+                sync_schema_index()
+            except Exception as e:
+                logger.warning(f"⚠️ Background schema re-index failed: {e}")
+
+    _reindex_thread = threading.Thread(target=_loop, name="schema-reindex", daemon=True)
+    _reindex_thread.start()
+    return _reindex_thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally (re)index table schemas for find_relevant_tables")
+    parser.add_argument("--full", action="store_true", help="re-embed every table")
+    parser.add_argument("--refresh-catalog", action="store_true", help="re-reflect the catalog before syncing")
+    parser.add_argument("--watch", type=float, default=0, metavar="SECONDS", help="keep syncing on an interval")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(name)s | %(levelname)s | %(message)s")
+    report = sync_schema_index(full=args.full, refresh_catalog=args.refresh_catalog)
+    print(f"added={len(report.added)} changed={len(report.changed)} removed={len(report.removed)} "
+          f"embedded={report.embedded} full={report.full_rebuild} seconds={report.seconds:.2f}")
+    while args.watch:
+        time.sleep(args.watch)
+        report = sync_schema_index(refresh_catalog=True)
+        print(f"added={len(report.added)} changed={len(report.changed)} removed={len(report.removed)}")
+
+
+if __name__ == "__main__":
+    main()
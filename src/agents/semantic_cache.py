@@ -0,0 +1,132 @@
+"""
+Semantic Cache - Question -> SQL cache that skips the LLM on near-duplicate questions.
+Successful (question, SQL, answer) triples are embedded; a new question above the
+similarity threshold re-executes the cached SQL instead of running the agent loop.
+Similarity alone is not enough ("Bikes" vs "Clothing", "in Sales" vs "not in Sales"
+embed close together), so a hit must also have the same content words, quoted
+literals, numbers and negations - only the phrasing may differ.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.utils.text import tokenize
+
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+_QUOTED_RE = re.compile(r"'([^']+)'|\"([^\"]+)\"")
+_NEGATION_RE = re.compile(r"\b(?:not|no|non|nor|never|none|outside|except|excluding|exclude|without|\w+n't)\b")
+
+
+class QuestionKey(NamedTuple):
+    """What two questions must share for one's SQL to answer the other."""
+    words: frozenset  # stop-word-free, stemmed, synonym-folded
+    literals: frozenset
+    numbers: tuple
+    negations: int
+
+    @classmethod
+    def of(cls, question: str) -> "QuestionKey":
+        text = question.lower()
+        return cls(
+            frozenset(tokenize(text)),
+            frozenset(a or b for a, b in _QUOTED_RE.findall(text)),
+            tuple(_NUMBER_RE.findall(text)),
+            len(_NEGATION_RE.findall(text)),
+        )
+
+
+class CacheHit(NamedTuple):
+    question: str  # the cached question that matched
+    sql: str
+    answer: str
+    similarity: float
+
+
+class _Entry:
+    __slots__ = ("question", "sql", "answer", "vector", "key", "hits")
+
+    def __init__(self, question: str, sql: str, answer: str, vector: np.ndarray):
+        self.question = question
+        self.sql = sql
+        self.answer = answer
+        self.vector = vector
+        self.key = QuestionKey.of(question)
+        self.hits = 0
+
+
+class SemanticCache:
+    """Bounded LRU of successful runs, searched by cosine similarity."""
+
+    def __init__(self, embeddings: Embeddings, threshold: float, max_entries: int):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lookup_seconds = 0.0
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, question: str) -> Optional[CacheHit]:
+        """Best cached run above the threshold with the same QuestionKey (words, literals, numbers, negations)."""
+        start = time.perf_counter()
+        key = question.strip().lower()
+        vector = self._embed(question)
+        question_key = QuestionKey.of(question)
+        with self._lock:
+            best, best_score = None, self.threshold
+            for entry_key, entry in self._entries.items():
+                if entry.key != question_key:
+                    continue
+                score = 1.0 if entry_key == key else float(np.dot(vector, entry.vector))
+                if score >= best_score:
+                    best, best_score = entry, score
+            self.lookup_seconds += time.perf_counter() - start
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best.question.strip().lower())
+            best.hits += 1
+            self.hits += 1
+            return CacheHit(best.question, best.sql, best.answer, best_score)
+
+    def add(self, question: str, sql: str, answer: str):
+        key = question.strip().lower()
+        entry = _Entry(question, sql, answer, self._embed(question))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            return [{"question": e.question, "sql": e.sql, "hits": e.hits} for e in self._entries.values()]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+                "avg_lookup_ms": round(1000 * self.lookup_seconds / lookups, 2) if lookups else 0.0,
+            }
@@ -2,8 +2,23 @@
 DB Tools - Free functions with **kwargs for LangChain injection.
 Handles config, run_manager, ToolRuntime automatically.
 """
+import functools
+import logging
+from typing import Tuple
 from langchain.tools import tool
-from src.db.db_schema_wrapper import db_schema_wrapper
+from src.agents.schema_index import get_schema_index
+from src.agents.schema_indexer import start_background_reindex
+from src.config.settings import (
+    RESULT_PREVIEW_ROWS, SCHEMA_INDEX_REFRESH_INTERVAL, SCHEMA_INDEX_TOP_K, SCHEMA_PREFETCH_ENABLED,
+)
+from src.db.async_exec import run_in_db_executor
+from src.db.db_schema_wrapper import db_schema_wrapper, result_store, schema_prefetcher, sql_streamer, value_index
+from src.db.result_store import summarize
+from src.db.sql_stream import ResultPage
+from src.db.sql_validator import check_read_only
+from src.telemetry.tracing import span
+
+logger = logging.getLogger(__name__)
 
 @tool
 def list_all_tables(**kwargs) -> str:  # ✅ **kwargs catches LangChain injections
@@ -11,28 +26,163 @@ def list_all_tables(**kwargs) -> str:  # ✅ **kwargs catches LangChain injectio
     return db_schema_wrapper.get_usable_table_names()
 
 @tool
-def get_table_schema(table_names: str, **kwargs) -> str:
-    """Get schema for tables. Input: 'dbo.Customers, Sales.Orders'"""
+def get_table_schema(table_names: str, question: str = "", **kwargs) -> str:
+    """Get schema for tables. Input: 'dbo.Customers, Sales.Orders' (+ the user question to rank columns)"""
     tables = [t.strip() for t in table_names.split(",")]
-    return db_schema_wrapper.get_table_info(tables)
+    return db_schema_wrapper.get_table_info(tables, question)
+
+@tool
+def find_relevant_tables(question: str, k: int = SCHEMA_INDEX_TOP_K, **kwargs) -> str:
+    """Semantic search for the tables relevant to a question. Returns their schemas."""
+    try:
+        ranked = get_schema_index().search(question, k)
+    except Exception as e:
+        return f"❌ **Table search failed:** {str(e)} - use list_all_tables() instead"
+    if not ranked:
+        return "No relevant tables found - use list_all_tables()"
+    db_schema_wrapper.prefetch_tables([table for table, _ in ranked])  # FK neighbours warm while the LLM reads
+    shortlist = "\n".join(f"{i}. {table} (distance: {score:.3f})" for i, (table, score) in enumerate(ranked, 1))
+    schemas = db_schema_wrapper.get_table_info([table for table, _ in ranked], question)
+    return f"Relevant tables for '{question}':\n{shortlist}\n\n{schemas}"
+
+@tool
+def find_join_path(table_names: str, **kwargs) -> str:
+    """Ready-to-use JOIN ... ON conditions connecting tables via foreign keys. Input: 'Sales.SalesOrderHeader, HumanResources.Employee'"""
+    tables = [t.strip() for t in table_names.split(",") if t.strip()]
+    if len(tables) < 2:
+        return "❌ **Join path needs at least two tables** (comma-separated schema.table names)"
+    try:
+        return db_schema_wrapper.join_path(tables)
+    except Exception as e:
+        return f"❌ **Join path failed:** {str(e)}"
+
+@tool
+def find_column_values(phrases: str, **kwargs) -> str:
+    """Which table.column holds a value from the question, with its exact spelling. Input: 'sales, mountain bikes'"""
+    terms = [p.strip() for p in phrases.split(",") if p.strip()]
+    if not terms:
+        return "❌ **No phrases given** (comma-separated words from the question, e.g. 'sales, canada')"
+    try:
+        lines = []
+        for term in terms:
+            matches = db_schema_wrapper.find_values(term)
+            if not matches:
+                lines.append(f"'{term}': no indexed column holds it - check get_table_schema or filter with LIKE")
+                continue
+            lines.append(f"'{term}':")
+            lines += [f"  {m.table}.{m.column} = '{m.value}' ({m.kind})" for m in matches]
+    except Exception as e:
+        return f"❌ **Value lookup failed:** {str(e)}"
+    if value_index.state == "building":
+        done, total = value_index.progress
+        lines.append(f"(value index still building: {done}/{total} tables - missing values may not be indexed yet)")
+    return "\n".join(lines)
+
+def prefetch_for_question(question: str):
+    """Warm the index shortlist for a new question (+ FK neighbours) before the LLM asks for it."""
+    if not SCHEMA_PREFETCH_ENABLED:
+        return
+
+    def _shortlist():
+        ranked = get_schema_index().search(question, SCHEMA_INDEX_TOP_K)
+        db_schema_wrapper.prefetch_tables([table for table, _ in ranked])
+
+    schema_prefetcher.spawn(_shortlist)
 
 @tool
 def preview_sql(sql: str, **kwargs) -> str:
     """Preview SQL query before execution."""
     return f"```sql\n{sql}\n```\n**Ready for execution**"
 
+@tool
+def validate_sql(sql: str, **kwargs) -> str:
+    """Validate SQL before execution: syntax, read-only, table/column names and estimated cost."""
+    try:
+        return db_schema_wrapper.validate_sql(sql).render()
+    except Exception as e:
+        return f"❌ **Validation failed:** {str(e)}"
+
+def run_query(query: str) -> Tuple[ResultPage, str]:
+    """First page + the execute_sql tool text for it (full rows go to result_store, the text is a preview)."""
+    page = db_schema_wrapper.run_page(query)
+    if not page.columns:
+        return page, f"✅ **Query executed successfully:**\n\n{page.render()}"
+    try:
+        stored = result_store.add(query, page)
+        return page, f"✅ **Query executed successfully:**\n\n{summarize(stored, page, RESULT_PREVIEW_ROWS)}"
+    except Exception:
+        if page.handle:
+            sql_streamer.close(page.handle)  # nobody will page through it - don't wait for idle eviction
+        raise
+
 @tool
 def execute_sql(query: str, **kwargs) -> str:
     """Execute approved SQL query."""
     try:
-        result = db_schema_wrapper.run(query)
-        return f"✅ **Query executed successfully:**\n\n{result}"
+        errors = check_read_only(query, db_schema_wrapper.sql_dialect())
+        if errors:
+            return f"❌ **Execution refused:** {'; '.join(errors)}"
+        return run_query(query)[1]
     except Exception as e:
         return f"❌ **Execution failed:** {str(e)}"
 
+@tool
+def fetch_more_rows(handle: str, **kwargs) -> str:
+    """Fetch the next page of a large result. Input: the handle from 'More rows available'."""
+    try:
+        handle = handle.strip().strip('"')
+        page = db_schema_wrapper.fetch_more(handle)
+        stored = result_store.extend(handle, page)
+        if stored is None:
+            return f"✅ **More rows:**\n\n{page.render()}"
+        return f"✅ **More rows:**\n\n{summarize(stored, page, RESULT_PREVIEW_ROWS)}"
+    except Exception as e:
+        return f"❌ **Fetch failed:** {str(e)}"
+
+def _with_tracing(db_tool):
+    """Time every call as a "tool" span; tools report failures as "❌ ..." strings, not exceptions."""
+    func = db_tool.func
+
+    @functools.wraps(func)
+    def _traced(*args, **kwargs):
+        with span("tool", db_tool.name) as s:
+            result = func(*args, **kwargs)
+            if isinstance(result, str) and result.startswith("❌"):
+                s.error = result.splitlines()[0][:200]
+            return result
+
+    db_tool.func = _traced
+    return db_tool
+
+def _with_async(db_tool):
+    """Give a sync tool a coroutine that runs it on the bounded DB executor (used by agent.astream)."""
+    func = db_tool.func
+
+    @functools.wraps(func)
+    async def _coroutine(*args, **kwargs):
+        return await run_in_db_executor(func, *args, **kwargs)
+
+    db_tool.coroutine = _coroutine
+    return db_tool
+
+_with_tracing(preview_sql)
+for _db_tool in (list_all_tables, get_table_schema, find_relevant_tables, find_join_path, find_column_values,
+                 validate_sql, execute_sql, fetch_more_rows):
+    _with_async(_with_tracing(_db_tool))
+
 # Simple manager
 class DBToolManager:
     def get_tools(self):
-        return [list_all_tables, get_table_schema, preview_sql, execute_sql]
+        try:
+            get_schema_index().load()  # pay the index load at agent build, not on the first question
+        except Exception as e:
+            logger.warning(f"⚠️ Schema index unavailable, find_relevant_tables will retry: {e}")
+        if SCHEMA_INDEX_REFRESH_INTERVAL > 0:
+            start_background_reindex(SCHEMA_INDEX_REFRESH_INTERVAL)
+        db_schema_wrapper.start_value_index_refresh()  # distinct values build in the background
+        return [
+            list_all_tables, find_relevant_tables, get_table_schema, find_join_path, find_column_values,
+            preview_sql, validate_sql, execute_sql, fetch_more_rows,
+        ]
 
 db_tool_manager = DBToolManager()
\ No newline at end of file
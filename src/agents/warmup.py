@@ -0,0 +1,105 @@
+"""
+Warm-up - Background pre-build of everything the first question would otherwise pay for.
+Stages run in order on one daemon thread while the UI renders / the API starts accepting:
+open pool connections, load the schema catalog + vector index, build the default agent,
+import the result-frame library.
+Each stage reports status and timing; get_agent() is lock-protected, so a question that
+arrives mid warm-up simply waits for the same agent instead of building a second one.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config.settings import WARMUP_ENABLED, WARMUP_POOL_CONNECTIONS
+from src.telemetry.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_status: Dict[str, Dict[str, Any]] = {}
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def _warm_pool():
+    from sqlalchemy import text
+    from src.db.db_client import get_db_client
+    engine = get_db_client().get_engine()
+    connections = [engine.connect() for _ in range(max(1, WARMUP_POOL_CONNECTIONS))]
+    try:
+        connections[0].execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()  # back to the pool, still open
+
+
+def _warm_schema():
+    from src.agents.schema_index import get_schema_index
+    from src.db.db_schema_wrapper import db_schema_wrapper
+    db_schema_wrapper.get_catalog()
+    db_schema_wrapper.get_join_graph()
+    get_schema_index().load()
+
+
+def _warm_agent(provider: str, model: str):
+    from src.agents.agent import get_agent
+    get_agent(provider, model)
+
+
+def _warm_results():
+    import pandas  # noqa: F401 - deferred by result_store, first execute_sql would pay for it
+
+
+def _stages(provider: str, model: str) -> List[Tuple[str, Callable[[], Any]]]:
+    return [
+        ("pool", _warm_pool),
+        ("schema", _warm_schema),
+        ("agent", lambda: _warm_agent(provider, model)),
+        ("results", _warm_results),
+    ]
+
+
+def _run(provider: str, model: str):
+    for name, stage in _stages(provider, model):
+        _status[name] = {"state": "running", "ms": None, "error": None}
+        start = time.perf_counter()
+        try:
+            stage()
+            _status[name]["state"] = "ready"
+        except Exception as e:
+            # A failed stage is simply paid for lazily by the first question
+            _status[name].update(state="failed", error=str(e)[:200])
+            logger.warning(f"⚠️ Warm-up stage '{name}' failed: {e}")
+        elapsed = time.perf_counter() - start
+        _status[name]["ms"] = round(1000 * elapsed, 2)
+        REGISTRY.histogram("nldbq_warmup_seconds", "Background warm-up stage latency").observe(elapsed, stage=name)
+    logger.info("🔥 Warm-up finished: " + ", ".join(f"{n} {s['state']} ({s['ms']} ms)" for n, s in _status.items()))
+
+
+def start_warmup(provider: str, model: str) -> bool:
+    """Start the warm-up thread once per process; False when disabled or already started."""
+    global _thread
+    if not WARMUP_ENABLED:
+        return False
+    with _lock:
+        if _thread is not None:
+            return False
+        for name, _ in _stages(provider, model):
+            _status[name] = {"state": "pending", "ms": None, "error": None}
+        _thread = threading.Thread(target=_run, args=(provider, model), name="nldbq-warmup", daemon=True)
+        _thread.start()
+    return True
+
+
+def warmup_status() -> Dict[str, Dict[str, Any]]:
+    """stage -> {"state": pending|running|ready|failed, "ms", "error"}."""
+    return {name: dict(status) for name, status in _status.items()}
+
+
+def wait_for_warmup(timeout: Optional[float] = None) -> bool:
+    """Block until warm-up is done (True) or the timeout passes (False)."""
+    thread = _thread
+    if thread is None:
+        return True
+    thread.join(timeout)
+    return not thread.is_alive()
@@ -0,0 +1,337 @@
+"""
+Query Service - Headless ASGI API next to the Streamlit UI.
+POST /v1/query answers a question (JSON, or Server-Sent Events with "stream": true)
+through a bounded worker pool with queueing and backpressure; /healthz and /readyz
+let a load balancer scale it horizontally, /metrics feeds Prometheus.
+GET /v1/results/{id}?format=json|csv|parquet returns the full rows behind a "🗂️ Result <id>" summary.
+
+Run: python main.py --api   (or: uvicorn src.api.server:app)
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+from sqlalchemy import text
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.agents.agent import astream_agent, get_agent, get_template_library
+from src.agents.events import chunk_events
+from src.agents.llm_cache import get_llm_cache
+from src.agents.memory import get_checkpointer
+from src.agents.warmup import start_warmup, warmup_status
+from src.config.models import default_llm, model_options
+from src.config.settings import (
+    API_MAX_CONCURRENCY, API_MAX_QUEUE, API_QUEUE_TIMEOUT, API_REQUEST_TIMEOUT, LLM_CACHE_ENABLED,
+)
+from src.db.async_exec import run_in_db_executor
+from src.db.db_client import get_db_client
+from src.db.db_schema_wrapper import result_store, value_index
+from src.db.result_store import to_csv, to_parquet
+from src.telemetry.metrics import REGISTRY
+from src.telemetry.tracing import recent_traces, trace
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class WorkerPool:
+    """At most `concurrency` runs in flight and `max_queue` waiting; the rest are rejected."""
+
+    def __init__(self, concurrency: int, max_queue: int, queue_timeout: float):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(concurrency)
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        if self.waiting >= self.max_queue and self.running >= self.concurrency:
+            self.rejected += 1
+            raise QueueFull()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise QueueFull()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+
+    def release(self):
+        self.running -= 1
+        self.completed += 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+class AdmittedStream(StreamingResponse):
+    """SSE response whose worker slot was acquired before the headers went out; released when it ends."""
+
+    def __init__(self, content, pool: WorkerPool, **kwargs):
+        super().__init__(content, **kwargs)
+        self.pool = pool
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.pool.release()  # also on client disconnect, even before the body started
+
+
+workers = WorkerPool(API_MAX_CONCURRENCY, API_MAX_QUEUE, API_QUEUE_TIMEOUT)
+_ready = {"agent": False, "db": False}
+
+
+def _busy() -> JSONResponse:
+    return JSONResponse(
+        {"error": "Server busy - retry later", "workers": workers.stats()},
+        status_code=429, headers={"Retry-After": "5"},
+    )
+
+
+async def _parse_request(request: Request) -> Dict[str, Any]:
+    body = await request.json()
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    question = body.get("question") or ""
+    if not isinstance(question, str) or not question.strip():
+        raise ValueError("'question' is required (a string)")
+    question = question.strip()
+    provider = body.get("provider") or default_llm["provider"]
+    if not isinstance(provider, str) or provider not in model_options:
+        raise ValueError(f"Unknown provider '{provider}'")
+    fallback_model = default_llm["model"] if provider == default_llm["provider"] else model_options[provider][0]
+    model = body.get("model") or fallback_model
+    if not isinstance(model, str) or model not in model_options[provider]:  # every model is a cached agent - only build the configured ones
+        raise ValueError(f"Unknown model '{model}' for {provider} (one of: {', '.join(model_options[provider])})")
+    thread_id = body.get("thread_id") or f"api_{uuid.uuid4().hex}"
+    return {
+        "question": question,
+        "provider": provider,
+        "model": model,
+        "config": {"configurable": {"thread_id": thread_id}},
+        "stream": bool(body.get("stream")),
+    }
+
+
+async def _events(req: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Agent events for one request, bounded by API_REQUEST_TIMEOUT."""
+    deadline = time.monotonic() + API_REQUEST_TIMEOUT
+
+    async def _bounded(awaitable):
+        # Every wait is bounded, so an LLM or tool call that never yields still times out
+        try:
+            return await asyncio.wait_for(awaitable, timeout=max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"Agent run exceeded {API_REQUEST_TIMEOUT:.0f}s") from None
+
+    agent = await _bounded(run_in_db_executor(get_agent, req["provider"], req["model"]))
+    chunks = astream_agent(agent, req["question"], req["config"])
+    try:
+        while True:
+            try:
+                chunk = await _bounded(chunks.__anext__())
+            except StopAsyncIteration:
+                return
+            for event in chunk_events(chunk):
+                yield event
+    finally:
+        await chunks.aclose()
+
+
+async def query(request: Request):
+    try:
+        req = await _parse_request(request)
+    except (ValueError, json.JSONDecodeError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    thread_id = req["config"]["configurable"]["thread_id"]
+
+    if req["stream"]:
+        try:
+            await workers.acquire()  # admit before the 200 goes out, so overload is still a 429
+        except QueueFull:
+            return _busy()
+
+        async def sse():
+            start = time.perf_counter()
+            try:
+                with trace(req["question"]) as question_trace:
+                    async for event in _events(req):
+                        yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+                yield f"event: trace\ndata: {json.dumps(question_trace.to_dict(), default=str)}\n\n"
+                done = {"thread_id": thread_id, "elapsed": round(time.perf_counter() - start, 3)}
+                yield f"event: done\ndata: {json.dumps(done)}\n\n"
+            except Exception as e:
+                logger.exception("Streaming query failed")
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+        # Client disconnects cancel this generator, which cancels the agent run
+        return AdmittedStream(sse(), workers, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    start = time.perf_counter()
+    answer, tool_calls = "", []
+    try:
+        async with workers.slot():
+            with trace(req["question"]) as question_trace:
+                async for event in _events(req):
+                    if event["type"] == "answer":
+                        answer = event["text"]
+                    elif event["type"] == "tool_call":
+                        tool_calls.append({"name": event["name"], "args": event["args"]})
+    except QueueFull:
+        return _busy()
+    except Exception as e:
+        logger.exception("Query failed")
+        return JSONResponse({"error": str(e), "thread_id": thread_id}, status_code=500)
+    sql = next((c["args"].get("query") for c in reversed(tool_calls) if c["name"] == "execute_sql"), None)
+    return JSONResponse({
+        "thread_id": thread_id,
+        "answer": answer,
+        "sql": sql,
+        "tool_calls": tool_calls,
+        "elapsed": round(time.perf_counter() - start, 3),
+        "trace": question_trace.to_dict(),
+    })
+
+
+async def healthz(request: Request):
+    return JSONResponse({"status": "ok"})
+
+
+def _ping_db():
+    with get_db_client().get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def readyz(request: Request):
+    try:
+        await asyncio.wait_for(run_in_db_executor(_ping_db), timeout=5)
+        _ready["db"] = True
+    except Exception as e:
+        _ready["db"] = False
+        return JSONResponse({"status": "unavailable", "error": str(e), **_ready}, status_code=503)
+    status = 200 if all(_ready.values()) else 503
+    return JSONResponse(
+        {"status": "ready" if status == 200 else "warming", **_ready, "warmup": warmup_status()}, status_code=status
+    )
+
+
+async def stats(request: Request):
+    return JSONResponse({
+        "workers": workers.stats(), "db_pool": get_db_client().pool_stats(),
+        "db_endpoints": get_db_client().endpoint_stats(), "memory": get_checkpointer().stats(),
+        "warmup": warmup_status(),
+        "templates": get_template_library().stats() if get_template_library() else None,
+        "llm_cache": get_llm_cache().stats() if LLM_CACHE_ENABLED else None,
+        "value_index": value_index.stats(),
+    })
+
+
+async def metrics(request: Request):
+    return PlainTextResponse(REGISTRY.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+async def metrics_json(request: Request):
+    return JSONResponse(REGISTRY.to_dict())
+
+
+async def traces(request: Request):
+    limit = int(request.query_params.get("limit", 20))
+    return JSONResponse({"traces": recent_traces(limit)})
+
+
+async def results(request: Request):
+    stored = result_store.get(request.path_params["result_id"])
+    if stored is None:
+        return JSONResponse({"error": "unknown or expired result id"}, status_code=404)
+    fmt = request.query_params.get("format", "json")
+    if fmt == "csv":
+        return Response(to_csv(stored), media_type="text/csv")
+    if fmt == "parquet":
+        try:
+            return Response(to_parquet(stored), media_type="application/vnd.apache.parquet")
+        except ImportError:
+            return JSONResponse({"error": "parquet output needs pyarrow"}, status_code=501)
+    return JSONResponse({
+        "id": stored.id,
+        "query": stored.query,
+        "has_more": stored.has_more,
+        "truncated": stored.truncated,
+        "columns": [str(c) for c in stored.frame.columns],
+        "rows": json.loads(stored.frame.to_json(orient="values", date_format="iso")),
+    })
+
+
+def _worker_gauges():
+    for key, value in workers.stats().items():
+        yield f"nldbq_api_workers_{key}", {}, value
+    memory = get_checkpointer().stats()
+    yield "nldbq_memory_threads", {}, memory["threads"]
+    yield "nldbq_memory_evictions", {}, memory["evictions"]
+    yield "nldbq_memory_pruned_checkpoints", {}, memory["pruned_checkpoints"]
+
+
+REGISTRY.register_collector(_worker_gauges)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    async def _warm():
+        try:
+            await run_in_db_executor(get_agent, default_llm["provider"], default_llm["model"])
+            _ready["agent"] = True
+            logger.info("✅ Default agent ready")
+        except Exception as e:
+            logger.warning(f"⚠️ Default agent warm-up failed: {e}")
+
+    # Pool + schema + agent on the warm-up thread; _warm() then just waits on the agent lock
+    start_warmup(default_llm["provider"], default_llm["model"])
+    task = asyncio.create_task(_warm())
+    yield
+    task.cancel()
+
+
+app = Starlette(
+    routes=[
+        Route("/v1/query", query, methods=["POST"]),
+        Route("/v1/stats", stats),
+        Route("/v1/metrics", metrics_json),
+        Route("/v1/traces", traces),
+        Route("/v1/results/{result_id}", results),
+        Route("/metrics", metrics),
+        Route("/healthz", healthz),
+        Route("/readyz", readyz),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,107 @@
+"""
+Scripted LLM - Deterministic chat model that replays a fixed tool-call script per question.
+Lets the benchmark drive the real agent graph and DB tools without a provider:
+the step it plays is the number of AI turns since the question's HumanMessage.
+"""
+import json
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.agents.events import message_text
+from src.db.sql_stream import CONTINUATION_RE
+
+LAST_HANDLE = "$last_handle"  # arg placeholder: the continuation handle from the latest tool result
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Replays `scripts[question]`: a list of {"tool_calls": [{"name", "args"}]} or {"answer": str} steps."""
+
+    scripts: Dict[str, List[Dict[str, Any]]]
+    latency: float = 0.0  # seconds per model call (simulated time-to-first-token)
+    token_latency: float = 0.0  # seconds per streamed answer token
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self  # the script already knows which tools it calls
+
+    @staticmethod
+    def _last_handle(messages: List[BaseMessage]) -> str:
+        for msg in reversed(messages):
+            if isinstance(msg, ToolMessage):
+                match = CONTINUATION_RE.search(message_text(msg))
+                if match:
+                    return match.group(1)
+        return ""
+
+    def _step(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+        turn, question = 0, None
+        for msg in reversed(messages):
+            if isinstance(msg, HumanMessage):
+                question = message_text(msg).strip()
+                break
+            if isinstance(msg, AIMessage):
+                turn += 1
+        steps = self.scripts.get(question)
+        if not steps:
+            return {"answer": f"No script for question: {question!r}"}
+        return steps[min(turn, len(steps) - 1)]
+
+    def _message(self, messages: List[BaseMessage]) -> AIMessage:
+        step = self._step(messages)
+        if "tool_calls" in step:
+            calls = []
+            for c in step["tool_calls"]:
+                args = {
+                    k: self._last_handle(messages) if v == LAST_HANDLE else v
+                    for k, v in c.get("args", {}).items()
+                }
+                calls.append({"name": c["name"], "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"})
+            return AIMessage(content="", tool_calls=calls)
+        return AIMessage(content=step.get("answer", ""))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)
+        message = self._message(messages)
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(message.tool_calls)
+            ]))
+            return
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            token = word if i == len(words) - 1 else word + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
@@ -0,0 +1,271 @@
+"""
+Fixture DB - Seeded, AdventureWorks-like SQLite database for offline runs.
+One file per schema in SCHEMA_LIST (attached by DBClient when DB_TYPE=sqlite),
+so the agent sees the same schema.table names it would on SQL Server.
+
+Build: python -m src.bench.fixture_db --dir .cache/bench/fixture --scale 1
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import sqlite3
+from typing import Dict, List
+
+MAIN_DB = "nldbq.db"  # empty main database; every schema is an attached sibling file
+
+DDL: Dict[str, List[str]] = {
+    "dbo": [
+        """CREATE TABLE ErrorLog (
+            ErrorLogID INTEGER PRIMARY KEY, ErrorTime TIMESTAMP NOT NULL, UserName VARCHAR(128) NOT NULL,
+            ErrorNumber INTEGER NOT NULL, ErrorMessage VARCHAR(4000) NOT NULL)""",
+        """CREATE TABLE AWBuildVersion (
+            SystemInformationID INTEGER PRIMARY KEY, DatabaseVersion VARCHAR(25) NOT NULL,
+            VersionDate TIMESTAMP NOT NULL)""",
+    ],
+    "Person": [
+        """CREATE TABLE Person (
+            BusinessEntityID INTEGER PRIMARY KEY, PersonType CHAR(2) NOT NULL, FirstName VARCHAR(50) NOT NULL,
+            LastName VARCHAR(50) NOT NULL, EmailPromotion INTEGER NOT NULL)""",
+        """CREATE TABLE CountryRegion (
+            CountryRegionCode VARCHAR(3) PRIMARY KEY, Name VARCHAR(50) NOT NULL)""",
+        """CREATE TABLE StateProvince (
+            StateProvinceID INTEGER PRIMARY KEY, StateProvinceCode CHAR(3) NOT NULL,
+            CountryRegionCode VARCHAR(3) NOT NULL REFERENCES CountryRegion (CountryRegionCode),
+            Name VARCHAR(50) NOT NULL)""",
+        """CREATE TABLE Address (
+            AddressID INTEGER PRIMARY KEY, AddressLine1 VARCHAR(60) NOT NULL, City VARCHAR(30) NOT NULL,
+            StateProvinceID INTEGER NOT NULL REFERENCES StateProvince (StateProvinceID),
+            PostalCode VARCHAR(15) NOT NULL)""",
+    ],
+    "HumanResources": [
+        """CREATE TABLE Department (
+            DepartmentID INTEGER PRIMARY KEY, Name VARCHAR(50) NOT NULL, GroupName VARCHAR(50) NOT NULL)""",
+        """CREATE TABLE Employee (
+            BusinessEntityID INTEGER PRIMARY KEY, NationalIDNumber VARCHAR(15) NOT NULL,
+            JobTitle VARCHAR(50) NOT NULL, BirthDate DATE NOT NULL, Gender CHAR(1) NOT NULL,
+            HireDate DATE NOT NULL, VacationHours INTEGER NOT NULL, SickLeaveHours INTEGER NOT NULL)""",
+        """CREATE TABLE EmployeeDepartmentHistory (
+            BusinessEntityID INTEGER NOT NULL REFERENCES Employee (BusinessEntityID),
+            DepartmentID INTEGER NOT NULL REFERENCES Department (DepartmentID),
+            StartDate DATE NOT NULL, EndDate DATE,
+            PRIMARY KEY (BusinessEntityID, DepartmentID, StartDate))""",
+    ],
+    "Production": [
+        """CREATE TABLE ProductCategory (
+            ProductCategoryID INTEGER PRIMARY KEY, Name VARCHAR(50) NOT NULL)""",
+        """CREATE TABLE ProductSubcategory (
+            ProductSubcategoryID INTEGER PRIMARY KEY,
+            ProductCategoryID INTEGER NOT NULL REFERENCES ProductCategory (ProductCategoryID),
+            Name VARCHAR(50) NOT NULL)""",
+        """CREATE TABLE Product (
+            ProductID INTEGER PRIMARY KEY, Name VARCHAR(50) NOT NULL, ProductNumber VARCHAR(25) NOT NULL,
+            Color VARCHAR(15), StandardCost NUMERIC(19, 4) NOT NULL, ListPrice NUMERIC(19, 4) NOT NULL,
+            ProductSubcategoryID INTEGER REFERENCES ProductSubcategory (ProductSubcategoryID),
+            SellStartDate TIMESTAMP NOT NULL)""",
+    ],
+    "Purchasing": [
+        """CREATE TABLE Vendor (
+            BusinessEntityID INTEGER PRIMARY KEY, AccountNumber VARCHAR(15) NOT NULL, Name VARCHAR(50) NOT NULL,
+            CreditRating INTEGER NOT NULL, PreferredVendorStatus BOOLEAN NOT NULL)""",
+        """CREATE TABLE PurchaseOrderHeader (
+            PurchaseOrderID INTEGER PRIMARY KEY, VendorID INTEGER NOT NULL REFERENCES Vendor (BusinessEntityID),
+            OrderDate TIMESTAMP NOT NULL, Status INTEGER NOT NULL, SubTotal NUMERIC(19, 4) NOT NULL)""",
+    ],
+    "Sales": [
+        """CREATE TABLE SalesTerritory (
+            TerritoryID INTEGER PRIMARY KEY, Name VARCHAR(50) NOT NULL, CountryRegionCode VARCHAR(3) NOT NULL,
+            "Group" VARCHAR(50) NOT NULL, SalesYTD NUMERIC(19, 4) NOT NULL)""",
+        """CREATE TABLE SalesPerson (
+            BusinessEntityID INTEGER PRIMARY KEY, TerritoryID INTEGER REFERENCES SalesTerritory (TerritoryID),
+            SalesQuota NUMERIC(19, 4), Bonus NUMERIC(19, 4) NOT NULL, SalesYTD NUMERIC(19, 4) NOT NULL)""",
+        """CREATE TABLE Customer (
+            CustomerID INTEGER PRIMARY KEY, PersonID INTEGER,
+            TerritoryID INTEGER REFERENCES SalesTerritory (TerritoryID), AccountNumber VARCHAR(10) NOT NULL)""",
+        """CREATE TABLE SalesOrderHeader (
+            SalesOrderID INTEGER PRIMARY KEY, OrderDate TIMESTAMP NOT NULL, Status INTEGER NOT NULL,
+            CustomerID INTEGER NOT NULL REFERENCES Customer (CustomerID),
+            SalesPersonID INTEGER REFERENCES SalesPerson (BusinessEntityID),
+            TerritoryID INTEGER REFERENCES SalesTerritory (TerritoryID),
+            SubTotal NUMERIC(19, 4) NOT NULL, TaxAmt NUMERIC(19, 4) NOT NULL, TotalDue NUMERIC(19, 4) NOT NULL)""",
+        """CREATE TABLE SalesOrderDetail (
+            SalesOrderID INTEGER NOT NULL REFERENCES SalesOrderHeader (SalesOrderID),
+            SalesOrderDetailID INTEGER NOT NULL, OrderQty INTEGER NOT NULL, ProductID INTEGER NOT NULL,
+            UnitPrice NUMERIC(19, 4) NOT NULL, LineTotal NUMERIC(38, 6) NOT NULL,
+            PRIMARY KEY (SalesOrderID, SalesOrderDetailID))""",
+    ],
+}
+
+FIRST_NAMES = ["Ken", "Terri", "Rob", "Gail", "Jossef", "Dylan", "Diane", "Gigi", "Michael", "Ovidiu",
+               "Thierry", "Janice", "Michael", "Sharon", "David", "Kevin", "John", "Mary", "Wanida", "Kim"]
+LAST_NAMES = ["Sanchez", "Duffy", "Tamburello", "Walters", "Erickson", "Goldberg", "Miller", "Margheim",
+              "Matthew", "Raheem", "Cracium", "D'Hers", "Galvin", "Sullivan", "Salavaria", "Bradley", "Brown"]
+COUNTRIES = [("US", "United States"), ("CA", "Canada"), ("FR", "France"), ("DE", "Germany"),
+             ("AU", "Australia"), ("GB", "United Kingdom")]
+TERRITORIES = [("Northwest", "US", "North America"), ("Northeast", "US", "North America"),
+               ("Central", "US", "North America"), ("Southwest", "US", "North America"),
+               ("Southeast", "US", "North America"), ("Canada", "CA", "North America"),
+               ("France", "FR", "Europe"), ("Germany", "DE", "Europe"),
+               ("Australia", "AU", "Pacific"), ("United Kingdom", "GB", "Europe")]
+CATEGORIES = {"Bikes": ["Mountain Bikes", "Road Bikes", "Touring Bikes"],
+              "Components": ["Handlebars", "Brakes", "Chains", "Wheels"],
+              "Clothing": ["Jerseys", "Gloves", "Caps"],
+              "Accessories": ["Helmets", "Bottles and Cages", "Lights"]}
+COLORS = ["Black", "Red", "Silver", "Blue", "Yellow", None]
+DEPARTMENTS = [("Engineering", "Research and Development"), ("Sales", "Sales and Marketing"),
+               ("Marketing", "Sales and Marketing"), ("Production", "Manufacturing"),
+               ("Purchasing", "Inventory Management"), ("Finance", "Executive General and Administration")]
+JOB_TITLES = ["Design Engineer", "Sales Representative", "Marketing Specialist", "Production Technician",
+              "Buyer", "Accountant", "Production Supervisor", "Chief Executive Officer"]
+
+
+def _days(rng: random.Random, start: datetime.date, span: int) -> datetime.date:
+    return start + datetime.timedelta(days=rng.randrange(span))
+
+
+def _rows(rng: random.Random, scale: int) -> Dict[str, Dict[str, List[tuple]]]:
+    """Deterministic rows per schema/table; `scale` multiplies the transactional tables."""
+    n_people, n_customers, n_orders = 200 * scale, 150 * scale, 1000 * scale
+    data: Dict[str, Dict[str, List[tuple]]] = {s: {} for s in DDL}
+
+    data["dbo"]["AWBuildVersion"] = [(1, "15.0.4280.7", "2024-01-01 00:00:00")]
+    data["dbo"]["ErrorLog"] = [
+        (i, f"{_days(rng, datetime.date(2024, 1, 1), 365)} 10:00:00", "dbo", 50000 + i % 7, f"Error {i}")
+        for i in range(1, 21)
+    ]
+
+    data["Person"]["Person"] = [
+        (i, rng.choice(["EM", "IN", "SC", "VC"]), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.randrange(3))
+        for i in range(1, n_people + 1)
+    ]
+    data["Person"]["CountryRegion"] = COUNTRIES
+    data["Person"]["StateProvince"] = [
+        (i, f"S{i:02d}", COUNTRIES[i % len(COUNTRIES)][0], f"Province {i}") for i in range(1, 31)
+    ]
+    data["Person"]["Address"] = [
+        (i, f"{rng.randrange(1, 9999)} Main St.", f"City {i % 40}", rng.randrange(1, 31), f"{10000 + i}")
+        for i in range(1, n_people + 1)
+    ]
+
+    data["HumanResources"]["Department"] = [(i, n, g) for i, (n, g) in enumerate(DEPARTMENTS, 1)]
+    employees = list(range(1, 41))
+    data["HumanResources"]["Employee"] = [
+        (i, f"{100000000 + i}", JOB_TITLES[i % len(JOB_TITLES)], str(_days(rng, datetime.date(1960, 1, 1), 12000)),
+         rng.choice("MF"), str(_days(rng, datetime.date(2008, 1, 1), 4000)), rng.randrange(100), rng.randrange(80))
+        for i in employees
+    ]
+    data["HumanResources"]["EmployeeDepartmentHistory"] = [
+        (i, 1 + i % len(DEPARTMENTS), str(_days(rng, datetime.date(2010, 1, 1), 3000)), None) for i in employees
+    ]
+
+    categories, subcategories = [], []
+    for cat_id, (cat, subs) in enumerate(CATEGORIES.items(), 1):
+        categories.append((cat_id, cat))
+        for sub in subs:
+            subcategories.append((len(subcategories) + 1, cat_id, sub))
+    data["Production"]["ProductCategory"] = categories
+    data["Production"]["ProductSubcategory"] = subcategories
+    products = []
+    for i in range(1, 101):
+        sub_id, _, sub = subcategories[i % len(subcategories)]
+        cost = round(rng.uniform(2, 1500), 4)
+        products.append((i, f"{sub.rstrip('s')} {i}", f"PR-{i:04d}", rng.choice(COLORS), cost,
+                         round(cost * rng.uniform(1.2, 2.0), 4), sub_id, "2020-07-01 00:00:00"))
+    data["Production"]["Product"] = products
+
+    data["Purchasing"]["Vendor"] = [
+        (1000 + i, f"VEND{i:04d}", f"Vendor {i}", 1 + i % 5, i % 4 != 0) for i in range(1, 31)
+    ]
+    data["Purchasing"]["PurchaseOrderHeader"] = [
+        (i, 1000 + rng.randrange(1, 31), f"{_days(rng, datetime.date(2022, 1, 1), 900)} 00:00:00",
+         rng.randrange(1, 5), round(rng.uniform(100, 50000), 4))
+        for i in range(1, 200 * scale + 1)
+    ]
+
+    data["Sales"]["SalesTerritory"] = [
+        (i, n, c, g, round(rng.uniform(1e6, 1e7), 4)) for i, (n, c, g) in enumerate(TERRITORIES, 1)
+    ]
+    sales_people = employees[:12]
+    data["Sales"]["SalesPerson"] = [
+        (p, 1 + p % len(TERRITORIES), 250000.0, round(rng.uniform(0, 6000), 4), round(rng.uniform(1e5, 4e6), 4))
+        for p in sales_people
+    ]
+    data["Sales"]["Customer"] = [
+        (i, rng.randrange(1, n_people + 1), rng.randrange(1, len(TERRITORIES) + 1), f"AW{i:08d}")
+        for i in range(1, n_customers + 1)
+    ]
+    headers, details = [], []
+    for order_id in range(43659, 43659 + n_orders):
+        lines = []
+        for line in range(1, rng.randrange(2, 6)):
+            product = rng.choice(products)
+            qty, price = rng.randrange(1, 10), product[5]
+            lines.append((order_id, line, qty, product[0], price, round(qty * price, 6)))
+        subtotal = round(sum(l[5] for l in lines), 4)
+        tax = round(subtotal * 0.08, 4)
+        details += lines
+        headers.append((order_id, f"{_days(rng, datetime.date(2022, 1, 1), 1000)} 00:00:00", 5,
+                        rng.randrange(1, n_customers + 1), rng.choice(sales_people + [None]),
+                        rng.randrange(1, len(TERRITORIES) + 1), subtotal, tax, round(subtotal + tax, 4)))
+    data["Sales"]["SalesOrderHeader"] = headers
+    data["Sales"]["SalesOrderDetail"] = details
+    return data
+
+
+def build_fixture(directory: str, scale: int = 1, seed: int = 42, force: bool = False) -> str:
+    """Create the fixture files in `directory` (idempotent) and return the main DB path for DB_NAME."""
+    os.makedirs(directory, exist_ok=True)
+    main = os.path.join(directory, MAIN_DB)
+    marker = os.path.join(directory, f".built-{scale}-{seed}")
+    if os.path.exists(marker) and not force:
+        return main
+
+    for name in os.listdir(directory):
+        if name.endswith(".db") or name.startswith(".built-"):
+            os.remove(os.path.join(directory, name))
+    sqlite3.connect(main).close()
+
+    data = _rows(random.Random(seed), scale)
+    for schema, statements in DDL.items():
+        conn = sqlite3.connect(os.path.join(directory, f"{schema}.db"))
+        with conn:
+            for ddl in statements:
+                conn.execute(ddl)
+            for table, rows in data[schema].items():
+                if rows:
+                    marks = ", ".join("?" * len(rows[0]))
+                    conn.executemany(f'INSERT INTO "{table}" VALUES ({marks})', rows)
+        conn.close()
+    open(marker, "w").close()
+    return main
+
+
+def build_replicas(directory: str, count: int) -> List[str]:
+    """Copy a built fixture into <directory>/replica<i>/ stand-ins; returns their sqlite:/// URLs for DB_REPLICAS."""
+    urls = []
+    for i in range(1, count + 1):
+        target = os.path.join(directory, f"replica{i}")
+        os.makedirs(target, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".db"):
+                shutil.copyfile(os.path.join(directory, name), os.path.join(target, name))
+        urls.append(f"sqlite:///{os.path.abspath(os.path.join(target, MAIN_DB))}")
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the seeded SQLite benchmark fixture")
+    parser.add_argument("--dir", default=os.path.join(".cache", "bench", "fixture"))
+    parser.add_argument("--scale", type=int, default=1, help="multiplier for the transactional tables")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the fixture exists")
+    parser.add_argument("--replicas", type=int, default=0, help="also copy N read-replica stand-ins")
+    args = parser.parse_args()
+    print(build_fixture(args.dir, args.scale, args.seed, args.force))
+    if args.replicas:
+        print("DB_REPLICAS=" + ",".join(build_replicas(args.dir, args.replicas)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Benchmark - Offline end-to-end run of the real agent + tools against the SQLite fixture.
+A scripted chat model replays each scenario, so numbers only move when our code does:
+per-question wall time, per-tool latency, LLM turns, context size and peak memory.
+
+Run:      python -m src.bench.run --out .cache/bench/baseline.json
+Compare:  python -m src.bench.run --baseline .cache/bench/baseline.json --threshold 0.2
+Startup:  python -m src.bench.run --only top_orders --repeat 1 --import-budget-ms 2500
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.bench.fixture_db import build_fixture, build_replicas
+
+SCENARIOS_PATH = os.path.join(os.path.dirname(__file__), "scenarios.json")
+BENCH_DIR = os.path.join(".cache", "bench")
+
+# Relative metrics where growth beyond --threshold is a regression; llm_turns must not grow at all
+RELATIVE_METRICS = ("wall_ms", "context_chars", "peak_kb")
+
+
+def configure_env(fixture: str, work_dir: str, result_cache: bool, semantic_cache: bool, replicas: List[str] = (),
+                  templates: bool = False):
+    """Point settings/DBClient at the fixture before any src.* module reads them."""
+    os.environ.update({
+        "DB_REPLICAS": ",".join(replicas),
+        "DB_TYPE": "sqlite",
+        "DB_NAME": fixture,
+        "NLDBQ_CACHE_DIR": work_dir,
+        "SCHEMA_CACHE_PATH": os.path.join(work_dir, "schema_cache.json"),
+        "SCHEMA_INDEX_PATH": os.path.join(work_dir, "schema_index"),
+        "SCHEMA_INDEX_EMBEDDINGS": "hashing",
+        "NLDBQ_EMBEDDINGS": "hashing",
+        "SCHEMA_INDEX_REFRESH_INTERVAL": "0",
+        "VALUE_INDEX_REFRESH_INTERVAL": "0",
+        "RESULT_CACHE_ENABLED": str(result_cache).lower(),
+        "SEMANTIC_CACHE_ENABLED": str(semantic_cache).lower(),
+        "TEMPLATES_ENABLED": str(templates).lower(),
+        "TEMPLATE_MIN_SUPPORT": "1",  # each scenario repeats one question, which never adds support
+    })
+
+
+class BenchCallback(BaseCallbackHandler):
+    """Counts LLM turns/context and times every tool call of one agent run."""
+
+    def __init__(self):
+        self.llm_turns = 0
+        self.context_chars = 0  # summed over turns: what we pay for on a real provider
+        self.max_context_chars = 0
+        self.tool_ms: Dict[str, List[float]] = defaultdict(list)
+        self.tool_errors = 0
+        self._tools: Dict[Any, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        from src.agents.events import message_text
+        for batch in messages:
+            chars = sum(len(message_text(m)) + len(json.dumps(getattr(m, "tool_calls", None) or [])) for m in batch)
+            self.llm_turns += 1
+            self.context_chars += chars
+            self.max_context_chars = max(self.max_context_chars, chars)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._tools[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        name, start = self._tools.pop(run_id, ("tool", time.perf_counter()))
+        self.tool_ms[name].append(1000 * (time.perf_counter() - start))
+        if str(getattr(output, "content", output)).startswith("❌"):
+            self.tool_errors += 1
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        name, start = self._tools.pop(run_id, ("tool", time.perf_counter()))
+        self.tool_ms[name].append(1000 * (time.perf_counter() - start))
+        self.tool_errors += 1
+
+
+def run_question(agent, stream_agent, chunk_events, question: str) -> Dict[str, Any]:
+    callback = BenchCallback()
+    config = {"configurable": {"thread_id": f"bench_{uuid.uuid4().hex}"}, "callbacks": [callback]}
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    first_token, answer, chunks = None, "", 0
+    for chunk in stream_agent(agent, question, config):
+        chunks += 1
+        for event in chunk_events(chunk):
+            if event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter() - start
+            elif event["type"] == "answer":
+                answer = event["text"]
+    wall = time.perf_counter() - start
+    return {
+        "wall_ms": 1000 * wall,
+        "first_token_ms": 1000 * first_token if first_token is not None else None,
+        "chunks": chunks,
+        "llm_turns": callback.llm_turns,
+        "context_chars": callback.context_chars,
+        "max_context_chars": callback.max_context_chars,
+        "approx_tokens": callback.context_chars // 4,
+        "tool_ms": dict(callback.tool_ms),
+        "tool_errors": callback.tool_errors,
+        "peak_kb": tracemalloc.get_traced_memory()[1] / 1024,
+        "ok": bool(answer) and callback.tool_errors == 0,
+    }
+
+
+def _summary(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    walls = [r["wall_ms"] for r in runs]
+    tool_ms = defaultdict(list)
+    for r in runs:
+        for name, values in r["tool_ms"].items():
+            tool_ms[name] += values
+    last = runs[-1]
+    return {
+        "wall_ms": round(statistics.median(walls), 2),
+        "wall_ms_first": round(walls[0], 2),
+        "first_token_ms": round(last["first_token_ms"], 2) if last["first_token_ms"] is not None else None,
+        "llm_turns": last["llm_turns"],
+        "context_chars": last["context_chars"],
+        "max_context_chars": last["max_context_chars"],
+        "approx_tokens": last["approx_tokens"],
+        "peak_kb": round(max(r["peak_kb"] for r in runs), 1),
+        "tool_ms": {name: round(statistics.median(v), 2) for name, v in sorted(tool_ms.items())},
+        "ok": all(r["ok"] for r in runs),
+    }
+
+
+def cold_import_ms(module: str = "src.agents.agent", runs: int = 3) -> float:
+    """Median import time of `module` in a fresh interpreter - what every app start pays."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(1000 * (time.perf_counter() - t))"
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], env=env, cwd=root, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    fixture_dir = os.path.join(args.work_dir, "fixture")
+    fixture = build_fixture(fixture_dir, scale=args.scale, seed=args.seed)
+    state_dir = tempfile.mkdtemp(prefix="state-", dir=args.work_dir)
+    replicas = build_replicas(fixture_dir, args.replicas) if args.replicas else []
+    configure_env(fixture, state_dir, args.result_cache, args.semantic_cache, replicas, args.templates)
+
+    with open(args.scenarios) as f:
+        scenarios = json.load(f)
+    if args.only:
+        scenarios = [s for s in scenarios if s["id"] in args.only]
+
+    cold_ms = cold_import_ms()  # after configure_env so the child sees the fixture settings
+    import_start = time.perf_counter()
+    from src.agents.agent import build_agent, stream_agent
+    from src.agents.events import chunk_events
+    from src.bench.fake_llm import ScriptedChatModel
+    import_ms = 1000 * (time.perf_counter() - import_start)
+
+    llm = ScriptedChatModel(
+        scripts={s["question"]: s["steps"] for s in scenarios},
+        latency=args.llm_latency, token_latency=args.token_latency,
+    )
+    if args.llm_cache:
+        from src.agents.llm_cache import CachedChatModel, LLMResponseCache
+        llm = CachedChatModel.wrap(llm, "scripted", LLMResponseCache(os.path.join(state_dir, "llm_cache.sqlite"), 0))
+    build_start = time.perf_counter()
+    agent = build_agent(llm)
+    build_ms = 1000 * (time.perf_counter() - build_start)
+
+    tracemalloc.start()
+    questions = {}
+    total_start = time.perf_counter()
+    for scenario in scenarios:
+        runs = [run_question(agent, stream_agent, chunk_events, scenario["question"]) for _ in range(args.repeat)]
+        questions[scenario["id"]] = _summary(runs)
+        q = questions[scenario["id"]]
+        print(f"{'✅' if q['ok'] else '❌'} {scenario['id']:<28} {q['wall_ms']:>9.1f} ms  "
+              f"turns={q['llm_turns']}  ctx={q['context_chars']}  peak={q['peak_kb']:.0f} KB")
+    total_ms = 1000 * (time.perf_counter() - total_start)
+    tracemalloc.stop()
+
+    tools = defaultdict(list)
+    for q in questions.values():
+        for name, ms in q["tool_ms"].items():
+            tools[name].append(ms)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "llm_latency": args.llm_latency,
+            "result_cache": args.result_cache,
+            "semantic_cache": args.semantic_cache,
+            "replicas": args.replicas,
+            "templates": args.templates,
+            "llm_cache": args.llm_cache,
+        },
+        "startup": {
+            "cold_import_ms": round(cold_ms, 2),
+            "import_ms": round(import_ms, 2),
+            "build_agent_ms": round(build_ms, 2),
+        },
+        "totals": {
+            "wall_ms": round(total_ms, 2),
+            "llm_turns": sum(q["llm_turns"] for q in questions.values()),
+            "context_chars": sum(q["context_chars"] for q in questions.values()),
+            "peak_kb": max((q["peak_kb"] for q in questions.values()), default=0),
+            "failed": [qid for qid, q in questions.items() if not q["ok"]],
+        },
+        "tools": {name: round(statistics.median(v), 2) for name, v in sorted(tools.items())},
+        "questions": questions,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Human-readable regressions of report vs baseline (empty list = no regressions)."""
+    regressions = []
+    for qid, q in report["questions"].items():
+        base = baseline.get("questions", {}).get(qid)
+        if not base:
+            continue
+        for metric in RELATIVE_METRICS:
+            old, new = base.get(metric), q.get(metric)
+            if old and new and new > old * (1 + threshold):
+                regressions.append(f"{qid}: {metric} {old} -> {new} (+{100 * (new / old - 1):.0f}%)")
+        if q["llm_turns"] > base.get("llm_turns", q["llm_turns"]):
+            regressions.append(f"{qid}: llm_turns {base['llm_turns']} -> {q['llm_turns']}")
+        if base.get("ok") and not q["ok"]:
+            regressions.append(f"{qid}: now failing")
+    old, new = baseline.get("startup", {}).get("cold_import_ms"), report["startup"].get("cold_import_ms")
+    if old and new and new > old * (1 + threshold):
+        regressions.append(f"startup: cold_import_ms {old} -> {new} (+{100 * (new / old - 1):.0f}%)")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline NLDBQ benchmark (scripted LLM + SQLite fixture)")
+    parser.add_argument("--scenarios", default=SCENARIOS_PATH)
+    parser.add_argument("--only", nargs="*", help="scenario ids to run")
+    parser.add_argument("--work-dir", default=BENCH_DIR)
+    parser.add_argument("--scale", type=int, default=1, help="fixture size multiplier")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per question (median wall time is reported)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated seconds per model call")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="simulated seconds per streamed token")
+    parser.add_argument("--no-result-cache", dest="result_cache", action="store_false")
+    parser.add_argument("--semantic-cache", action="store_true", help="enable the semantic answer cache")
+    parser.add_argument("--templates", action="store_true", help="enable the learned query-template fast path")
+    parser.add_argument("--llm-cache", action="store_true",
+                        help="record/replay model responses (runs after the first skip --llm-latency)")
+    parser.add_argument("--replicas", type=int, default=0, help="route reads across N SQLite replica stand-ins")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative growth before flagging")
+    parser.add_argument("--import-budget-ms", type=float, default=0,
+                        help="fail when a cold `import src.agents.agent` takes longer (0 = no budget)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.makedirs(args.work_dir, exist_ok=True)
+    report = run_benchmark(args)
+    print(f"\n⏱️ total {report['totals']['wall_ms']:.1f} ms | cold import {report['startup']['cold_import_ms']:.1f} ms"
+          f" | build {report['startup']['build_agent_ms']:.1f} ms")
+    for name, ms in report["tools"].items():
+        print(f"   🔧 {name:<22} {ms:>8.2f} ms")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.out}")
+
+    status = 1 if report["totals"]["failed"] else 0
+    if args.import_budget_ms and report["startup"]["cold_import_ms"] > args.import_budget_ms:
+        print(f"\n🚨 Cold import {report['startup']['cold_import_ms']:.0f} ms exceeds budget {args.import_budget_ms:.0f} ms")
+        status = 1
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n🚨 {len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions:
+                print(f"   - {line}")
+            status = 1
+        else:
+            print(f"\n✅ No regressions vs {args.baseline} (threshold {args.threshold:.0%})")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Runtime settings - env-backed tunables for caches, pools and tools.
+Override any value in .env; defaults are safe for local development.
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+CACHE_DIR = os.getenv("NLDBQ_CACHE_DIR", ".cache")
+
+# Schema metadata cache (catalog + per-table info)
+SCHEMA_CACHE_ENABLED = _env_bool("SCHEMA_CACHE_ENABLED", True)
+SCHEMA_CACHE_PATH = os.getenv("SCHEMA_CACHE_PATH", os.path.join(CACHE_DIR, "schema_cache.json"))
+SCHEMA_CACHE_TTL = _env_float("SCHEMA_CACHE_TTL", 3600.0)  # seconds before re-checking the fingerprint
+SCHEMA_CACHE_FLUSH_DELAY = _env_float("SCHEMA_CACHE_FLUSH_DELAY", 2.0)  # seconds; per-table updates batched into one write
+
+# get_table_schema output: "compact" (terse, token-budgeted, question-ranked) or "ddl" (CREATE TABLE + samples)
+SCHEMA_RENDER = os.getenv("SCHEMA_RENDER", "compact").strip().lower()
+SCHEMA_TOKEN_BUDGET = _env_int("SCHEMA_TOKEN_BUDGET", 1500)  # approx tokens per call; 0 = unlimited
+SCHEMA_SAMPLE_ROWS = _env_int("SCHEMA_SAMPLE_ROWS", 2)  # cached sample rows shown per table (compact)
+
+# Shared connection pool (one engine registry in DBClient)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+DB_POOL_TIMEOUT = _env_float("DB_POOL_TIMEOUT", 30.0)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 3600)
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", False)  # recycle already retires stale connections
+
+# Read replicas: comma-separated "host:port" (primary's credentials) or full SQLAlchemy URLs
+DB_REPLICAS = [r.strip() for r in os.getenv("DB_REPLICAS", "").split(",") if r.strip()]
+DB_READ_BALANCE = os.getenv("DB_READ_BALANCE", "least_connections").strip().lower()  # or "latency"
+DB_HEALTH_INTERVAL = _env_float("DB_HEALTH_INTERVAL", 15.0)  # seconds between replica pings; 0 = passive only
+DB_ENDPOINT_COOLDOWN = _env_float("DB_ENDPOINT_COOLDOWN", 30.0)  # seconds a failed endpoint is skipped
+
+# Streaming execute_sql (server-side cursor, paged results)
+SQL_FETCH_BATCH = _env_int("SQL_FETCH_BATCH", 100)  # rows per driver fetch
+SQL_PAGE_ROWS = _env_int("SQL_PAGE_ROWS", 50)  # rows per page returned to the agent/UI
+SQL_PAGE_MAX_BYTES = _env_int("SQL_PAGE_MAX_BYTES", 16_000)  # rendered bytes per page
+SQL_MAX_ROWS = _env_int("SQL_MAX_ROWS", 1000)  # hard cap across all pages of one query
+SQL_MAX_OPEN_CURSORS = _env_int("SQL_MAX_OPEN_CURSORS", 8)
+SQL_CURSOR_IDLE_TTL = _env_float("SQL_CURSOR_IDLE_TTL", 300.0)  # seconds before an idle cursor is closed
+
+# SQL result cache (keyed by normalized query text)
+RESULT_CACHE_ENABLED = _env_bool("RESULT_CACHE_ENABLED", True)
+RESULT_CACHE_MAX_BYTES = _env_int("RESULT_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+RESULT_CACHE_MAX_ENTRIES = _env_int("RESULT_CACHE_MAX_ENTRIES", 1000)
+RESULT_CACHE_TTL = _env_float("RESULT_CACHE_TTL", 300.0)  # seconds
+
+# Tabular results: full pages kept as DataFrames for the UI grid/downloads, the LLM only sees a preview
+RESULT_PREVIEW_ROWS = _env_int("RESULT_PREVIEW_ROWS", 10)  # rows of each page shown to the LLM
+RESULT_STORE_MAX_BYTES = _env_int("RESULT_STORE_MAX_BYTES", 64 * 1024 * 1024)
+RESULT_STORE_MAX_ENTRIES = _env_int("RESULT_STORE_MAX_ENTRIES", 200)
+
+# Embeddings: "hashing" (local/offline), "openai:<model>" or "ollama:<model>"
+EMBEDDINGS = os.getenv("NLDBQ_EMBEDDINGS", "hashing")
+
+# Semantic question -> SQL cache in front of the agent
+SEMANTIC_CACHE_ENABLED = _env_bool("SEMANTIC_CACHE_ENABLED", True)
+SEMANTIC_CACHE_THRESHOLD = _env_float("SEMANTIC_CACHE_THRESHOLD", 0.92)  # cosine similarity
+SEMANTIC_CACHE_MAX_ENTRIES = _env_int("SEMANTIC_CACHE_MAX_ENTRIES", 500)
+
+# Opt-in on-disk LLM response cache: byte-identical requests (messages + tools) replay the recorded stream
+LLM_CACHE_ENABLED = _env_bool("LLM_CACHE_ENABLED", False)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_cache.sqlite"))
+LLM_CACHE_MAX_BYTES = _env_int("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024)  # LRU-evicted beyond this; 0 = unbounded
+
+# Speculative schema prefetch: candidate tables + FK neighbours warmed in parallel while the LLM thinks
+SCHEMA_PREFETCH_ENABLED = _env_bool("SCHEMA_PREFETCH_ENABLED", True)
+SCHEMA_PREFETCH_WORKERS = _env_int("SCHEMA_PREFETCH_WORKERS", 4)  # keep below DB_POOL_SIZE
+
+# FK join graph: shortest join paths between tables, appended to multi-table get_table_schema output
+JOIN_HINTS_ENABLED = _env_bool("JOIN_HINTS_ENABLED", True)
+JOIN_MAX_HOPS = _env_int("JOIN_MAX_HOPS", 4)  # longest join chain suggested between two tables
+
+# Column value index: distinct values of short text columns, so literals resolve without exploratory queries
+VALUE_INDEX_ENABLED = _env_bool("VALUE_INDEX_ENABLED", True)
+VALUE_INDEX_PATH = os.getenv("VALUE_INDEX_PATH", os.path.join(CACHE_DIR, "value_index.json"))
+VALUE_INDEX_MAX_DISTINCT = _env_int("VALUE_INDEX_MAX_DISTINCT", 200)  # columns with more distinct values are skipped
+VALUE_INDEX_MAX_CHARS = _env_int("VALUE_INDEX_MAX_CHARS", 100)  # longer declared text columns are free text, skipped
+VALUE_INDEX_MAX_BYTES = _env_int("VALUE_INDEX_MAX_BYTES", 8 * 1024 * 1024)  # approx. memory; biggest columns evicted first
+VALUE_INDEX_TTL = _env_float("VALUE_INDEX_TTL", 24 * 3600)  # seconds before an unchanged table's values are re-read
+VALUE_INDEX_REFRESH_INTERVAL = _env_float("VALUE_INDEX_REFRESH_INTERVAL", 600.0)  # seconds; 0 = build on first lookup
+VALUE_INDEX_MIN_SCORE = _env_float("VALUE_INDEX_MIN_SCORE", 0.75)  # fuzzy similarity floor (0-1)
+
+# Learned query templates: deterministic fast path for recurring question shapes ("top N <x> by <y>")
+TEMPLATES_ENABLED = _env_bool("TEMPLATES_ENABLED", True)
+TEMPLATE_PATH = os.getenv("TEMPLATE_PATH", os.path.join(CACHE_DIR, "query_templates.json"))
+TEMPLATE_MAX = _env_int("TEMPLATE_MAX", 500)
+TEMPLATE_MIN_SUPPORT = _env_int("TEMPLATE_MIN_SUPPORT", 2)  # distinct successful questions before a template is used
+
+# Persistent schema vector index for find_relevant_tables
+SCHEMA_INDEX_PATH = os.getenv("SCHEMA_INDEX_PATH", os.path.join("notebook", "schema_vector_db"))
+SCHEMA_INDEX_EMBEDDINGS = os.getenv("SCHEMA_INDEX_EMBEDDINGS", "openai:text-embedding-3-small")
+SCHEMA_INDEX_TOP_K = _env_int("SCHEMA_INDEX_TOP_K", 4)
+SCHEMA_INDEX_EMBED_BATCH = _env_int("SCHEMA_INDEX_EMBED_BATCH", 64)  # documents per embedding call
+SCHEMA_INDEX_REFRESH_INTERVAL = _env_float("SCHEMA_INDEX_REFRESH_INTERVAL", 0.0)  # seconds; 0 = no background job
+
+# validate_sql: local parse + optional EXPLAIN-based cost guard
+SQL_VALIDATE_EXPLAIN = _env_bool("SQL_VALIDATE_EXPLAIN", True)
+SQL_MAX_ESTIMATED_ROWS = _env_float("SQL_MAX_ESTIMATED_ROWS", 1_000_000)  # 0 = no limit
+SQL_MAX_ESTIMATED_COST = _env_float("SQL_MAX_ESTIMATED_COST", 0)  # optimizer cost units; 0 = no limit
+
+# Async path: blocking DB/tool work runs on a bounded executor sized to the pool
+DB_EXECUTOR_WORKERS = _env_int("DB_EXECUTOR_WORKERS", DB_POOL_SIZE)
+
+# Headless HTTP query service
+API_MAX_CONCURRENCY = _env_int("API_MAX_CONCURRENCY", 8)  # agent runs in flight per process
+API_MAX_QUEUE = _env_int("API_MAX_QUEUE", 32)  # requests allowed to wait; beyond that -> 429
+API_QUEUE_TIMEOUT = _env_float("API_QUEUE_TIMEOUT", 30.0)  # seconds a request may wait for a worker
+API_REQUEST_TIMEOUT = _env_float("API_REQUEST_TIMEOUT", 300.0)  # seconds per agent run
+
+# Conversation memory: one checkpointer shared by every agent, bounded and persisted
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite").strip().lower()  # "sqlite" or "memory"
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(CACHE_DIR, "checkpoints.sqlite"))
+CHECKPOINT_MAX_THREADS = _env_int("CHECKPOINT_MAX_THREADS", 200)  # LRU threads kept; 0 = unlimited
+CHECKPOINT_IDLE_TTL = _env_float("CHECKPOINT_IDLE_TTL", 86400.0)  # seconds before an idle thread is dropped
+CHECKPOINT_KEEP_PER_THREAD = _env_int("CHECKPOINT_KEEP_PER_THREAD", 5)  # latest checkpoints kept per thread; 0 = all
+HISTORY_MAX_TOKENS = _env_int("HISTORY_MAX_TOKENS", 8000)  # trim a thread's messages beyond this; 0 = never
+HISTORY_KEEP_TOKENS = _env_int("HISTORY_KEEP_TOKENS", 3000)  # recent turns kept verbatim after a trim
+
+# Per-question tracing + in-process metrics (GET /metrics, UI timing waterfall)
+TRACING_ENABLED = _env_bool("TRACING_ENABLED", True)
+TRACE_HISTORY = _env_int("TRACE_HISTORY", 50)  # finished question traces kept in memory
+
+# Startup: pool, schema cache/index and the default agent are built in the background at launch
+WARMUP_ENABLED = _env_bool("WARMUP_ENABLED", True)
+WARMUP_POOL_CONNECTIONS = _env_int("WARMUP_POOL_CONNECTIONS", 2)  # connections opened ahead of the first query
+
+# Streamlit streaming render: token deltas are coalesced and drawn at most UI_STREAM_FPS times a second
+UI_STREAM_FPS = _env_float("UI_STREAM_FPS", 12.0)
+UI_STREAM_BLOCK_CHARS = _env_int("UI_STREAM_BLOCK_CHARS", 600)  # live tail size before finished paragraphs are frozen
+
+# Batch runner (batch.py): questions in flight, retries with exponential backoff, per-provider LLM rate limits
+BATCH_CONCURRENCY = _env_int("BATCH_CONCURRENCY", 4)
+BATCH_RETRIES = _env_int("BATCH_RETRIES", 3)  # extra attempts on rate limits / timeouts / 5xx
+BATCH_BACKOFF = _env_float("BATCH_BACKOFF", 2.0)  # seconds; doubles per retry, with jitter
+BATCH_MAX_BACKOFF = _env_float("BATCH_MAX_BACKOFF", 60.0)
+BATCH_RPM = os.getenv("BATCH_RPM", "")  # LLM calls/minute: "60" or "OpenAI=300,Groq=30"; empty = unlimited
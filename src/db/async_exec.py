@@ -0,0 +1,53 @@
+"""
+Async Exec - Bounded executor that bridges blocking DB drivers into asyncio.
+At most DB_EXECUTOR_WORKERS calls hold a thread (and a pooled connection) at once;
+everything else waits on the event loop instead of pinning one thread per request.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.config.settings import DB_EXECUTOR_WORKERS
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="nldbq-db")
+    return _executor
+
+
+async def run_in_db_executor(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await fn(*args, **kwargs) on the bounded DB executor (context vars preserved).
+
+    Cancelling the awaiting task drops queued work before it starts; a call that is
+    already running finishes in its thread and its result is discarded.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    future = loop.run_in_executor(get_db_executor(), call)
+    try:
+        return await future
+    except asyncio.CancelledError:
+        logger.debug(f"Cancelled {getattr(fn, '__name__', fn)} on the DB executor")
+        raise
+
+
+def shutdown_db_executor():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
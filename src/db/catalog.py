@@ -0,0 +1,224 @@
+"""
+Catalog - Single-pass bulk reflection of tables, columns, PKs and FKs for all schemas.
+A handful of set-based INFORMATION_SCHEMA queries replace one SQLDatabase
+reflection per schema; results live in a compact, JSON-serializable structure.
+"""
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Dialects whose INFORMATION_SCHEMA covers tables, columns, PKs and FKs with standard joins
+_INFO_SCHEMA_DIALECTS = {"mssql", "postgresql"}
+
+_TABLES_SQL = """
+    SELECT TABLE_SCHEMA, TABLE_NAME
+    FROM INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_TYPE = 'BASE TABLE' AND TABLE_SCHEMA IN ({schemas})
+"""
+
+_COLUMNS_SQL = """
+    SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE,
+           CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE, IS_NULLABLE
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA IN ({schemas})
+    ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION
+"""
+
+_PRIMARY_KEYS_SQL = """
+    SELECT kcu.TABLE_SCHEMA, kcu.TABLE_NAME, kcu.COLUMN_NAME
+    FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+    JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+      ON kcu.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
+     AND kcu.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+     AND kcu.TABLE_NAME = tc.TABLE_NAME
+    WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY' AND tc.TABLE_SCHEMA IN ({schemas})
+    ORDER BY kcu.TABLE_SCHEMA, kcu.TABLE_NAME, kcu.ORDINAL_POSITION
+"""
+
+_FOREIGN_KEYS_SQL = """
+    SELECT fk.TABLE_SCHEMA, fk.TABLE_NAME, fk.COLUMN_NAME,
+           pk.TABLE_SCHEMA, pk.TABLE_NAME, pk.COLUMN_NAME, rc.CONSTRAINT_NAME
+    FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
+    JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE fk
+      ON fk.CONSTRAINT_SCHEMA = rc.CONSTRAINT_SCHEMA
+     AND fk.CONSTRAINT_NAME = rc.CONSTRAINT_NAME
+    JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE pk
+      ON pk.CONSTRAINT_SCHEMA = rc.UNIQUE_CONSTRAINT_SCHEMA
+     AND pk.CONSTRAINT_NAME = rc.UNIQUE_CONSTRAINT_NAME
+     AND pk.ORDINAL_POSITION = fk.ORDINAL_POSITION
+    WHERE fk.TABLE_SCHEMA IN ({schemas})
+    ORDER BY fk.TABLE_SCHEMA, fk.TABLE_NAME, rc.CONSTRAINT_NAME, fk.ORDINAL_POSITION
+"""
+
+
+class Column(NamedTuple):
+    name: str
+    type: str
+    nullable: bool
+
+
+class ForeignKey(NamedTuple):
+    columns: Tuple[str, ...]
+    ref_table: str  # schema.table
+    ref_columns: Tuple[str, ...]
+
+
+class Table:
+    """One reflected table; __slots__ keeps a few hundred of these cheap."""
+    __slots__ = ("schema", "name", "columns", "primary_key", "foreign_keys")
+
+    def __init__(self, schema: str, name: str, columns=(), primary_key=(), foreign_keys=()):
+        self.schema = schema
+        self.name = name
+        self.columns: Tuple[Column, ...] = tuple(columns)
+        self.primary_key: Tuple[str, ...] = tuple(primary_key)
+        self.foreign_keys: Tuple[ForeignKey, ...] = tuple(foreign_keys)
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.schema}.{self.name}"
+
+    def ddl(self) -> str:
+        """CREATE TABLE text in the same shape SQLDatabase.get_table_info produced."""
+        lines = [
+            f"\t{c.name} {c.type}{'' if c.nullable else ' NOT NULL'}"
+            for c in self.columns
+        ]
+        if self.primary_key:
+            lines.append(f"\tPRIMARY KEY ({', '.join(self.primary_key)})")
+        for fk in self.foreign_keys:
+            lines.append(
+                f"\tFOREIGN KEY({', '.join(fk.columns)}) "
+                f"REFERENCES {fk.ref_table} ({', '.join(fk.ref_columns)})"
+            )
+        return f"CREATE TABLE {self.full_name} (\n" + ", \n".join(lines) + "\n)"
+
+    def fingerprint(self) -> str:
+        """Stable hash of the column / PK / FK definition (changes on any DDL edit)."""
+        return hashlib.sha1(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()
+
+    def to_dict(self) -> Dict:
+        return {
+            "schema": self.schema,
+            "name": self.name,
+            "columns": [list(c) for c in self.columns],
+            "primary_key": list(self.primary_key),
+            "foreign_keys": [[list(fk.columns), fk.ref_table, list(fk.ref_columns)] for fk in self.foreign_keys],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Table":
+        return cls(
+            data["schema"],
+            data["name"],
+            columns=[Column(*c) for c in data["columns"]],
+            primary_key=data["primary_key"],
+            foreign_keys=[ForeignKey(tuple(c), t, tuple(r)) for c, t, r in data["foreign_keys"]],
+        )
+
+
+class Catalog:
+    """In-memory catalog of every reflected table, keyed by schema.table."""
+
+    def __init__(self, tables: Iterable[Table] = ()):
+        self.tables: Dict[str, Table] = {t.full_name: t for t in tables}
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def __contains__(self, full_name: str) -> bool:
+        return full_name in self.tables
+
+    def get(self, full_name: str) -> Optional[Table]:
+        return self.tables.get(full_name)
+
+    def table_names(self, schema: str = None) -> List[str]:
+        return sorted(n for n, t in self.tables.items() if schema is None or t.schema == schema)
+
+    def to_dict(self) -> Dict:
+        return {"tables": [t.to_dict() for t in self.tables.values()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Catalog":
+        return cls(Table.from_dict(t) for t in data.get("tables", []))
+
+
+def _format_type(data_type: str, char_len, precision, scale) -> str:
+    data_type = data_type.upper()
+    if char_len is not None:
+        return f"{data_type}({'MAX' if char_len == -1 else char_len})"
+    if data_type in ("DECIMAL", "NUMERIC") and precision is not None:
+        return f"{data_type}({precision}, {scale or 0})"
+    return data_type
+
+
+def _reflect_information_schema(engine, schemas: List[str]) -> Catalog:
+    quoted = ", ".join("'" + s.replace("'", "''") + "'" for s in schemas)
+    columns: Dict[Tuple[str, str], List[Column]] = defaultdict(list)
+    primary_keys: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+    fk_parts: Dict[Tuple[str, str, str], List[Tuple[str, str, str]]] = defaultdict(list)
+
+    with engine.connect() as conn:
+        table_keys = [tuple(r) for r in conn.execute(text(_TABLES_SQL.format(schemas=quoted)))]
+        for schema, table, col, dtype, char_len, precision, scale, nullable in conn.execute(
+            text(_COLUMNS_SQL.format(schemas=quoted))
+        ):
+            columns[(schema, table)].append(
+                Column(col, _format_type(dtype, char_len, precision, scale), nullable == "YES")
+            )
+        for schema, table, col in conn.execute(text(_PRIMARY_KEYS_SQL.format(schemas=quoted))):
+            primary_keys[(schema, table)].append(col)
+        for schema, table, col, ref_schema, ref_table, ref_col, name in conn.execute(
+            text(_FOREIGN_KEYS_SQL.format(schemas=quoted))
+        ):
+            fk_parts[(schema, table, name)].append((col, f"{ref_schema}.{ref_table}", ref_col))
+
+    foreign_keys: Dict[Tuple[str, str], List[ForeignKey]] = defaultdict(list)
+    for (schema, table, _), parts in fk_parts.items():
+        foreign_keys[(schema, table)].append(ForeignKey(
+            tuple(p[0] for p in parts), parts[0][1], tuple(p[2] for p in parts)
+        ))
+
+    return Catalog(
+        Table(schema, table, columns[(schema, table)], primary_keys[(schema, table)], foreign_keys[(schema, table)])
+        for schema, table in table_keys
+    )
+
+
+def _reflect_inspector(engine, schemas: List[str]) -> Catalog:
+    """Fallback for dialects without a usable INFORMATION_SCHEMA (e.g. SQLite, MySQL)."""
+    inspector = inspect(engine)
+    tables = []
+    for schema in schemas:
+        for name in inspector.get_table_names(schema=schema):
+            cols = [
+                Column(c["name"], str(c["type"]), bool(c.get("nullable", True)))
+                for c in inspector.get_columns(name, schema=schema)
+            ]
+            pk = inspector.get_pk_constraint(name, schema=schema).get("constrained_columns") or []
+            fks = [
+                ForeignKey(
+                    tuple(fk["constrained_columns"]),
+                    f"{fk.get('referred_schema') or schema}.{fk['referred_table']}",
+                    tuple(fk["referred_columns"]),
+                )
+                for fk in inspector.get_foreign_keys(name, schema=schema)
+            ]
+            tables.append(Table(schema, name, cols, pk, fks))
+    return Catalog(tables)
+
+
+def reflect_catalog(engine, schemas: List[str]) -> Catalog:
+    """Reflect all schemas in one pass and return the in-memory catalog."""
+    if engine.dialect.name in _INFO_SCHEMA_DIALECTS:
+        catalog = _reflect_information_schema(engine, schemas)
+    else:
+        catalog = _reflect_inspector(engine, schemas)
+    logger.info(f"📚 Reflected {len(catalog)} tables across {len(schemas)} schemas")
+    return catalog
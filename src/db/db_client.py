@@ -1,12 +1,99 @@
+import glob
+import logging
 import os
+import threading
+import time
 import urllib.parse
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+from sqlalchemy import create_engine, event, exc, make_url, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import QueuePool
+
+from src.config.settings import (
+    DB_ENDPOINT_COOLDOWN, DB_HEALTH_INTERVAL, DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE,
+    DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_READ_BALANCE, DB_REPLICAS,
+)
+from src.db.endpoints import Endpoint, pick_order, replica_uri
+
+logger = logging.getLogger(__name__)
+
+class PoolStats:
+    """Checkout/wait counters for one engine's pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(1000 * self.wait_total / self.checkouts, 2) if self.checkouts else 0.0,
+                "wait_max_ms": round(1000 * self.wait_max, 2),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a free connection."""
+    stats: PoolStats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.stats:
+                self.stats.incr("timeouts")
+            raise
+        finally:
+            if self.stats:
+                self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def _sqlite_attach_schemas(path: str):
+    """SQLite has no schemas: attach every sibling <Schema>.db so schema.table names resolve."""
+    main = os.path.abspath(path)
+    schema_files = [
+        f for f in sorted(glob.glob(os.path.join(os.path.dirname(main), "*.db")))
+        if os.path.abspath(f) != main
+    ]
+
+    def _attach(dbapi_conn, _record):
+        for f in schema_files:
+            schema = os.path.splitext(os.path.basename(f))[0]
+            dbapi_conn.execute(f"ATTACH DATABASE '{f}' AS \"{schema}\"")
+    return _attach
+
 
 class DBClient:
     def __init__(self, env_file: str = ".env"):
         # Load env variables
         load_dotenv(env_file)
 
+        self.url = os.getenv("DB_URL")  # full SQLAlchemy URL; overrides the DB_* parts below
         self.user = os.getenv("DB_USER")
         self.password = os.getenv("DB_PASSWORD")
         self.host = os.getenv("DB_HOST")
@@ -14,10 +101,39 @@ class DBClient:
         self.database = os.getenv("DB_NAME")
         self.db_type = os.getenv("DB_TYPE")
 
-        if not all([self.user, self.password, self.host, self.port, self.database, self.db_type]):
+        # SQLite (offline fixtures/benchmarks) only needs a file path in DB_NAME
+        required = [self.database, self.db_type]
+        if (self.db_type or "").lower() != "sqlite":
+            required += [self.user, self.password, self.host, self.port]
+        if not self.url and not all(required):
             raise ValueError("One or more required database environment variables are missing")
 
+        self.pool_size = DB_POOL_SIZE
+        self.max_overflow = DB_MAX_OVERFLOW
+        self.pool_timeout = DB_POOL_TIMEOUT
+        self.pool_recycle = DB_POOL_RECYCLE
+        self.pool_pre_ping = DB_POOL_PRE_PING
+
+        # "default" is the primary; replicas serve read-only agent queries (see connect_read)
+        primary = self.get_connection_uri()
+        self.endpoints: Dict[str, Endpoint] = {"default": Endpoint("default", primary, "primary")}
+        for i, spec in enumerate(DB_REPLICAS, 1):
+            self.endpoints[f"replica{i}"] = Endpoint(f"replica{i}", replica_uri(spec, primary), "replica")
+        self.balance = DB_READ_BALANCE
+
+        self._engines: Dict[str, Engine] = {}
+        self._stats: Dict[str, PoolStats] = {}
+        self._lock = threading.Lock()
+        self._health_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
     def get_connection_uri(self) -> str:
+        if self.url:
+            return self.url
+
+        if self.db_type.lower() == "sqlite":
+            return f"sqlite:///{self.database}"
+
         pwd = urllib.parse.quote_plus(self.password)
 
         if self.db_type.lower() == "mssql":
@@ -25,8 +141,160 @@ class DBClient:
                 f"mssql+pyodbc://{self.user}:{pwd}@{self.host},{self.port}/{self.database}"
                 "?driver=ODBC+Driver+18+for+SQL+Server&encrypt=no"
             )
+        if self.db_type.lower() in ("postgres", "postgresql"):
+            return f"postgresql+psycopg2://{self.user}:{pwd}@{self.host}:{self.port}/{self.database}"
+        if self.db_type.lower() == "mysql":
+            return f"mysql+pymysql://{self.user}:{pwd}@{self.host}:{self.port}/{self.database}"
 
         raise NotImplementedError(f"Database type '{self.db_type}' is not supported yet.")
 
-# Global singleton
-db_client = DBClient()
+    @property
+    def replicas(self) -> List[str]:
+        return [name for name, e in self.endpoints.items() if e.role == "replica"]
+
+    def get_engine(self, name: str = "default") -> Engine:
+        """Shared engine from the registry; created once with the configured pool policy."""
+        engine = self._engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            if name not in self._engines:
+                self._engines[name] = self._create_engine(name)
+            return self._engines[name]
+
+    def _create_engine(self, name: str) -> Engine:
+        stats = PoolStats()
+        uri = self.endpoints[name].uri
+        url = make_url(uri)
+        is_sqlite = url.get_backend_name() == "sqlite"
+        engine = create_engine(
+            uri,
+            poolclass=InstrumentedQueuePool,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+            pool_pre_ping=self.pool_pre_ping,
+            connect_args={"check_same_thread": False} if is_sqlite else {},
+        )
+        if is_sqlite:
+            event.listen(engine, "connect", _sqlite_attach_schemas(url.database))
+        engine.pool.stats = stats
+        event.listen(engine, "connect", lambda *_: stats.incr("connects"))
+        event.listen(engine, "checkout", lambda *_: stats.incr("checkouts"))
+        event.listen(engine, "checkin", lambda *_: stats.incr("checkins"))
+        self._stats[name] = stats
+        primary = self._engines.get("default")
+        if primary is not None and engine.dialect.name != primary.dialect.name:
+            logger.warning(f"⚠️ Endpoint {name} is {engine.dialect.name}, primary is {primary.dialect.name}")
+        return engine
+
+    def _in_use(self, name: str) -> int:
+        engine = self._engines.get(name)
+        return engine.pool.checkedout() if engine is not None else 0
+
+    def connect_read(self) -> Tuple[str, Connection]:
+        """(endpoint, connection) for a read-only query: best replica first, failing over to the primary."""
+        if not self.replicas:
+            return "default", self.get_engine().connect()
+        self.start_health_checks()
+        last_error = None
+        for endpoint in pick_order(list(self.endpoints.values()), self.balance, self._in_use):
+            try:
+                conn = self.get_engine(endpoint.name).connect()
+            except exc.DBAPIError as e:
+                self.mark_down(endpoint.name, e)
+                last_error = e
+                continue
+            endpoint.mark_up()
+            endpoint.routed += 1
+            return endpoint.name, conn
+        raise last_error
+
+    def mark_down(self, name: str, error: Exception):
+        """Skip an endpoint for DB_ENDPOINT_COOLDOWN seconds (failed connect or dropped connection)."""
+        endpoint = self.endpoints[name]
+        endpoint.mark_down(error, DB_ENDPOINT_COOLDOWN)
+        logger.warning(f"⚠️ DB endpoint {name} marked down: {endpoint.last_error}")
+
+    def check_health(self):
+        """Ping every replica once (SELECT 1), updating health and latency."""
+        for name in self.replicas:
+            start = time.perf_counter()
+            try:
+                with self.get_engine(name).connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            except exc.DBAPIError as e:
+                if self.endpoints[name].healthy:
+                    self.mark_down(name, e)
+                continue
+            if not self.endpoints[name].healthy:
+                logger.info(f"✅ DB endpoint {name} is back")
+            self.endpoints[name].mark_up(1000 * (time.perf_counter() - start))
+
+    def start_health_checks(self):
+        """Background replica pings every DB_HEALTH_INTERVAL seconds (once per client)."""
+        if self._health_thread is not None or DB_HEALTH_INTERVAL <= 0 or not self.replicas:
+            return
+        with self._lock:
+            if self._health_thread is not None:
+                return
+            self._stop.clear()
+
+            def _loop():
+                while True:
+                    try:
+                        self.check_health()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Replica health check failed: {e}")
+                    if self._stop.wait(DB_HEALTH_INTERVAL):
+                        return
+
+            self._health_thread = threading.Thread(target=_loop, name="nldbq-db-health", daemon=True)
+            self._health_thread.start()
+
+    def pool_stats(self) -> Dict[str, Dict]:
+        """Pool saturation + checkout/wait statistics per registered engine."""
+        result = {}
+        for name, engine in list(self._engines.items()):
+            pool = engine.pool
+            result[name] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_overflow": self.max_overflow,
+                **self._stats[name].snapshot(),
+            }
+        return result
+
+    def endpoint_stats(self) -> Dict[str, Dict]:
+        """Role, health, ping latency and routed reads per endpoint."""
+        return {name: {**e.snapshot(), "in_use": self._in_use(name)} for name, e in self.endpoints.items()}
+
+    def dispose(self):
+        self._stop.set()
+        self._health_thread = None
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+            self._stats.clear()
+
+_db_client: Optional[DBClient] = None
+_client_lock = threading.Lock()
+
+def get_db_client() -> DBClient:
+    """Process-wide DBClient, created on first use so importing never needs DB env vars."""
+    global _db_client
+    if _db_client is None:
+        with _client_lock:
+            if _db_client is None:
+                _db_client = DBClient()
+    return _db_client
+
+def __getattr__(name: str):
+    # `from src.db.db_client import db_client` keeps working (notebooks), but resolves lazily
+    if name == "db_client":
+        return get_db_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,81 +3,386 @@ DB Schema Wrapper - Functions accept self=None for bound method calls.
 Handles type() wrapper + @tool double-binding perfectly.
 """
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from contextlib import contextmanager
-from langchain_community.utilities import SQLDatabase
+from sqlalchemy import column as sql_column, exc, select, table as sql_table
 from src.config.db_schema import SCHEMA_LIST
-from src.db.db_client import db_client
+from src.config.settings import (
+    JOIN_HINTS_ENABLED, JOIN_MAX_HOPS,
+    RESULT_CACHE_ENABLED, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL,
+    RESULT_STORE_MAX_BYTES, RESULT_STORE_MAX_ENTRIES,
+    SCHEMA_CACHE_ENABLED, SCHEMA_CACHE_FLUSH_DELAY, SCHEMA_CACHE_PATH, SCHEMA_CACHE_TTL,
+    SCHEMA_PREFETCH_ENABLED, SCHEMA_PREFETCH_WORKERS,
+    SCHEMA_RENDER, SCHEMA_SAMPLE_ROWS, SCHEMA_TOKEN_BUDGET,
+    SQL_MAX_ESTIMATED_COST, SQL_MAX_ESTIMATED_ROWS, SQL_VALIDATE_EXPLAIN,
+    SQL_CURSOR_IDLE_TTL, SQL_FETCH_BATCH, SQL_MAX_OPEN_CURSORS, SQL_MAX_ROWS, SQL_PAGE_MAX_BYTES, SQL_PAGE_ROWS,
+    VALUE_INDEX_ENABLED, VALUE_INDEX_MAX_BYTES, VALUE_INDEX_MAX_CHARS, VALUE_INDEX_MAX_DISTINCT, VALUE_INDEX_MIN_SCORE,
+    VALUE_INDEX_PATH, VALUE_INDEX_REFRESH_INTERVAL, VALUE_INDEX_TTL,
+)
+from src.db.catalog import Catalog, Table, reflect_catalog
+from src.db.db_client import get_db_client
+from src.db.join_graph import JoinGraph
+from src.db.result_cache import ResultCache
+from src.db.result_store import ResultStore
+from src.db.schema_cache import SchemaCache, catalog_fingerprint
+from src.db.schema_prefetch import SchemaPrefetcher, fk_neighbours
+from src.db.schema_render import render_tables
+from src.db.sql_stream import ResultPage, SQLStreamer
+from src.db import sql_validator
+from src.db.sql_validator import ValidationResult
+from src.db.value_index import ValueIndex, ValueMatch
+from src.telemetry.metrics import REGISTRY
+from src.telemetry.tracing import span, traced
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(name)s | %(levelname)s | %(message)s")
 logger = logging.getLogger(__name__)
 
-dbs: Dict[str, SQLDatabase] = {}
-_default_db = None
-_initialized = False
-
-def _init_databases():
-    global dbs, _default_db, _initialized
-    if _initialized: return
-    
-    logger.info("🔌 Initializing DB connections...")
-    uri = db_client.get_connection_uri()
-    
-    dbs = {
-        schema: SQLDatabase.from_uri(
-            uri, schema=schema, 
-            engine_args={"pool_pre_ping": True, "pool_recycle": 3600}
-        )
-        for schema in SCHEMA_LIST
+_catalog: Optional[Catalog] = None  # only used when the schema cache is disabled
+_samples: Dict[str, Dict] = {}  # likewise
+_join_graph: Optional[JoinGraph] = None
+_join_graph_catalog: Optional[Catalog] = None  # the catalog it was built from; rebuilt when that changes
+
+SAMPLE_ROWS = 3
+
+def _get_engine():
+    """Shared engine from the DBClient registry - one pool for every schema handle."""
+    return get_db_client().get_engine()
+
+def _fingerprint() -> str:
+    return catalog_fingerprint(_get_engine(), SCHEMA_LIST)
+
+def _default_schema() -> Optional[str]:
+    """Schema the database resolves unqualified names in (the dialect learns it on first connect)."""
+    engine = _get_engine()
+    if engine.dialect.default_schema_name is None:
+        with engine.connect():
+            pass
+    return engine.dialect.default_schema_name
+
+schema_cache = SchemaCache(SCHEMA_CACHE_PATH, SCHEMA_CACHE_TTL, fingerprint_fn=_fingerprint,
+                           flush_delay=SCHEMA_CACHE_FLUSH_DELAY)
+result_cache = ResultCache(RESULT_CACHE_MAX_BYTES, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL,
+                           default_schema_fn=_default_schema)
+result_store = ResultStore(RESULT_STORE_MAX_BYTES, RESULT_STORE_MAX_ENTRIES)
+sql_streamer = SQLStreamer(
+    page_rows=SQL_PAGE_ROWS, page_max_bytes=SQL_PAGE_MAX_BYTES, max_rows=SQL_MAX_ROWS,
+    fetch_batch=SQL_FETCH_BATCH, max_open=SQL_MAX_OPEN_CURSORS, idle_ttl=SQL_CURSOR_IDLE_TTL,
+)
+value_index = ValueIndex(VALUE_INDEX_PATH, VALUE_INDEX_MAX_BYTES, VALUE_INDEX_MAX_DISTINCT, VALUE_INDEX_MAX_CHARS)
+
+def get_catalog(self=None) -> Catalog:
+    """Bulk-reflected catalog for all schemas (served from the schema cache when warm)."""
+    global _catalog
+    if SCHEMA_CACHE_ENABLED:
+        catalog = schema_cache.get_catalog()
+        if catalog is None:
+            catalog = _reflect()
+            schema_cache.set_catalog(catalog)
+        return catalog
+    if _catalog is None:
+        _catalog = _reflect()
+    return _catalog
+
+def get_join_graph(self=None) -> JoinGraph:
+    """FK join graph with precomputed shortest paths, rebuilt whenever the catalog is re-reflected."""
+    global _join_graph, _join_graph_catalog
+    catalog = get_catalog()
+    if _join_graph is None or _join_graph_catalog is not catalog:
+        with span("schema", "join_graph") as s:
+            graph = JoinGraph(catalog, JOIN_MAX_HOPS)
+            s.set(**graph.stats())
+        _join_graph, _join_graph_catalog = graph, catalog
+        logger.info(f"🔗 Join graph: {graph.stats()['edges']} FK edges, {graph.stats()['paths']} paths")
+    return _join_graph
+
+def join_path(self, table_names: List[str]) -> str:
+    """Ready-to-use FROM/JOIN lines connecting the tables along the fewest FK hops."""
+    return get_join_graph().render(table_names)
+
+def _join_hints(catalog: Catalog, table_names: List[str]) -> str:
+    known = [t for t in dict.fromkeys(table_names) if t in catalog]
+    if not JOIN_HINTS_ENABLED or len(known) < 2:
+        return ""
+    return "\n\nJoins (FK paths):\n" + get_join_graph().render(known)
+
+def _distinct_values(table: Table, column: str, limit: int) -> Optional[List[str]]:
+    """Up to `limit` distinct non-null values of one column (None if the query fails)."""
+    col = sql_column(column)
+    sa_table = sql_table(table.name, col, schema=table.schema)
+    query = select(col).select_from(sa_table).where(col.is_not(None)).distinct().limit(limit)
+    try:
+        with span("sql", "distinct_values", table=table.full_name, column=column), get_db_client().connect_read()[1] as conn:
+            return [str(row[0]) for row in conn.execute(query)]
+    except Exception as e:
+        logger.debug(f"Distinct values skipped for {table.full_name}.{column}: {e}")
+        return None
+
+def refresh_value_index(self=None, force: bool = False) -> Dict[str, int]:
+    """Re-read distinct values of new, changed or stale tables (all of them when force=True)."""
+    if not VALUE_INDEX_ENABLED:
+        return {}
+    with span("schema", "value_index_refresh") as s:
+        report = value_index.refresh(get_catalog(), _distinct_values, VALUE_INDEX_TTL, force=force)
+        s.set(**report)
+    return report
+
+def start_value_index_refresh(self=None):
+    """Build the value index in the background, then keep it fresh every VALUE_INDEX_REFRESH_INTERVAL."""
+    if VALUE_INDEX_ENABLED and VALUE_INDEX_REFRESH_INTERVAL > 0:
+        value_index.start_background_refresh(refresh_value_index, VALUE_INDEX_REFRESH_INTERVAL)
+
+def find_values(self, phrase: str, limit: int = 8) -> List[ValueMatch]:
+    """(table, column, value) candidates for a literal phrase; builds the index on first use if nothing did."""
+    if value_index.state == "empty":
+        refresh_value_index()
+    return value_index.lookup(phrase, limit=limit, min_score=VALUE_INDEX_MIN_SCORE)
+
+def _reflect() -> Catalog:
+    with span("schema", "reflect_catalog") as s:
+        catalog = reflect_catalog(_get_engine(), SCHEMA_LIST)
+        s.set(tables=len(catalog))
+    return catalog
+
+def _fetch_sample(table: Table) -> Optional[Dict]:
+    """First SAMPLE_ROWS rows as {"columns", "rows"}; queried once, then served from the cache."""
+    cached = schema_cache.get_samples(table.full_name) if SCHEMA_CACHE_ENABLED else _samples.get(table.full_name)
+    if cached is not None:
+        return cached
+    sa_table = sql_table(table.name, *[sql_column(c.name) for c in table.columns], schema=table.schema)
+    try:
+        with span("sql", "sample_rows", table=table.full_name), get_db_client().connect_read()[1] as conn:
+            rows = conn.execute(select(sa_table).limit(SAMPLE_ROWS)).fetchall()
+    except Exception as e:
+        logger.debug(f"Sample rows skipped for {table.full_name}: {e}")
+        return None
+    sample = {
+        "columns": [c.name for c in table.columns],
+        "rows": [[None if v is None else str(v)[:100] for v in row] for row in rows],
     }
-    _default_db = list(dbs.values())[0]
-    _initialized = True
-    logger.info(f"✅ {len(dbs)} schemas ready")
+    if SCHEMA_CACHE_ENABLED:
+        schema_cache.set_samples(table.full_name, sample)
+    else:
+        _samples[table.full_name] = sample
+    return sample
+
+def _sample_rows(table: Table) -> str:
+    """Sample rows in the comment block SQLDatabase used to append."""
+    sample = _fetch_sample(table)
+    if sample is None:
+        return ""
+    header = "\t".join(sample["columns"])
+    body = "\n".join("\t".join(str(v) for v in row) for row in sample["rows"])
+    return f"/*\n{SAMPLE_ROWS} rows from {table.name} table:\n{header}\n{body}\n*/"
+
+def _render_table_info(table: Table) -> str:
+    sample = _sample_rows(table)
+    return f"{table.ddl()}\n\n{sample}" if sample else table.ddl()
 
 # ✅ FIXED: self=None catches bound method self injection
 def get_usable_table_names(self=None) -> str:
-    _init_databases()
-    all_tables = []
-    for schema, db in dbs.items():
-        tables = db.get_usable_table_names()
-        all_tables.extend(f"{schema}.{t}" for t in tables)
-    return ", ".join(sorted(all_tables))
-
-def get_table_info(self, table_names: List[str]) -> str:
-    _init_databases()
+    return ", ".join(get_catalog().table_names())
+
+@traced("schema")
+def get_table_info(self, table_names: List[str], question: str = "") -> str:
+    """Schema text per SCHEMA_LIST schema: compact + token-budgeted (default) or full DDL."""
     if not table_names:
         return "No tables specified"
-    
+
+    catalog = get_catalog()
+    # Fan out the per-table work (sample queries, DDL) across the prefetch pool, joining any
+    # speculative fetch already in flight; the assembly below then reads from the cache
+    schema_prefetcher.wait([t for t in table_names if t in catalog])
+    if SCHEMA_RENDER == "compact":
+        return _compact_table_info(catalog, table_names, question) + _join_hints(catalog, table_names)
     result = []
-    for schema_name, db in dbs.items():
-        schema_tables = [t.split(".")[-1] for t in table_names if t.startswith(f"{schema_name}.")]
-        if schema_tables:
-            try:
-                info = db.get_table_info(schema_tables)
-                result.append(f"Schema: {schema_name}\n{info}")
-            except Exception as e:
-                result.append(f"Schema: {schema_name} - Error: {e}")
-    
+    for schema_name in SCHEMA_LIST:
+        schema_tables = [t for t in table_names if t.startswith(f"{schema_name}.")]
+        if not schema_tables:
+            continue
+        unknown = [t for t in schema_tables if t not in catalog]
+        if unknown:
+            result.append(f"Schema: {schema_name} - Error: table_names {set(unknown)} not found in database")
+            continue
+        infos, missing = {}, []
+        for table in schema_tables:
+            cached = schema_cache.get_table_info(table) if SCHEMA_CACHE_ENABLED else None
+            if cached is None:
+                missing.append(table)
+            else:
+                infos[table] = cached
+        try:
+            fetched = {t: _render_table_info(catalog.get(t)) for t in missing}
+            if fetched and SCHEMA_CACHE_ENABLED:
+                schema_cache.set_table_info(fetched)
+            infos.update(fetched)
+            info = "\n\n".join(infos[t] for t in schema_tables)
+            result.append(f"Schema: {schema_name}\n{info}")
+        except Exception as e:
+            result.append(f"Schema: {schema_name} - Error: {e}")
+
+    return ("\n\n".join(result) or "No matching tables") + _join_hints(catalog, table_names)
+
+def _warm_table(name: str):
+    """Everything get_table_info needs for one table, into the schema cache (prefetch target)."""
+    table = get_catalog().get(name)
+    if table is None:
+        return
+    if SCHEMA_RENDER != "compact" and SCHEMA_CACHE_ENABLED:
+        if schema_cache.get_table_info(name) is None:
+            schema_cache.set_table_info({name: _render_table_info(table)})
+    elif SCHEMA_SAMPLE_ROWS > 0 or SCHEMA_RENDER != "compact":
+        _fetch_sample(table)
+
+schema_prefetcher = SchemaPrefetcher(_warm_table, SCHEMA_PREFETCH_WORKERS)
+
+def prefetch_tables(self, table_names: List[str], neighbours: bool = True):
+    """Speculatively warm tables (+ their FK neighbours) in the background; returns immediately."""
+    if not SCHEMA_PREFETCH_ENABLED:
+        return
+    catalog = get_catalog()
+    names = [t for t in table_names if t in catalog]
+    if neighbours:
+        names += fk_neighbours(catalog, names)
+    schema_prefetcher.ensure(names)
+
+def _compact_table_info(catalog: Catalog, table_names: List[str], question: str) -> str:
+    known = [t for t in dict.fromkeys(table_names) if t in catalog]
+    samples = {}
+    if SCHEMA_SAMPLE_ROWS > 0:
+        for name in known:
+            sample = _fetch_sample(catalog.get(name))
+            if sample:
+                samples[name] = {"columns": sample["columns"], "rows": sample["rows"][:SCHEMA_SAMPLE_ROWS]}
+    rendered = render_tables([catalog.get(t) for t in known], question, SCHEMA_TOKEN_BUDGET, samples)
+
+    result = []
+    for schema_name in SCHEMA_LIST:
+        schema_tables = [t for t in dict.fromkeys(table_names) if t.startswith(f"{schema_name}.")]
+        if not schema_tables:
+            continue
+        lines = [rendered[t] for t in schema_tables if t in rendered]
+        unknown = [t for t in schema_tables if t not in catalog]
+        if unknown:
+            lines.append(f"Error: table_names {set(unknown)} not found in database")
+        result.append(f"Schema: {schema_name}\n" + "\n".join(lines))
     return "\n\n".join(result) or "No matching tables"
 
+def sql_dialect(self=None) -> str:
+    """sqlglot dialect for the configured database."""
+    return sql_validator.DIALECTS.get(_get_engine().dialect.name, "tsql")
+
+def validate_sql(self, query: str, explain: bool = SQL_VALIDATE_EXPLAIN) -> ValidationResult:
+    """Local parse + catalog resolution, then (optionally) the optimizer's estimate as a cost guard."""
+    result = sql_validator.validate(query, get_catalog(), sql_dialect())
+    if not result.ok or not explain:
+        return result
+    try:
+        with span("sql", "explain"):
+            rows, cost = sql_validator.estimate(_get_engine(), query)
+    except Exception as e:
+        return result._replace(warnings=result.warnings + [f"Plan estimate unavailable: {e}"])
+    return sql_validator.apply_cost_guard(result, rows, cost, SQL_MAX_ESTIMATED_ROWS, SQL_MAX_ESTIMATED_COST)
+
+def _execute_routed(query: str) -> Tuple[str, ResultPage]:
+    """Read-only queries go to a replica (failing over on dropped connections), anything else to the primary."""
+    client = get_db_client()
+    if not client.replicas or sql_validator.check_read_only(query, sql_dialect()):
+        return "default", sql_streamer.execute(_get_engine(), query)
+    for attempt in range(len(client.endpoints)):
+        endpoint, conn = client.connect_read()
+        try:
+            return endpoint, sql_streamer.execute_on(conn, query)
+        except exc.DBAPIError as e:
+            if not e.connection_invalidated or attempt == len(client.endpoints) - 1:
+                raise
+            client.mark_down(endpoint, e)
+    raise RuntimeError("unreachable")
+
+def run_page(self, query: str) -> ResultPage:
+    """First page of a streamed query; later pages via fetch_more(handle)."""
+    with span("sql", "run_page") as s:
+        if RESULT_CACHE_ENABLED:
+            cached = result_cache.get(query)
+            s.set(cache_hit=cached is not None)
+            if cached is not None:
+                s.set(rows=len(cached.rows))
+                return cached
+
+        endpoint, page = _execute_routed(query)
+        s.set(rows=len(page.rows), has_more=page.has_more, truncated=page.truncated, endpoint=endpoint)
+        if RESULT_CACHE_ENABLED and page.columns:
+            result_cache.put(query, page)
+        return page
+
+def fetch_more(self, handle: str) -> ResultPage:
+    with span("sql", "fetch_more") as s:
+        page = sql_streamer.fetch_more(handle)
+        s.set(rows=len(page.rows), has_more=page.has_more)
+        return page
+
 def run(self, query: str) -> str:
-    _init_databases()
-    return _default_db.run(query)
+    return run_page(self, query).render()
+
+def invalidate_results(self=None, tables: List[str] = None):
+    """Drop cached results for the given schema.table names (all results if None)."""
+    if tables is None:
+        result_cache.clear()
+    else:
+        result_cache.invalidate_tables(tables)
+
+def invalidate_schema_cache(self=None):
+    schema_cache.invalidate()
+    logger.info("♻️ Schema cache cleared")
 
 def close_all(self):
-    global dbs, _default_db, _initialized
     logger.info("🔒 Closing connections...")
-    for db in list(dbs.values()):
-        if hasattr(db, '_engine'):
-            db._engine.dispose()
-    dbs.clear()
-    _default_db = None
-    _initialized = False
+    sql_streamer.close_all()
+    schema_cache.flush()
+    get_db_client().dispose()
+
+def _gauges():
+    """Pool saturation + cache state, sampled on every metrics export."""
+    for engine, stats in get_db_client().pool_stats().items():
+        for key in ("size", "checked_out", "overflow", "timeouts", "wait_avg_ms", "wait_max_ms"):
+            yield f"nldbq_db_pool_{key}", {"engine": engine}, stats[key]
+    for cache, stats in (("result", result_cache.stats()), ("schema", schema_cache.stats()), ("frames", result_store.stats())):
+        for key in ("hits", "misses", "entries", "bytes"):
+            if key in stats:
+                yield f"nldbq_cache_{key}", {"cache": cache}, stats[key]
+    yield "nldbq_sql_open_cursors", {}, len(sql_streamer.open_handles())
+    for key, value in schema_prefetcher.stats().items():
+        yield f"nldbq_schema_prefetch_{key}", {}, value
+    if _join_graph is not None:
+        for key, value in _join_graph.stats().items():
+            yield f"nldbq_join_graph_{key}", {}, value
+    for key, value in value_index.stats().items():
+        yield f"nldbq_value_index_{key}", {}, value
+    for endpoint, stats in get_db_client().endpoint_stats().items():
+        labels = {"endpoint": endpoint, "role": stats["role"]}
+        yield "nldbq_db_endpoint_up", labels, int(stats["healthy"])
+        yield "nldbq_db_endpoint_routed", labels, stats["routed"]
+        if stats["latency_ms"] is not None:
+            yield "nldbq_db_endpoint_latency_ms", labels, stats["latency_ms"]
+
+REGISTRY.register_collector(_gauges)
 
 # ✅ Object with bound methods
 db_schema_wrapper = type("Wrapper", (), {
     "get_usable_table_names": get_usable_table_names,
     "get_table_info": get_table_info,
+    "get_catalog": get_catalog,
+    "prefetch_tables": prefetch_tables,
+    "get_join_graph": get_join_graph,
+    "join_path": join_path,
+    "refresh_value_index": refresh_value_index,
+    "start_value_index_refresh": start_value_index_refresh,
+    "find_values": find_values,
+    "validate_sql": validate_sql,
+    "sql_dialect": sql_dialect,
     "run": run,
+    "run_page": run_page,
+    "fetch_more": fetch_more,
+    "invalidate_results": invalidate_results,
+    "invalidate_schema_cache": invalidate_schema_cache,
     "close": close_all,
 })()
\ No newline at end of file
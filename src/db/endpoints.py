@@ -0,0 +1,83 @@
+"""
+DB Endpoints - Primary + read-replica bookkeeping for DBClient.
+Each endpoint tracks health (down for DB_ENDPOINT_COOLDOWN after a failed connect or ping),
+a ping-latency EWMA and how many reads it served; pick_order() ranks the replicas by
+least connections or latency and always ends with the primary as the failover target.
+"""
+import time
+import urllib.parse
+from typing import Callable, Dict, List, Optional
+
+LATENCY_ALPHA = 0.3  # EWMA weight of the newest ping
+
+
+class Endpoint:
+    __slots__ = ("name", "uri", "role", "healthy", "down_until", "failures", "latency_ms", "routed", "last_error")
+
+    def __init__(self, name: str, uri: str, role: str):
+        self.name = name
+        self.uri = uri
+        self.role = role  # "primary" or "replica"
+        self.healthy = True
+        self.down_until = 0.0
+        self.failures = 0
+        self.latency_ms: Optional[float] = None
+        self.routed = 0
+        self.last_error: Optional[str] = None
+
+    def available(self, now: float) -> bool:
+        """Healthy, or its cooldown passed (the next read doubles as a retry)."""
+        return self.healthy or now >= self.down_until
+
+    def mark_down(self, error: Exception, cooldown: float):
+        self.healthy = False
+        self.failures += 1
+        self.down_until = time.monotonic() + cooldown
+        self.last_error = str(error).splitlines()[0][:200] if str(error) else type(error).__name__
+
+    def mark_up(self, latency_ms: Optional[float] = None):
+        self.healthy = True
+        self.last_error = None
+        if latency_ms is not None:
+            self.latency_ms = latency_ms if self.latency_ms is None else (
+                LATENCY_ALPHA * latency_ms + (1 - LATENCY_ALPHA) * self.latency_ms
+            )
+
+    def snapshot(self) -> Dict:
+        return {
+            "role": self.role,
+            "healthy": self.healthy,
+            "latency_ms": round(self.latency_ms, 2) if self.latency_ms is not None else None,
+            "routed": self.routed,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+def replica_uri(spec: str, primary_uri: str) -> str:
+    """Full URL as given, or the primary URL with host:port swapped for "host:port" specs."""
+    if "://" in spec:
+        return spec
+    host, _, port = spec.partition(":")
+    parts = urllib.parse.urlsplit(primary_uri)
+    credentials, _, primary_host = parts.netloc.rpartition("@")
+    # mssql URLs use "host,port"; everything else "host:port"
+    separator = "," if "," in primary_host else ":"
+    netloc = f"{credentials}@" if credentials else ""
+    netloc += f"{host}{separator}{port}" if port else host
+    return urllib.parse.urlunsplit(parts._replace(netloc=netloc))
+
+
+def pick_order(endpoints: List[Endpoint], strategy: str, in_use: Callable[[str], int]) -> List[Endpoint]:
+    """Read candidates: available replicas best-first, then the primary (and downed replicas as a last resort)."""
+    now = time.monotonic()
+    replicas = [e for e in endpoints if e.role == "replica"]
+    primary = [e for e in endpoints if e.role == "primary"]
+    up = [e for e in replicas if e.available(now)]
+    if strategy == "latency":
+        # Unmeasured endpoints rank first so they get probed; busy ones pay per open connection
+        key = lambda e: ((e.latency_ms or 0.0) * (1 + in_use(e.name)), e.routed)
+    else:
+        key = lambda e: (in_use(e.name), e.routed)  # ties rotate by reads served
+    down = [e for e in replicas if e not in up]
+    return sorted(up, key=key) + primary + down
@@ -0,0 +1,133 @@
+"""
+Join Graph - Foreign keys of every reflected schema as one undirected graph, with
+shortest join paths precomputed (BFS from each table, up to JOIN_MAX_HOPS).
+Turns "how does Sales.SalesOrderHeader reach HumanResources.Employee?" into ready-to-use
+JOIN ... ON lines instead of several get_table_schema round trips.
+
+    FROM Sales.SalesOrderHeader
+    JOIN Sales.SalesPerson ON Sales.SalesPerson.BusinessEntityID = Sales.SalesOrderHeader.SalesPersonID
+    JOIN HumanResources.Employee ON HumanResources.Employee.BusinessEntityID = Sales.SalesPerson.BusinessEntityID
+"""
+import time
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from src.db.catalog import Catalog
+
+
+class JoinEdge(NamedTuple):
+    """One FK hop: `table`.`columns` = `other`.`other_columns` (either direction of the FK)."""
+    table: str
+    columns: Tuple[str, ...]
+    other: str
+    other_columns: Tuple[str, ...]
+
+    def reversed(self) -> "JoinEdge":
+        return JoinEdge(self.other, self.other_columns, self.table, self.columns)
+
+    def condition(self) -> str:
+        return " AND ".join(
+            f"{self.other}.{oc} = {self.table}.{c}" for c, oc in zip(self.columns, self.other_columns)
+        )
+
+
+class JoinGraph:
+    """Adjacency of FK edges + per-source BFS trees (previous hop for every reachable table)."""
+
+    def __init__(self, catalog: Catalog, max_hops: int):
+        start = time.perf_counter()
+        self.max_hops = max_hops
+        self.edges: Dict[str, Dict[str, List[JoinEdge]]] = {name: {} for name in catalog.table_names()}
+        for name in catalog.table_names():
+            for fk in catalog.get(name).foreign_keys:
+                if fk.ref_table not in self.edges or fk.ref_table == name:
+                    continue  # FK into an unreflected schema, or self-reference (no join needed to reach it)
+                edge = JoinEdge(name, fk.columns, fk.ref_table, fk.ref_columns)
+                self.edges[name].setdefault(fk.ref_table, []).append(edge)
+                self.edges[fk.ref_table].setdefault(name, []).append(edge.reversed())
+        self._previous: Dict[str, Dict[str, Optional[str]]] = {name: self._bfs(name) for name in self.edges}
+        self.build_ms = 1000 * (time.perf_counter() - start)
+
+    def _bfs(self, source: str) -> Dict[str, Optional[str]]:
+        previous: Dict[str, Optional[str]] = {source: None}
+        queue = deque([(source, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            if depth >= self.max_hops:
+                continue
+            for neighbour in sorted(self.edges[node]):
+                if neighbour not in previous:
+                    previous[neighbour] = node
+                    queue.append((neighbour, depth + 1))
+        return previous
+
+    def path(self, source: str, target: str) -> Optional[List[str]]:
+        """Tables from source to target inclusive (fewest joins), None if unknown or too far apart."""
+        previous = self._previous.get(source)
+        if previous is None or target not in previous:
+            return None
+        tables = [target]
+        while tables[-1] != source:
+            tables.append(previous[tables[-1]])
+        return tables[::-1]
+
+    def hop(self, table: str, other: str) -> List[JoinEdge]:
+        """FK edges between the two, oriented so edge.table is `table` (condition() reads "other.x = table.y")."""
+        return self.edges.get(table, {}).get(other, [])
+
+    def join_plan(self, tables: Sequence[str]) -> Tuple[List[Tuple[str, List[JoinEdge]]], List[str]]:
+        """Connect `tables` greedily (nearest table first, through intermediates where needed).
+
+        Returns ([(joined_table, edges onto the tables before it)], unreachable tables).
+        """
+        wanted = [t for t in dict.fromkeys(tables) if t in self.edges]
+        if not wanted:
+            return [], []
+        joined: List[str] = [wanted[0]]
+        plan: List[Tuple[str, List[JoinEdge]]] = []
+        pending, unreachable = wanted[1:], []
+        while pending:
+            best: Optional[List[str]] = None
+            for target in pending:
+                for source in joined:
+                    path = self.path(source, target)
+                    if path is not None and (best is None or len(path) < len(best)):
+                        best = path
+            if best is None:
+                unreachable += pending
+                break
+            for before, table in zip(best, best[1:]):
+                if table not in joined:
+                    plan.append((table, self.hop(before, table)))
+                    joined.append(table)
+            pending = [t for t in pending if t not in joined]
+        return plan, unreachable
+
+    def render(self, tables: Sequence[str]) -> str:
+        """FROM/JOIN lines connecting `tables`; other FKs between the same pair are listed as alternatives."""
+        tables = list(dict.fromkeys(tables))
+        unknown = [t for t in tables if t not in self.edges]
+        plan, unreachable = self.join_plan(tables)
+        known = [t for t in tables if t in self.edges]
+        lines = [f"FROM {known[0]}"] if known else []
+        via: Set[str] = set()
+        for table, edges in plan:
+            lines.append(f"JOIN {table} ON {edges[0].condition()}")
+            lines += [f"  -- or ON {e.condition()}" for e in edges[1:]]
+            if table not in tables:
+                via.add(table)
+        if via:
+            lines.append(f"-- via {', '.join(sorted(via))}")
+        if unreachable:
+            lines.append(f"-- no FK path within {self.max_hops} joins to: {', '.join(unreachable)}")
+        if unknown:
+            lines.append(f"-- unknown tables: {', '.join(unknown)}")
+        return "\n".join(lines)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "tables": len(self.edges),
+            "edges": sum(len(edges) for neighbours in self.edges.values() for edges in neighbours.values()) // 2,
+            "paths": sum(len(previous) - 1 for previous in self._previous.values()),
+            "build_ms": round(self.build_ms, 2),
+        }
@@ -0,0 +1,198 @@
+"""
+Result Cache - LRU cache of query result pages in front of db_schema_wrapper.run.
+Keys are normalized SQL (comments, whitespace, keyword/identifier case and literal
+spelling canonicalized), bounded by entries and bytes, with per-entry TTL and
+table-level invalidation.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, List, Optional, Set
+
+from src.db.sql_stream import ResultPage
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>N?'(?:[^']|'')*')
+  | (?P<bracket>\[[^\]]*\]|"[^"]*")
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_@#][\w@#$]*)
+  | (?P<space>\s+)
+  | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_TABLE_PREFIXES = {"FROM", "JOIN", "UPDATE", "INTO", "TABLE"}
+
+
+def _tokens(sql: str) -> List[str]:
+    tokens = []
+    for match in _TOKEN_RE.finditer(sql):
+        kind, value = match.lastgroup, match.group()
+        if kind in ("comment", "space"):
+            continue
+        if kind == "string":
+            tokens.append(value[1:] if value[0] in "Nn" else value)  # N'x' and 'x' return the same rows
+        elif kind == "bracket":
+            tokens.append(value[1:-1].upper())
+        elif kind == "number":
+            try:
+                tokens.append(format(Decimal(value).normalize(), "f"))
+            except InvalidOperation:
+                tokens.append(value)
+        elif kind == "word":
+            tokens.append(value.upper())
+        else:
+            tokens.append(value)
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return tokens
+
+
+def normalize_sql(sql: str) -> str:
+    """Canonical text used as the cache key."""
+    return " ".join(_tokens(sql))
+
+
+def referenced_tables(sql: str) -> Set[str]:
+    """Upper-cased schema.table names following FROM/JOIN/UPDATE/INTO/TABLE."""
+    tokens = _tokens(sql)
+    tables = set()
+    for i, token in enumerate(tokens[:-1]):
+        if token in _TABLE_PREFIXES and tokens[i + 1] != "(":
+            name = tokens[i + 1]
+            j = i + 2
+            while j + 1 < len(tokens) and tokens[j] == ".":
+                name += "." + tokens[j + 1]
+                j += 2
+            tables.add(name)
+    return tables
+
+
+def qualify_table(name: str, default_schema: Optional[str]) -> str:
+    """Upper-cased schema.table for a referenced name: bare names get the default schema, db.schema.table drops the db."""
+    parts = [p.strip('[]"') for p in name.upper().split(".")]
+    if len(parts) == 1:
+        return f"{default_schema.upper()}.{parts[0]}" if default_schema else parts[0]
+    return ".".join(parts[-2:])
+
+
+def _page_size(page: ResultPage) -> int:
+    return 64 + sum(len(c) for c in page.columns) + sum(
+        16 + sum(len(str(v)) + 8 for v in row) for row in page.rows
+    )
+
+
+class _Entry:
+    __slots__ = ("page", "size", "expires_at", "tables")
+
+    def __init__(self, page: ResultPage, size: int, expires_at: float, tables: Set[str]):
+        self.page = page
+        self.size = size
+        self.expires_at = expires_at
+        self.tables = tables
+
+
+class ResultCache:
+    """Thread-safe LRU of complete result pages with byte/entry bounds and TTL."""
+
+    def __init__(self, max_bytes: int, max_entries: int, ttl: float,
+                 default_schema_fn: Callable[[], Optional[str]] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._default_schema_fn = default_schema_fn  # resolves unqualified names ("FROM Employee")
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_table: Dict[str, Set[str]] = defaultdict(set)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, sql: str) -> Optional[ResultPage]:
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.page
+
+    def put(self, sql: str, page: ResultPage, ttl: float = None):
+        """Cache a fully-drained page (pages with an open continuation handle are skipped)."""
+        if page.has_more:
+            return
+        size = _page_size(page)
+        if size > self.max_bytes:
+            return
+        key = normalize_sql(sql)
+        tables = self._qualified(referenced_tables(sql))
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(page, size, expires_at, tables)
+            self._bytes += size
+            for table in tables:
+                self._by_table[table].add(key)
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _qualified(self, tables) -> Set[str]:
+        default_schema = self._default_schema_fn() if self._default_schema_fn else None
+        return {qualify_table(t, default_schema) for t in tables}
+
+    def invalidate_tables(self, tables) -> int:
+        """Drop every entry that reads any of the given tables (schema.table, or bare names in the default schema)."""
+        removed = 0
+        tables = self._qualified(tables)
+        with self._lock:
+            for table in tables:
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
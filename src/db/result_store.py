@@ -0,0 +1,160 @@
+"""
+Result Store - Query results as DataFrames, addressed by a short result id.
+execute_sql / fetch_more_rows put every page here; the UI renders the frame as a native
+grid with CSV/Parquet downloads and the API serves it, while the LLM only gets a
+summary + preview (summarize) - so no output tokens are spent re-printing rows.
+"""
+import io
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Optional
+
+from src.db.sql_stream import ResultPage
+
+RESULT_ID_RE = re.compile(r"🗂️ Result ([0-9a-f]+):")
+
+
+class StoredResult:
+    __slots__ = ("id", "query", "frame", "handle", "truncated", "pages", "size", "created")
+
+    def __init__(self, result_id: str, query: str, frame, handle: Optional[str], truncated: bool):
+        self.id = result_id
+        self.query = query
+        self.frame = frame
+        self.handle = handle
+        self.truncated = truncated
+        self.pages = 1
+        self.size = _frame_size(frame)
+        self.created = time.time()
+
+    @property
+    def has_more(self) -> bool:
+        return self.handle is not None
+
+
+def unique_columns(columns) -> list:
+    """Column names made unique for the frame: a join's "Name", "Name" becomes "Name", "Name_2"."""
+    names, taken = [], set()
+    for column in columns:
+        name, n = column, 1
+        while name in taken:
+            n += 1
+            name = f"{column}_{n}"
+        names.append(name)
+        taken.add(name)
+    return names
+
+
+def _frame(page: ResultPage):
+    import pandas as pd  # deferred: pandas adds ~0.5s to cold start
+    frame = pd.DataFrame.from_records(page.rows, columns=unique_columns(page.columns)).infer_objects()
+    for column in frame.columns[frame.dtypes == object]:
+        values = frame[column].dropna()
+        if len(values) and all(isinstance(v, Decimal) for v in values):
+            frame[column] = frame[column].astype(float)  # MONEY/DECIMAL: a numeric grid column, not text
+    return frame
+
+
+def _frame_size(frame) -> int:
+    return int(frame.memory_usage(index=False, deep=True).sum())
+
+
+class ResultStore:
+    """Thread-safe LRU of result frames bounded by entries and bytes."""
+
+    def __init__(self, max_bytes: int, max_entries: int):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, StoredResult]" = OrderedDict()
+        self._by_handle: Dict[str, str] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def add(self, query: str, page: ResultPage) -> StoredResult:
+        result = StoredResult(secrets.token_hex(4), query, _frame(page), page.handle, page.truncated)
+        with self._lock:
+            self._results[result.id] = result
+            self._bytes += result.size
+            if page.handle:
+                self._by_handle[page.handle] = result.id
+            self._evict()
+        return result
+
+    def extend(self, handle: str, page: ResultPage) -> Optional[StoredResult]:
+        """Append a fetch_more page to the result its handle belongs to (None if evicted)."""
+        import pandas as pd
+        with self._lock:
+            result = self._results.get(self._by_handle.pop(handle, ""))
+            if result is None:
+                return None
+            result.frame = pd.concat([result.frame, _frame(page)], ignore_index=True)
+            self._bytes -= result.size
+            result.size = _frame_size(result.frame)
+            self._bytes += result.size
+            result.handle, result.truncated = page.handle, page.truncated
+            result.pages += 1
+            if page.handle:
+                self._by_handle[page.handle] = result.id
+            self._results.move_to_end(result.id)
+            self._evict()
+            return result
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        with self._lock:
+            result = self._results.get(result_id)
+            if result is not None:
+                self._results.move_to_end(result_id)
+            return result
+
+    def _evict(self):
+        # Keep the newest result even when it alone exceeds max_bytes - it is the one on screen
+        while len(self._results) > 1 and (self._bytes > self.max_bytes or len(self._results) > self.max_entries):
+            _, result = self._results.popitem(last=False)
+            self._bytes -= result.size
+            if result.handle:
+                self._by_handle.pop(result.handle, None)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._results), "bytes": self._bytes, "evictions": self.evictions}
+
+
+def to_csv(result: StoredResult) -> bytes:
+    return result.frame.to_csv(index=False).encode("utf-8")
+
+
+def to_parquet(result: StoredResult) -> bytes:
+    """Parquet bytes (needs pyarrow); object columns of mixed types are written as strings."""
+    frame = result.frame.copy()
+    for column in frame.columns[frame.dtypes == object]:
+        frame[column] = frame[column].map(lambda v: None if v is None else str(v))
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def summarize(result: StoredResult, page: ResultPage, preview_rows: int) -> str:
+    """What the LLM sees: shape, column types, a few rows and numeric ranges - not the rows themselves."""
+    frame = result.frame
+    if not page.columns:
+        return page.render()
+    count = f"{len(frame):,} rows" + (" so far" if result.has_more else "")
+    lines = [
+        f"🗂️ Result {result.id}: {count} x {len(frame.columns)} columns "
+        f"(the user sees every row as a table with CSV/Parquet download - do not re-list them)",
+        "Columns: " + ", ".join(f"{c} {frame[c].dtype}" for c in frame.columns),
+    ]
+    preview = page._replace(rows=page.rows[:preview_rows])
+    lines.append(preview.render())
+    if len(frame) > preview_rows:
+        numeric = frame.select_dtypes("number")
+        ranges = [f"{c} {numeric[c].min():g}..{numeric[c].max():g}" for c in numeric.columns if numeric[c].notna().any()]
+        if ranges:
+            lines.append("Ranges: " + ", ".join(ranges))
+    return "\n".join(lines)
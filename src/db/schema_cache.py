@@ -0,0 +1,203 @@
+"""
+Schema Cache - Persistent catalog / table info / sample rows cache behind db_schema_wrapper.
+Warm entries are served from memory (and from disk after a restart); the live
+catalog is only consulted once the TTL expires, via a cheap fingerprint query.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.db.catalog import Catalog
+
+logger = logging.getLogger(__name__)
+
+_FINGERPRINT_SQL = {
+    "mssql": """
+        SELECT s.name, CONVERT(varchar(33), MAX(o.modify_date), 126), COUNT(*)
+        FROM sys.objects o
+        JOIN sys.schemas s ON s.schema_id = o.schema_id
+        WHERE o.type IN ('U', 'V') AND s.name IN ({schemas})
+        GROUP BY s.name
+        ORDER BY s.name
+    """,
+}
+
+def catalog_fingerprint(engine, schemas: List[str]) -> Optional[str]:
+    """Hash of max modify_date / object count per schema (None if dialect unsupported)."""
+    sql = _FINGERPRINT_SQL.get(engine.dialect.name)
+    if sql is None:
+        return None
+    from sqlalchemy import text
+    quoted = ", ".join("'" + s.replace("'", "''") + "'" for s in schemas)
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql.format(schemas=quoted))).fetchall()
+    return hashlib.sha1(repr([tuple(r) for r in rows]).encode()).hexdigest()
+
+
+class SchemaCache:
+    """Catalog + per-table info + sample rows, persisted as JSON and invalidated by TTL/fingerprint.
+
+    Per-table updates only mark the cache dirty; one write `flush_delay` seconds later covers every
+    table fetched meanwhile (parallel prefetch), instead of one full rewrite per table.
+    """
+
+    def __init__(self, path: str, ttl: float, fingerprint_fn: Callable[[], Optional[str]] = None,
+                 flush_delay: float = 2.0):
+        self.path = path
+        self.ttl = ttl
+        self.flush_delay = flush_delay
+        self._fingerprint_fn = fingerprint_fn
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()  # file writes happen outside _lock
+        self._dirty = False
+        self._version = self._written = 0
+        self._timer: Optional[threading.Timer] = None
+        self.writes = 0
+        self._loaded = False
+        self._data = self._empty()
+        self._catalog: Optional[Catalog] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {"fingerprint": None, "validated_at": 0.0, "catalog": None, "table_info": {}, "samples": {}}
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._data = {**self._empty(), **data}
+            logger.info(f"📦 Schema cache loaded from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable schema cache {self.path}: {e}")
+
+    def _save(self):
+        """Schedule a write: flush() runs once after flush_delay, however many updates arrive meanwhile."""
+        self._dirty = True
+        if self.flush_delay <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+            atexit.register(self.flush)  # unregistered by flush(); covers exit before the timer fires
+
+    def flush(self):
+        """Write pending changes now (serialized under the lock, written outside it)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+                atexit.unregister(self.flush)
+            if not self._dirty:
+                return
+            payload = json.dumps(self._data)
+            self._dirty = False
+            self._version += 1
+            version = self._version
+        with self._write_lock:
+            if version < self._written:
+                return  # a newer snapshot was written meanwhile
+            self._written = version
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, self.path)
+            self.writes += 1
+
+    def _ensure_fresh(self):
+        """Re-validate against the catalog fingerprint once the TTL has elapsed."""
+        self._load()
+        now = time.time()
+        if now - self._data["validated_at"] < self.ttl:
+            return
+        fingerprint = None
+        if self._fingerprint_fn is not None:
+            try:
+                fingerprint = self._fingerprint_fn()
+            except Exception as e:
+                logger.warning(f"⚠️ Schema fingerprint failed, dropping cache: {e}")
+        if fingerprint is None or fingerprint != self._data["fingerprint"]:
+            if self._data["catalog"] is not None or self._data["table_info"]:
+                logger.info("♻️ Schema changed or TTL expired - invalidating schema cache")
+            self._data = self._empty()
+            self._catalog = None
+        self._data["fingerprint"] = fingerprint
+        self._data["validated_at"] = now
+        self._save()
+
+    def get_catalog(self) -> Optional[Catalog]:
+        with self._lock:
+            self._ensure_fresh()
+            if self._catalog is None and self._data["catalog"] is not None:
+                self._catalog = Catalog.from_dict(self._data["catalog"])
+            if self._catalog is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return self._catalog
+
+    def set_catalog(self, catalog: Catalog):
+        with self._lock:
+            self._catalog = catalog
+            self._data["catalog"] = catalog.to_dict()
+            self._save()
+
+    def get_table_info(self, table: str) -> Optional[str]:
+        with self._lock:
+            self._ensure_fresh()
+            info = self._data["table_info"].get(table)
+            if info is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return info
+
+    def set_table_info(self, infos: Dict[str, str]):
+        with self._lock:
+            self._data["table_info"].update(infos)
+            self._save()
+
+    def get_samples(self, table: str) -> Optional[Dict]:
+        """{"columns": [...], "rows": [[...], ...]} for table, or None if never sampled."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._data["samples"].get(table)
+
+    def set_samples(self, table: str, sample: Dict):
+        with self._lock:
+            self._data["samples"][table] = sample
+            self._save()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = True
+            self._data = self._empty()
+            self._catalog = None
+            self._save()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "tables": len((self._data["catalog"] or {}).get("tables", [])),
+                "table_info": len(self._data["table_info"]),
+                "samples": len(self._data["samples"]),
+                "age_seconds": round(time.time() - self._data["validated_at"], 1),
+                "writes": self.writes,
+            }
@@ -0,0 +1,102 @@
+"""
+Schema Prefetch - Parallel, de-duplicated warming of per-table schema work.
+The agent loop is a chain of sequential tool calls; while the LLM is still thinking,
+the tables it is likely to ask about (index shortlist + FK neighbours) are fetched on a
+small thread pool into the schema cache. A later get_table_schema joins an in-flight
+fetch instead of repeating it, and fans out across tables itself via map().
+"""
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+from src.db.catalog import Catalog
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def fk_neighbours(catalog: Catalog, names: Iterable[str]) -> List[str]:
+    """Tables referenced by, or referencing, any of `names` (excluding `names` themselves)."""
+    wanted = set(names)
+    neighbours: Dict[str, None] = {}
+    for name in wanted:
+        table = catalog.get(name)
+        for fk in table.foreign_keys if table else ():
+            neighbours[fk.ref_table] = None
+    for name in catalog.table_names():
+        if any(fk.ref_table in wanted for fk in catalog.get(name).foreign_keys):
+            neighbours[name] = None
+    return [n for n in neighbours if n not in wanted and n in catalog]
+
+
+class SchemaPrefetcher:
+    """Runs warm_fn(table) at most once per table at a time on a bounded pool."""
+
+    def __init__(self, warm_fn: Callable[[str], None], workers: int):
+        self.warm_fn = warm_fn
+        self.workers = max(1, workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool_lock = threading.Lock()  # separate: ensure() submits while holding _lock
+        self.submitted = 0
+        self.joined = 0  # requests that found the table already being fetched
+        self.failed = 0
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nldbq-schema")
+        return self._pool
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        # Spans opened by the task land in the caller's trace
+        return self._executor().submit(contextvars.copy_context().run, fn, *args)
+
+    def ensure(self, names: Iterable[str]) -> List[Future]:
+        """Start warming each table unless it is already in flight; returns the futures to wait on."""
+        futures = []
+        with self._lock:
+            for name in dict.fromkeys(names):
+                future = self._inflight.get(name)
+                if future is not None:
+                    self.joined += 1
+                else:
+                    future = self._submit(self._run, name)
+                    self._inflight[name] = future
+                    self.submitted += 1
+                futures.append(future)
+        return futures
+
+    def _run(self, name: str):
+        try:
+            self.warm_fn(name)
+        except Exception as e:
+            self.failed += 1
+            logger.debug(f"Schema prefetch skipped {name}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.pop(name, None)
+
+    def spawn(self, fn: Callable, *args) -> Future:
+        """Fire-and-forget background task on the prefetch pool (e.g. a shortlist search)."""
+        return self._submit(fn, *args)
+
+    def wait(self, names: Iterable[str], timeout: Optional[float] = None):
+        wait(self.ensure(names), timeout=timeout)
+
+    def map(self, fn: Callable[[T], R], items: List[T]) -> List[R]:
+        """fn over items concurrently (order kept); a single item runs inline."""
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        return [f.result() for f in [self._submit(fn, item) for item in items]]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            inflight = len(self._inflight)
+        return {"submitted": self.submitted, "joined": self.joined, "failed": self.failed, "inflight": inflight}
@@ -0,0 +1,155 @@
+"""
+Schema Render - Token-budgeted, compact table descriptions for the LLM.
+One line per table in a terse column/type/PK/FK notation instead of CREATE TABLE DDL;
+when the budget is tight, sample rows go first, then the columns least related
+to the question (keys are always kept), then whole tables.
+
+    Sales.SalesOrderHeader: SalesOrderID int PK, CustomerID int FK>Sales.Customer, TotalDue dec, ...
+      e.g. (43659, 29825, 23153.2339)
+"""
+import re
+from typing import Dict, List, Optional, Sequence
+
+from src.utils.text import tokenize
+from src.db.catalog import Column, Table
+
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+# Terse type names; the LLM only needs the family to write correct predicates
+_TYPE_FAMILIES = {
+    "int": ("INT", "INTEGER", "SMALLINT", "TINYINT", "BIGINT", "SERIAL"),
+    "dec": ("DECIMAL", "NUMERIC", "MONEY", "SMALLMONEY"),
+    "float": ("FLOAT", "REAL", "DOUBLE"),
+    "str": ("VARCHAR", "NVARCHAR", "CHAR", "NCHAR", "TEXT", "NTEXT", "CHARACTER", "STRING", "CLOB"),
+    "datetime": ("DATETIME", "DATETIME2", "SMALLDATETIME", "TIMESTAMP", "DATETIMEOFFSET"),
+    "date": ("DATE",),
+    "time": ("TIME",),
+    "bool": ("BIT", "BOOLEAN", "BOOL"),
+    "uuid": ("UNIQUEIDENTIFIER", "UUID"),
+    "bin": ("VARBINARY", "BINARY", "IMAGE", "BLOB", "BYTEA"),
+}
+_TYPE_LOOKUP = {name: family for family, names in _TYPE_FAMILIES.items() for name in names}
+
+# Non-key columns per table tried in turn (after dropping samples) until the rendering fits the budget
+_COLUMN_STEPS = (24, 16, 12, 8, 5, 3, 1)
+SAMPLE_VALUE_CHARS = 24
+
+
+def approx_tokens(text: str) -> int:
+    """~4 characters per token: close enough for budgeting across providers."""
+    return (len(text) + 3) // 4
+
+
+def short_type(sql_type: str) -> str:
+    base = sql_type.split("(")[0].strip().upper()
+    return _TYPE_LOOKUP.get(base, base.lower())
+
+
+def column_words(name: str) -> List[str]:
+    return tokenize(_CAMEL_RE.sub(" ", name))
+
+
+class TableView:
+    """A table as it will be rendered: the kept columns plus (optionally) sample rows."""
+
+    def __init__(self, table: Table, question_words: Sequence[str], sample: Optional[Dict] = None):
+        self.table = table
+        self.sample = sample
+        self.with_samples = sample is not None
+        # FK>schema.table when the referenced column has the same name, else FK>schema.table.column
+        self._fk = {
+            col: fk.ref_table if ref == col else f"{fk.ref_table}.{ref}"
+            for fk in table.foreign_keys for col, ref in zip(fk.columns, fk.ref_columns)
+        }
+        self.keys = set(table.primary_key) | set(self._fk)
+        words = set(question_words)
+        # Non-key columns by overlap with the question, ties in table order; keys are always kept
+        ranked = sorted(
+            ((i, c) for i, c in enumerate(table.columns) if c.name not in self.keys),
+            key=lambda ic: (-_relevance(ic[1], words), ic[0]),
+        )
+        self.ranked = [c.name for _, c in ranked]
+        self.limit = len(self.ranked)  # non-key columns to keep
+
+    def kept(self) -> List[Column]:
+        keep = self.keys | set(self.ranked[:self.limit])
+        return [c for c in self.table.columns if c.name in keep]
+
+    def render(self) -> str:
+        columns = self.kept()
+        parts = []
+        for c in columns:
+            part = f"{c.name} {short_type(c.type)}"
+            if c.name in self.table.primary_key:
+                part += " PK"
+            if c.name in self._fk:
+                part += f" FK>{self._fk[c.name]}"
+            if c.nullable and c.name not in self.keys:
+                part += "?"
+            parts.append(part)
+        hidden = len(self.table.columns) - len(columns)
+        line = f"{self.table.full_name}: {', '.join(parts)}"
+        if hidden:
+            line += f", ... (+{hidden} more columns)"
+        if self.with_samples and self.sample and self.sample.get("rows"):
+            index = [self.sample["columns"].index(c.name) for c in columns if c.name in self.sample["columns"]]
+            for row in self.sample["rows"]:
+                values = ", ".join(_short_value(row[i]) for i in index)
+                line += f"\n  e.g. ({values})"
+        return line
+
+
+def _relevance(column: Column, question_words: set) -> float:
+    if not question_words:
+        return 0.0
+    score = 0.0
+    for word in column_words(column.name):
+        if word in question_words:
+            score += 1.0
+        elif len(word) >= 4 and any(q.startswith(word) or word.startswith(q) for q in question_words if len(q) >= 4):
+            score += 0.5
+    return score
+
+
+def _short_value(value) -> str:
+    text = "NULL" if value is None else str(value)
+    return text if len(text) <= SAMPLE_VALUE_CHARS else text[:SAMPLE_VALUE_CHARS - 1] + "…"
+
+
+def render_tables(
+    tables: Sequence[Table],
+    question: str = "",
+    budget: int = 0,
+    samples: Optional[Dict[str, Dict]] = None,
+) -> Dict[str, str]:
+    """full_name -> compact rendering, shrunk (samples, columns, tables) until it fits `budget` tokens.
+
+    samples maps full_name -> {"columns": [...], "rows": [[...], ...]}; budget 0 = unlimited.
+    """
+    words = tokenize(question) if question else []
+    views = [TableView(t, words, (samples or {}).get(t.full_name)) for t in tables]
+
+    def total() -> int:
+        return sum(approx_tokens(v.render()) for v in views)
+
+    if budget > 0 and total() > budget:
+        for view in reversed(views):  # least relevant tables (listed last) lose samples first
+            view.with_samples = False
+            if total() <= budget:
+                break
+        for limit in _COLUMN_STEPS:
+            if total() <= budget:
+                break
+            for view in views:
+                view.limit = min(view.limit, limit)
+
+    rendered, used = {}, 0
+    for view in views:
+        text = view.render()
+        cost = approx_tokens(text)
+        if budget > 0 and rendered and used + cost > budget:
+            rendered[view.table.full_name] = f"{view.table.full_name}: (omitted - token budget; ask for it alone)"
+            continue
+        rendered[view.table.full_name] = text
+        used += cost
+    return rendered
@@ -0,0 +1,181 @@
+"""
+SQL Stream - Paged execute_sql over server-side cursors.
+Rows are fetched from the driver in batches and capped per page (rows + bytes) and
+per query; a still-open cursor is parked behind a continuation handle that the
+agent (fetch_more_rows tool) or the UI can page through.
+"""
+import logging
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+MAX_VALUE_CHARS = 300  # same per-value truncation SQLDatabase.run applied
+CONTINUATION_RE = re.compile(r'fetch_more_rows\("([0-9a-f]+)"\)')
+
+
+class ResultPage(NamedTuple):
+    columns: Tuple[str, ...]
+    rows: List[tuple]
+    offset: int  # zero-based index of the first row in this page
+    handle: Optional[str]  # continuation handle; None once exhausted or capped
+    truncated: bool  # stopped at SQL_MAX_ROWS with rows left on the server
+
+    @property
+    def has_more(self) -> bool:
+        return self.handle is not None
+
+    def render(self) -> str:
+        """Compact pipe-separated text for the LLM context and the chat."""
+        if not self.columns:
+            return "Statement executed (no rows returned)."
+        lines = [" | ".join(self.columns)]
+        lines.extend(" | ".join(_cell(v) for v in row) for row in self.rows)
+        if not self.rows:
+            lines.append("(no rows)")
+        else:
+            lines.append(f"Rows {self.offset + 1}-{self.offset + len(self.rows)} shown.")
+        if self.has_more:
+            lines.append(f'⏬ More rows available: fetch_more_rows("{self.handle}")')
+        elif self.truncated:
+            lines.append("⚠️ Row cap reached - refine the query (filters/TOP) to see other rows.")
+        return "\n".join(lines)
+
+
+def _cell(value) -> str:
+    value = "NULL" if value is None else str(value)
+    return value if len(value) <= MAX_VALUE_CHARS else value[:MAX_VALUE_CHARS] + "..."
+
+
+class _OpenCursor:
+    __slots__ = ("conn", "result", "columns", "pending", "fetched", "last_used")
+
+    def __init__(self, conn, result, columns):
+        self.conn = conn
+        self.result = result
+        self.columns = columns
+        self.pending = deque()  # rows fetched from the driver but not yet paged out
+        self.fetched = 0  # rows handed out so far
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.result.close()
+        finally:
+            self.conn.close()
+
+
+class SQLStreamer:
+    """Executes queries on a streaming connection and pages results with hard caps."""
+
+    def __init__(self, page_rows: int, page_max_bytes: int, max_rows: int,
+                 fetch_batch: int, max_open: int, idle_ttl: float):
+        self.page_rows = page_rows
+        self.page_max_bytes = page_max_bytes
+        self.max_rows = max_rows
+        self.fetch_batch = fetch_batch
+        self.max_open = max_open
+        self.idle_ttl = idle_ttl
+        self._cursors: "OrderedDict[str, _OpenCursor]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def execute(self, engine, query: str) -> ResultPage:
+        """Run query with a server-side cursor and return its first page."""
+        self._evict()
+        return self.execute_on(engine.connect(), query)
+
+    def execute_on(self, conn, query: str) -> ResultPage:
+        """execute() on an already checked-out connection (e.g. a routed replica); takes ownership of it."""
+        self._evict()
+        conn = conn.execution_options(stream_results=True, max_row_buffer=self.fetch_batch)
+        try:
+            result = conn.execute(text(query))
+            if not result.returns_rows:
+                conn.commit()
+                conn.close()
+                return ResultPage((), [], 0, None, False)
+            cursor = _OpenCursor(conn, result, tuple(result.keys()))
+            return self._next_page(cursor, secrets.token_hex(6))
+        except Exception:
+            conn.close()
+            raise
+
+    def fetch_more(self, handle: str) -> ResultPage:
+        """Next page for a continuation handle returned by execute/fetch_more."""
+        self._evict()
+        with self._lock:
+            cursor = self._cursors.pop(handle, None)
+        if cursor is None:
+            raise KeyError(f"Unknown or expired result handle '{handle}' - re-run the query")
+        return self._next_page(cursor, handle)
+
+    def close(self, handle: str):
+        with self._lock:
+            cursor = self._cursors.pop(handle, None)
+        if cursor is not None:
+            cursor.close()
+
+    def close_all(self):
+        with self._lock:
+            cursors = list(self._cursors.values())
+            self._cursors.clear()
+        for cursor in cursors:
+            cursor.close()
+
+    def open_handles(self) -> List[str]:
+        with self._lock:
+            return list(self._cursors)
+
+    def _fill(self, cursor: _OpenCursor) -> bool:
+        """Top up the pending buffer with one driver batch; False once the cursor is drained."""
+        if not cursor.pending:
+            cursor.pending = deque(cursor.result.fetchmany(self.fetch_batch))
+        return bool(cursor.pending)
+
+    def _next_page(self, cursor: _OpenCursor, handle: str) -> ResultPage:
+        offset = cursor.fetched
+        rows, size = [], 0
+        try:
+            while len(rows) < self.page_rows and cursor.fetched < self.max_rows and self._fill(cursor):
+                row = tuple(cursor.pending[0])
+                row_size = sum(len(_cell(v)) + 3 for v in row)
+                if rows and size + row_size > self.page_max_bytes:
+                    break
+                cursor.pending.popleft()
+                rows.append(row)
+                size += row_size
+                cursor.fetched += 1
+            has_rows_left = self._fill(cursor)
+        except Exception:
+            cursor.close()
+            raise
+
+        capped = cursor.fetched >= self.max_rows
+        if not has_rows_left or capped:
+            cursor.close()
+            return ResultPage(cursor.columns, rows, offset, None, capped and has_rows_left)
+
+        cursor.last_used = time.monotonic()
+        with self._lock:
+            self._cursors[handle] = cursor
+        return ResultPage(cursor.columns, rows, offset, handle, False)
+
+    def _evict(self):
+        """Close idle cursors and the oldest ones beyond max_open (each pins a pooled connection)."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for handle, cursor in list(self._cursors.items()):
+                if now - cursor.last_used > self.idle_ttl:
+                    expired.append(self._cursors.pop(handle))
+            while len(self._cursors) >= self.max_open:
+                expired.append(self._cursors.popitem(last=False)[1])
+        for cursor in expired:
+            logger.debug("Closing idle result cursor")
+            cursor.close()
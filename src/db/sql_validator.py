@@ -0,0 +1,188 @@
+"""
+SQL Validator - Offline checks for validate_sql before anything reaches the database.
+Parses the SQL for the target dialect, enforces a single read-only statement,
+resolves table/column names against the cached catalog and, optionally, asks the
+database for an estimated plan to reject queries that are too expensive.
+"""
+import difflib
+import json
+import re
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+from src.db.catalog import Catalog
+
+# SQLAlchemy dialect name -> sqlglot dialect
+DIALECTS = {"mssql": "tsql", "postgresql": "postgres", "mysql": "mysql", "sqlite": "sqlite"}
+
+_WRITE_NODES = (
+    exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Create, exp.Drop,
+    exp.Alter, exp.TruncateTable, exp.Command, exp.Into,
+)
+
+
+class ValidationResult(NamedTuple):
+    ok: bool
+    errors: List[str]
+    warnings: List[str]
+    estimated_rows: Optional[float] = None
+    estimated_cost: Optional[float] = None
+
+    def render(self) -> str:
+        lines = ["✅ **SQL is valid**" if self.ok else "❌ **SQL is invalid**"]
+        lines += [f"- {e}" for e in self.errors]
+        lines += [f"- ⚠️ {w}" for w in self.warnings]
+        if self.estimated_rows is not None:
+            lines.append(f"- Estimated rows: {self.estimated_rows:,.0f}")
+        if self.estimated_cost is not None:
+            lines.append(f"- Estimated cost: {self.estimated_cost:,.2f}")
+        return "\n".join(lines)
+
+
+def _parse(sql: str, dialect: str) -> Tuple[Optional[exp.Expression], List[str]]:
+    try:
+        statements = [s for s in sqlglot.parse(sql, read=dialect) if s is not None]
+    except ParseError as e:
+        return None, [f"Syntax error: {e.errors[0]['description'] if e.errors else e}"]
+    if len(statements) != 1:
+        return None, [f"Expected exactly one statement, found {len(statements)}"]
+    return statements[0], []
+
+
+def check_read_only(sql: str, dialect: str = "tsql") -> List[str]:
+    """Errors if sql is not a single SELECT (no DML/DDL, no SELECT INTO)."""
+    tree, errors = _parse(sql, dialect)
+    if tree is None:
+        return errors
+    if not isinstance(tree, exp.Query):
+        return [f"Only SELECT queries are allowed (got {tree.key.upper()})"]
+    for node in tree.walk():
+        if isinstance(node, _WRITE_NODES):
+            return [f"Only read-only queries are allowed (found {node.key.upper()})"]
+    return []
+
+
+def _resolve_tables(tree: exp.Expression, catalog: Catalog, errors: List[str]) -> Tuple[Dict[str, object], Set[str]]:
+    """Map every alias/name in scope to a catalog Table; unknown derived sources are returned separately."""
+    by_lower = {name.lower(): name for name in catalog.tables}
+    cte_names = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    derived = {sq.alias_or_name.lower() for sq in tree.find_all(exp.Subquery) if sq.alias_or_name}
+    derived |= cte_names
+    sources: Dict[str, object] = {}
+
+    for table in tree.find_all(exp.Table):
+        name = table.name
+        if not name or name.lower() in cte_names:
+            continue
+        if not table.db:
+            errors.append(f"Table '{name}' must be fully qualified as schema.table")
+            continue
+        full = f"{table.db}.{name}"
+        match = by_lower.get(full.lower())
+        if match is None:
+            hint = difflib.get_close_matches(full, list(catalog.tables), n=3, cutoff=0.6)
+            errors.append(f"Unknown table '{full}'" + (f" - did you mean {', '.join(hint)}?" if hint else ""))
+            continue
+        resolved = catalog.get(match)
+        sources[table.alias_or_name.lower()] = resolved
+        sources[name.lower()] = resolved
+        sources[full.lower()] = resolved
+    return sources, derived
+
+
+def _check_columns(tree: exp.Expression, sources: Dict[str, object], derived: Set[str], errors: List[str]):
+    tables = {id(t): t for t in sources.values()}.values()
+    output_aliases = {a.alias.lower() for a in tree.find_all(exp.Alias)}
+    checked = set()
+    for col in tree.find_all(exp.Column):
+        name = col.name
+        if not name or name == "*":
+            continue
+        qualifier = col.table.lower() if col.table else ""
+        key = (qualifier, name.lower())
+        if key in checked:
+            continue
+        checked.add(key)
+        if qualifier:
+            if qualifier in derived:
+                continue
+            table = sources.get(qualifier)
+            if table is None:
+                errors.append(f"Unknown table alias '{col.table}' for column '{name}'")
+            elif name.lower() not in {c.name.lower() for c in table.columns}:
+                hint = difflib.get_close_matches(name, [c.name for c in table.columns], n=3, cutoff=0.6)
+                errors.append(
+                    f"Unknown column '{name}' in {table.full_name}"
+                    + (f" - did you mean {', '.join(hint)}?" if hint else "")
+                )
+        elif not derived and name.lower() not in output_aliases:
+            if not any(name.lower() in {c.name.lower() for c in t.columns} for t in tables):
+                errors.append(f"Unknown column '{name}' in {', '.join(t.full_name for t in tables) or 'query'}")
+
+
+def validate(sql: str, catalog: Catalog, dialect: str = "tsql") -> ValidationResult:
+    """Static validation only: syntax, read-only, table and column resolution."""
+    tree, errors = _parse(sql, dialect)
+    if tree is None:
+        return ValidationResult(False, errors, [])
+    errors = check_read_only(sql, dialect)
+    if errors:
+        return ValidationResult(False, errors, [])
+
+    warnings = []
+    sources, derived = _resolve_tables(tree, catalog, errors)
+    _check_columns(tree, sources, derived, errors)
+    if isinstance(tree, exp.Select) and not tree.args.get("limit") and not tree.args.get("group"):
+        if not any(isinstance(n, exp.AggFunc) for n in tree.expressions):
+            warnings.append("No TOP/LIMIT - the result will be capped by execute_sql")
+    return ValidationResult(not errors, errors, warnings)
+
+
+def _explain_mssql(conn, sql: str) -> Tuple[Optional[float], Optional[float]]:
+    conn.exec_driver_sql("SET SHOWPLAN_XML ON")
+    try:
+        plan = conn.exec_driver_sql(sql).scalar() or ""
+    finally:
+        conn.exec_driver_sql("SET SHOWPLAN_XML OFF")
+    rows = re.search(r'StatementEstRows="([\d.eE+-]+)"', plan)
+    cost = re.search(r'StatementSubTreeCost="([\d.eE+-]+)"', plan)
+    return (float(rows.group(1)) if rows else None, float(cost.group(1)) if cost else None)
+
+
+def _explain_postgresql(conn, sql: str) -> Tuple[Optional[float], Optional[float]]:
+    from sqlalchemy import text
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    root = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+    return float(root["Plan Rows"]), float(root["Total Cost"])
+
+
+def _explain_mysql(conn, sql: str) -> Tuple[Optional[float], Optional[float]]:
+    from sqlalchemy import text
+    plan = json.loads(conn.execute(text(f"EXPLAIN FORMAT=JSON {sql}")).scalar())
+    cost = plan.get("query_block", {}).get("cost_info", {}).get("query_cost")
+    return None, float(cost) if cost is not None else None
+
+
+_EXPLAINERS = {"mssql": _explain_mssql, "postgresql": _explain_postgresql, "mysql": _explain_mysql}
+
+
+def estimate(engine, sql: str) -> Tuple[Optional[float], Optional[float]]:
+    """(estimated rows, estimated cost) from the optimizer; (None, None) if unsupported."""
+    explainer = _EXPLAINERS.get(engine.dialect.name)
+    if explainer is None:
+        return None, None
+    with engine.connect() as conn:
+        return explainer(conn, sql)
+
+
+def apply_cost_guard(result: ValidationResult, rows: Optional[float], cost: Optional[float],
+                     max_rows: float, max_cost: float) -> ValidationResult:
+    errors = list(result.errors)
+    if max_rows and rows is not None and rows > max_rows:
+        errors.append(f"Estimated {rows:,.0f} rows exceeds the limit of {max_rows:,.0f} - add filters or TOP")
+    if max_cost and cost is not None and cost > max_cost:
+        errors.append(f"Estimated cost {cost:,.2f} exceeds the limit of {max_cost:,.2f} - simplify the query")
+    return ValidationResult(not errors, errors, result.warnings, rows, cost)
@@ -0,0 +1,342 @@
+"""
+Value Index - Distinct values of low-cardinality text columns, for resolving literals.
+"employees in Sales" needs to know that 'Sales' lives in HumanResources.Department.Name;
+instead of guessing or running SELECT DISTINCT probes, the agent looks the phrase up here.
+
+Built in the background from the catalog (text columns only, at most max_distinct values
+each), refreshed per table when its definition changes or its entry ages past the TTL,
+kept under an approximate byte budget (highest-cardinality columns go first) and persisted
+as JSON. Lookups are exact, prefix (whole value or any word) and trigram-filtered fuzzy.
+"""
+import bisect
+import difflib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from src.db.catalog import Catalog, Column, Table
+from src.db.schema_render import short_type
+
+logger = logging.getLogger(__name__)
+
+# Columns that are text but never useful filter literals (or should not be copied around)
+_SKIP_COLUMN_RE = re.compile(r"(e-?mail|phone|password|hash|salt|guid|url|comment|note|description|xml|json)", re.I)
+_LENGTH_RE = re.compile(r"\((\d+)\)")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+VALUE_OVERHEAD_BYTES = 160  # rough per-value cost of the key, postings and triple in CPython
+
+ColumnKey = Tuple[str, str]  # (schema.table, column)
+
+
+class ValueMatch(NamedTuple):
+    table: str
+    column: str
+    value: str
+    score: float
+    kind: str  # exact | prefix | fuzzy
+
+
+def candidate_columns(table: Table, max_chars: int) -> List[Column]:
+    """Short text columns: declared length <= max_chars (unknown length is allowed), not free text."""
+    columns = []
+    for column in table.columns:
+        if short_type(column.type) != "str" or _SKIP_COLUMN_RE.search(column.name):
+            continue
+        length = _LENGTH_RE.search(column.type)
+        if "MAX" in column.type.upper() or (length and int(length.group(1)) > max_chars):
+            continue
+        columns.append(column)
+    return columns
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).strip().strip("'\"").lower().split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ValueIndex:
+    """Thread-safe value -> (table, column) index with per-table refresh state."""
+
+    def __init__(self, path: Optional[str], max_bytes: int, max_distinct: int, max_chars: int = 100):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_distinct = max_distinct
+        self.max_chars = max_chars
+        self._columns: Dict[ColumnKey, List[str]] = {}
+        self._tables: Dict[str, Dict] = {}  # schema.table -> {"fingerprint", "updated", "skipped": {column: reason}}
+        self._keys: Dict[str, List[Tuple[str, str, str]]] = {}  # normalized value -> [(table, column, value)]
+        self._words: Dict[str, Set[str]] = {}  # word -> normalized values containing it
+        self._grams: Dict[str, Set[str]] = {}  # trigram -> normalized values
+        self._sorted_words: Optional[List[str]] = None
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.bytes = 0
+        self.state = "empty"  # empty | building | ready
+        self.progress = (0, 0)
+        self.lookups = 0
+        self.evicted = 0
+        self._load()
+
+    # --- index maintenance ---
+    def _add_key(self, table: str, column: str, value: str):
+        key = _normalize(value)
+        if not key:
+            return
+        entries = self._keys.setdefault(key, [])
+        if not entries:
+            for word in _WORD_RE.findall(key):
+                self._words.setdefault(word, set()).add(key)
+            for gram in _trigrams(key):
+                self._grams.setdefault(gram, set()).add(key)
+            self._sorted_words = None
+        entries.append((table, column, value))
+        self.bytes += len(value) + VALUE_OVERHEAD_BYTES
+
+    def _remove_key(self, table: str, column: str, value: str):
+        key = _normalize(value)
+        entries = self._keys.get(key)
+        if not entries:
+            return
+        kept = [e for e in entries if not (e[0] == table and e[1] == column)]
+        # Values that normalize alike share a key, so one column may hold several of its entries
+        self.bytes -= sum(len(e[2]) + VALUE_OVERHEAD_BYTES for e in entries if e[0] == table and e[1] == column)
+        entries[:] = kept
+        if entries:
+            return
+        del self._keys[key]
+        for word in _WORD_RE.findall(key):
+            self._discard(self._words, word, key)
+        for gram in _trigrams(key):
+            self._discard(self._grams, gram, key)
+        self._sorted_words = None
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[str]], token: str, key: str):
+        keys = postings.get(token)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del postings[token]
+
+    def set_column(self, table: str, column: str, values: List[str]):
+        with self._lock:
+            self.drop_column(table, column)
+            self._columns[(table, column)] = values
+            for value in values:
+                self._add_key(table, column, value)
+            self._enforce_budget()
+
+    def drop_column(self, table: str, column: str):
+        with self._lock:
+            for value in self._columns.pop((table, column), []):
+                self._remove_key(table, column, value)
+
+    def drop_table(self, table: str):
+        with self._lock:
+            for key in [k for k in self._columns if k[0] == table]:
+                self.drop_column(*key)
+            self._tables.pop(table, None)
+
+    def _enforce_budget(self):
+        """Evict the highest-cardinality columns until the estimate fits max_bytes."""
+        while self.max_bytes > 0 and self.bytes > self.max_bytes and self._columns:
+            table, column = max(self._columns, key=lambda k: len(self._columns[k]))
+            self.drop_column(table, column)
+            self._tables.setdefault(table, {"fingerprint": None, "updated": 0, "skipped": {}})["skipped"][column] = "memory"
+            self.evicted += 1
+
+    # --- refresh ---
+    def refresh(self, catalog: Catalog, fetch_distinct: Callable[[Table, str, int], Optional[List[str]]],
+                ttl: float, force: bool = False) -> Dict[str, int]:
+        """Re-read tables that are new, changed or older than `ttl`; drop tables no longer in the catalog."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return {"skipped": 1}  # another refresh is running
+        try:
+            now = time.time()
+            names = catalog.table_names()
+            stale = [
+                name for name in names
+                if force or name not in self._tables
+                or self._tables[name]["fingerprint"] != catalog.get(name).fingerprint()
+                or now - self._tables[name]["updated"] > ttl
+            ]
+            if self.state != "ready":
+                self.state = "building"
+            self.progress = (len(names) - len(stale), len(names))
+            report = {"tables": len(stale), "columns": 0, "skipped": 0, "removed": 0}
+            for i, name in enumerate(stale, 1):
+                table = catalog.get(name)
+                fingerprint = table.fingerprint()
+                previous = self._tables.get(name, {})
+                # Columns evicted for memory stay out until the table definition changes
+                skipped = {c: r for c, r in previous.get("skipped", {}).items()
+                           if r == "memory" and previous.get("fingerprint") == fingerprint}
+                columns = candidate_columns(table, self.max_chars)
+                for column in columns:
+                    if column.name in skipped:
+                        continue
+                    values = fetch_distinct(table, column.name, self.max_distinct + 1)
+                    if values is None or len(values) > self.max_distinct:
+                        self.drop_column(name, column.name)
+                        skipped[column.name] = "error" if values is None else "cardinality"
+                        report["skipped"] += 1
+                        continue
+                    self.set_column(name, column.name, values)
+                    report["columns"] += 1
+                with self._lock:
+                    # Keep what the byte budget evicted meanwhile (set_column may evict this table's own columns)
+                    evicted = self._tables.get(name, {}).get("skipped", {})
+                    skipped.update({c.name: "memory" for c in columns if evicted.get(c.name) == "memory"
+                                    and (name, c.name) not in self._columns})
+                    self._tables[name] = {"fingerprint": fingerprint, "updated": time.time(), "skipped": skipped}
+                self.progress = (len(names) - len(stale) + i, len(names))
+            for name in [n for n in self._tables if n not in catalog]:
+                self.drop_table(name)
+                report["removed"] += 1
+            self.state = "ready"
+            if stale or report["removed"]:
+                self._save()
+                logger.info(f"🔤 Value index refresh: {report['tables']} tables, {report['columns']} columns "
+                            f"indexed, {report['skipped']} skipped, {report['removed']} removed")
+            return report
+        finally:
+            self._refresh_lock.release()
+
+    def start_background_refresh(self, refresh_fn: Callable[[], Dict], interval: float) -> threading.Thread:
+        """Daemon thread: refresh now, then every `interval` seconds (started once)."""
+        if self._thread is not None:
+            return self._thread
+
+        def _loop():
+            while True:
+                try:
+                    refresh_fn()
+                except Exception as e:
+                    logger.warning(f"⚠️ Background value index refresh failed: {e}")
+                time.sleep(interval)
+
+        self._thread = threading.Thread(target=_loop, name="value-index-refresh", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    # --- lookup ---
+    def lookup(self, phrase: str, limit: int = 8, min_score: float = 0.75) -> List[ValueMatch]:
+        """(table, column, value) candidates for a phrase: exact, then prefix, then fuzzy matches."""
+        text = _normalize(phrase)
+        if not text:
+            return []
+        with self._lock:
+            self.lookups += 1
+            scored: Dict[str, Tuple[float, str]] = {}
+            if text in self._keys:
+                scored[text] = (1.0, "exact")
+            for key in self._prefix_keys(text):
+                scored.setdefault(key, (0.9 if key.startswith(text) else 0.85, "prefix"))
+            if len(scored) < limit:
+                for key, ratio in self._fuzzy_keys(text, min_score):
+                    scored.setdefault(key, (round(0.8 * ratio, 3), "fuzzy"))
+            matches = [
+                ValueMatch(table, column, value, score, kind)
+                for key, (score, kind) in scored.items()
+                for table, column, value in self._keys.get(key, [])
+            ]
+            cardinality = {k: len(v) for k, v in self._columns.items()}
+        # Best score first; among equals, the more categorical column (fewer distinct values)
+        matches.sort(key=lambda m: (-m.score, cardinality.get((m.table, m.column), 0), len(m.value)))
+        return matches[:limit]
+
+    def _prefix_keys(self, text: str, cap: int = 50) -> List[str]:
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self._words)
+        words = _WORD_RE.findall(text)
+        if not words:
+            return []
+        # Values containing every word of the phrase, the last word possibly unfinished ("mountain bi")
+        last = words[-1]
+        start = bisect.bisect_left(self._sorted_words, last)
+        candidates: Set[str] = set()
+        for word in self._sorted_words[start:]:
+            if not word.startswith(last):
+                break
+            candidates |= self._words[word]
+            if len(candidates) > cap * 4:
+                break
+        for word in words[:-1]:
+            candidates &= self._words.get(word, set())
+        ranked = sorted(candidates, key=lambda k: (not k.startswith(text), len(k)))
+        return ranked[:cap]
+
+    def _fuzzy_keys(self, text: str, min_score: float, shortlist: int = 64) -> List[Tuple[str, float]]:
+        grams = _trigrams(text)
+        shared = Counter()
+        for gram in grams:
+            for key in self._grams.get(gram, ()):
+                shared[key] += 1
+        results = []
+        for key, count in shared.most_common(shortlist):
+            if count < len(grams) / 3:
+                break
+            ratio = difflib.SequenceMatcher(None, text, key).ratio()
+            if ratio >= min_score:
+                results.append((key, ratio))
+        return sorted(results, key=lambda kr: -kr[1])
+
+    # --- persistence / stats ---
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            for name, entry in data.get("tables", {}).items():
+                for column, values in entry.pop("columns", {}).items():
+                    self.set_column(name, column, values)
+                with self._lock:
+                    # Keep what the byte budget evicted while loading (a smaller budget than last run)
+                    evicted = self._tables.get(name, {}).get("skipped", {})
+                    entry.setdefault("skipped", {}).update({
+                        c: r for c, r in evicted.items() if r == "memory" and (name, c) not in self._columns
+                    })
+                    self._tables[name] = entry
+            self.state = "ready" if self._tables else "empty"
+            logger.info(f"🔤 Loaded value index: {len(self._columns)} columns, {len(self._keys)} values")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable value index {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._lock:
+            tables = {name: dict(entry, columns={}) for name, entry in self._tables.items()}
+            for (name, column), values in self._columns.items():
+                if name in tables:
+                    tables[name]["columns"][column] = values
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"tables": tables}, f)
+        os.replace(tmp, self.path)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "tables": len(self._tables),
+                "columns": len(self._columns),
+                "values": len(self._keys),
+                "bytes": self.bytes,
+                "lookups": self.lookups,
+                "evicted": self.evicted,
+                "ready": int(self.state == "ready"),
+            }
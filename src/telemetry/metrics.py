@@ -0,0 +1,158 @@
+"""
+Metrics - In-process registry of counters, histograms and collected gauges.
+Exported as Prometheus text (GET /metrics) or JSON (GET /v1/metrics, UI footer);
+no client library needed since everything lives in one process.
+"""
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Seconds: covers cache hits (ms) through slow LLM turns and big scans (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]  # (name, labels, value) from a collector
+
+
+def _key(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            lines += [f"{self.name}{_fmt_labels(k)} {v:g}" for k, v in sorted(self._values.items())]
+        return lines
+
+    def to_dict(self) -> List[Dict]:
+        with self._lock:
+            return [{"labels": dict(k), "value": v} for k, v in sorted(self._values.items())]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_fmt_labels(key + (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_fmt_labels(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_fmt_labels(key)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_fmt_labels(key)} {series[-1]}")
+        return lines
+
+    def to_dict(self) -> List[Dict]:
+        with self._lock:
+            return [{
+                "labels": dict(key),
+                "count": series[-1],
+                "sum": round(series[-2], 6),
+                "avg": round(series[-2] / series[-1], 6) if series[-1] else 0.0,
+            } for key, series in sorted(self._series.items())]
+
+
+class MetricsRegistry:
+    """Get-or-create metrics by name, plus gauge collectors sampled at export time."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory: Callable[[], object]):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, factory())
+        return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help))
+
+    def histogram(self, name: str, help: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """collector() -> [(name, labels, value)] gauges, e.g. pool saturation or cache size."""
+        self._collectors.append(collector)
+
+    def _collect(self) -> List[Sample]:
+        samples = []
+        for collector in self._collectors:
+            try:
+                samples += list(collector())
+            except Exception:
+                continue  # a broken collector must not take the whole export down
+        return samples
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines += metric.prometheus()
+        gauges: Dict[str, List[str]] = {}  # exposition format wants each metric's samples together
+        for name, labels, value in self._collect():
+            gauges.setdefault(name, [f"# TYPE {name} gauge"]).append(
+                f"{name}{_fmt_labels(sorted(labels.items()))} {value:g}"
+            )
+        for samples in gauges.values():
+            lines += samples
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict:
+        result = {name: metric.to_dict() for name, metric in list(self._metrics.items())}
+        for name, labels, value in self._collect():
+            result.setdefault(name, []).append({"labels": labels, "value": value})
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+
+REGISTRY = MetricsRegistry()
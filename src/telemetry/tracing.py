@@ -0,0 +1,205 @@
+"""
+Tracing - Per-question spans for LLM turns, tool calls, SQL and schema work.
+stream_agent binds one Trace to the current context; spans opened anywhere under it
+(DB executor threads copy the context) land in that trace, and every finished span
+feeds the metrics registry. The UI turns a trace into a timing waterfall.
+"""
+import functools
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.config.settings import TRACE_HISTORY, TRACING_ENABLED
+from src.telemetry.metrics import REGISTRY
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("nldbq_trace", default=None)
+_recent: deque = deque(maxlen=TRACE_HISTORY)
+
+
+class Span:
+    """One timed step; attrs carry tokens_in/out, rows, cache_hit, ..."""
+    __slots__ = ("kind", "name", "attrs", "error", "started", "duration")
+
+    def __init__(self, kind: str, name: str, **attrs):
+        self.kind = kind
+        self.name = name
+        self.attrs: Dict[str, Any] = attrs
+        self.error: Optional[str] = None
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self, error: Optional[str] = None):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self.started
+        self.error = error or self.error
+        _record(self)
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        end = self.duration if self.duration is not None else time.perf_counter() - self.started
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "start_ms": round(1000 * (self.started - origin), 2),
+            "duration_ms": round(1000 * end, 2),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """All spans of one question."""
+
+    def __init__(self, question: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.question = question
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def by_kind(self) -> Dict[str, float]:
+        """Total ms per span kind (nested spans, e.g. sql inside a tool, count in both)."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                if span.duration is not None:
+                    totals[span.kind] = totals.get(span.kind, 0.0) + 1000 * span.duration
+        return {kind: round(ms, 2) for kind, ms in totals.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self.duration if self.duration is not None else time.perf_counter() - self.started
+        with self._lock:
+            spans = sorted((s.to_dict(self.started) for s in self.spans), key=lambda s: s["start_ms"])
+        return {
+            "id": self.id,
+            "question": self.question,
+            "timestamp": self.timestamp,
+            "elapsed_ms": round(1000 * elapsed, 2),
+            "by_kind": self.by_kind(),
+            "spans": spans,
+        }
+
+
+def _record(span: Span):
+    REGISTRY.histogram("nldbq_span_seconds", "Latency of traced steps").observe(
+        span.duration, kind=span.kind, name=span.name
+    )
+    if span.error:
+        REGISTRY.counter("nldbq_span_errors_total", "Traced steps that failed").inc(kind=span.kind, name=span.name)
+    tokens = REGISTRY.counter("nldbq_llm_tokens_total", "LLM tokens by direction")
+    for direction in ("in", "out"):
+        if span.attrs.get(f"tokens_{direction}"):
+            tokens.inc(span.attrs[f"tokens_{direction}"], model=span.name, direction=direction)
+    if span.kind == "sql" and span.attrs.get("rows"):
+        REGISTRY.counter("nldbq_sql_rows_total", "Rows returned to the agent").inc(span.attrs["rows"])
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def start_span(kind: str, name: str, **attrs) -> Span:
+    """Open a span on the current trace (still timed + exported when there is none)."""
+    span = Span(kind, name, **attrs)
+    trace = _current.get()
+    if TRACING_ENABLED and trace is not None:
+        trace.add(span)
+    return span
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    s = start_span(kind, name, **attrs)
+    try:
+        yield s
+    except Exception as e:
+        s.finish(error=str(e)[:200])
+        raise
+    s.finish()
+
+
+def traced(kind: str, name: Optional[str] = None):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace(question: str):
+    """Bind a Trace for one question; nested calls (UI -> stream_agent) reuse the outer one."""
+    existing = _current.get()
+    if existing is not None:
+        yield existing
+        return
+    t = Trace(question)
+    token = _current.set(t)
+    try:
+        yield t
+    finally:
+        t.duration = time.perf_counter() - t.started
+        REGISTRY.histogram("nldbq_question_seconds", "End-to-end latency per question").observe(t.duration)
+        if TRACING_ENABLED:
+            _recent.append(t)
+        try:
+            _current.reset(token)
+        except ValueError:
+            _current.set(None)  # generator closed from another context
+
+
+def recent_traces(limit: int = 20) -> List[Dict[str, Any]]:
+    return [t.to_dict() for t in list(_recent)[-limit:]][::-1]
+
+
+class LLMTracer(BaseCallbackHandler):
+    """Chat-model callback: one "llm" span per turn with time-to-first-token and token usage."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._spans: Dict[Any, Span] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._spans[run_id] = start_span("llm", self.model, messages=sum(len(batch) for batch in messages))
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is not None and "ttft_ms" not in span.attrs:
+            span.set(ttft_ms=round(1000 * (time.perf_counter() - span.started), 2))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+        if not usage:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            usage = {"input_tokens": token_usage.get("prompt_tokens"), "output_tokens": token_usage.get("completion_tokens")}
+        span.set(tokens_in=usage.get("input_tokens") or 0, tokens_out=usage.get("output_tokens") or 0)
+        span.finish()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.finish(error=str(error)[:200])
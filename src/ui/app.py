@@ -5,6 +5,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 import streamlit as st
 
+from src.agents.warmup import start_warmup
+from src.config.models import default_llm
+
+# Pool, schema and default agent build in the background while the page renders (once per process)
+start_warmup(default_llm["provider"], default_llm["model"])
+
 # Local feature imports
 from src.ui.main_display import init_session_state, render_page_setup
 from src.ui.config import render_sidebar
@@ -1,16 +1,71 @@
 # File: chat_ui.py - Updated handle_chat_input
 import streamlit as st
 from datetime import datetime
-from .utils import extract_content_from_chunk, extract_sql_from_content, extract_todos
-from src.agents.agent import stream_agent
+from .utils import extract_sql_from_content
+from src.agents.agent import get_template_library, stream_agent
+from src.db.db_schema_wrapper import db_schema_wrapper, result_store
+from src.db.result_store import to_csv, to_parquet
+from src.telemetry.tracing import trace
+from src.ui.stream_render import StreamRenderer
+
+WATERFALL_WIDTH = 40
 
 def render_chat_history():
     """Display chat history."""
-    for msg in st.session_state.get('messages', []):
+    for i, msg in enumerate(st.session_state.get('messages', [])):
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
+            for j, result in enumerate(msg.get("results", [])):
+                render_result(result, key=f"more_{i}_{j}")
+            if msg.get("trace"):
+                render_waterfall(msg["trace"])
 
+def render_result(result: dict, key: str):
+    """Query result as a native grid with CSV/Parquet downloads and load-more while the cursor is open."""
+    stored = result_store.get(result["result_id"]) if result.get("result_id") else None
+    if stored is None:
+        # Older message or evicted frame: fall back to the text the agent saw
+        with st.expander(f"🧾 Query results ({result['pages']} page(s))", expanded=False):
+            st.text(result["text"])
+        return
+    more = " (more available)" if stored.has_more else ""
+    with st.expander(f"🧾 Query results: {len(stored.frame):,} rows{more}", expanded=True):
+        st.dataframe(stored.frame, use_container_width=True, hide_index=True)
+        col1, col2, col3 = st.columns(3)
+        col1.download_button("⬇️ CSV", to_csv(stored), file_name=f"result_{stored.id}.csv",
+                             mime="text/csv", key=f"{key}_csv")
+        try:
+            col2.download_button("⬇️ Parquet", to_parquet(stored), file_name=f"result_{stored.id}.parquet",
+                                 mime="application/vnd.apache.parquet", key=f"{key}_parquet")
+        except ImportError:
+            col2.caption("Parquet download needs pyarrow")
+        if stored.has_more and col3.button("⏬ Load more rows", key=key):
+            try:
+                handle = stored.handle
+                result_store.extend(handle, db_schema_wrapper.fetch_more(handle))
+                result["pages"] += 1
+            except Exception as e:
+                stored.handle = None  # expired cursor: stop offering it
+                st.error(f"❌ {e}")
+            st.rerun()
 
+def render_waterfall(question_trace: dict):
+    """Per-question timing: one bar per LLM turn / tool / SQL / schema span."""
+    total = max(question_trace["elapsed_ms"], 1.0)
+    by_kind = " · ".join(f"{kind} {ms / 1000:.2f}s" for kind, ms in question_trace["by_kind"].items())
+    lines = []
+    for s in question_trace["spans"]:
+        offset = min(int(WATERFALL_WIDTH * s["start_ms"] / total), WATERFALL_WIDTH - 1)
+        length = max(1, min(round(WATERFALL_WIDTH * s["duration_ms"] / total), WATERFALL_WIDTH - offset))
+        bar = " " * offset + "█" * length
+        label = f"{s['kind']}:{s['name']}"[:30]
+        extra = "".join(
+            f" {k}={s['attrs'][k]}" for k in ("tokens_in", "tokens_out", "rows", "cache_hit") if k in s["attrs"]
+        )
+        flag = " ❌" if s["error"] else ""
+        lines.append(f"{label:<30} {bar:<{WATERFALL_WIDTH}} {s['duration_ms']:>8.0f} ms{extra}{flag}")
+    with st.expander(f"⏱️ Timing {total / 1000:.2f}s — {by_kind}", expanded=False):
+        st.code("\n".join(lines) or "No spans recorded", language=None)
 
 def handle_chat_input():
     """Handle new user prompt + streaming response."""
@@ -30,67 +85,50 @@ def handle_chat_input():
 
         if agent:
             with st.chat_message("assistant"):
-                message_placeholder = st.empty()
-                plan_placeholder = st.empty()  # New: Plan display
-                full_response = ""
-                current_plan = ""  # Track live plan updates
+                renderer = StreamRenderer(st.container())
                 
                 # Init chunk counter in session state
                 if 'chunk_count' not in st.session_state:
                     st.session_state.chunk_count = 0
                 
-                with st.spinner("🤔 Agent is working..."):
+                with st.spinner("🤔 Agent is working..."), trace(prompt) as question_trace:
                     try:
-                        chunk_count = 0
-                        
+                        # Each chunk is dispatched once; tokens are coalesced and drawn at a capped frame rate
                         for chunk in stream_agent(agent, prompt, config):
-                            chunk_count += 1
-                            
-                            # EXTRACT PLAN FROM CHUNK (TodoListMiddleware)
-                            new_plan = extract_todos(chunk)
-                            if new_plan and new_plan != current_plan:
-                                current_plan = new_plan
-                                # Live plan update in expander
-                                with plan_placeholder.container():
-                                    with st.expander(f"📋 **Agent Plan** (updated {chunk_count} steps in)", expanded=True):
-                                        st.markdown(current_plan)
-                            
-                            # Extract main content
-                            new_contents = extract_content_from_chunk(chunk)
-                            for content in new_contents:
-                                full_response += content
-                            
-                            # Live response update
-                            if new_contents:
-                                message_placeholder.markdown(full_response + "▌")
+                            renderer.feed(chunk)
                         
-                        # FINAL DISPLAY
-                        final_response = full_response.strip()
-                        message_placeholder.markdown(final_response or "*(No content extracted)*")
+                        final_response = renderer.finish()
+                        current_plan = renderer.plan
+                        results = renderer.results
+                        stats = renderer.stats()
                         
-                        # Final plan if available
-                        if current_plan:
-                            with plan_placeholder.container():
-                                with st.expander("📋 **Final Agent Plan**", expanded=False):
-                                    st.markdown(current_plan)
-                        
-                        st.info(f"✅ Processed {chunk_count} chunks")
+                        st.session_state.chunk_count += stats["chunks"]
+                        st.info(f"✅ Processed {stats['chunks']} chunks in {stats['seconds']}s "
+                                f"({stats['chunks_per_sec']:.0f} chunks/s, {stats['frames']} frames)")
                         
                         # Save history (include plan if present)
                         st.session_state.query_history.append({
                             "question": prompt, 
                             "plan": current_plan,  # Save plan for history
-                            #"sql": extract_sql_from_content(final_response),
+                            "sql": extract_sql_from_content(final_response),
                             "response": final_response,
                             "timestamp": datetime.now()
                         })
                         
-                        st.session_state.messages.append({"role": "assistant", "content": final_response})
+                        # Mine the session's successful questions into the shared query templates
+                        library = get_template_library()
+                        if library is not None:
+                            library.learn_history(st.session_state.query_history[-1:])
+                        
+                        st.session_state.messages.append({
+                            "role": "assistant", "content": final_response, "results": results,
+                            "trace": question_trace.to_dict(),
+                        })
                         
                     except Exception as e:
                         import traceback
                         error_msg = f"❌ Error: {str(e)}\n\n```{traceback.format_exc()}```"
-                        message_placeholder.error(error_msg)
+                        st.error(error_msg)
                         st.session_state.messages.append({"role": "assistant", "content": error_msg})
         else:
             st.error("❌ No agent loaded.")
@@ -2,6 +2,8 @@
 import streamlit as st
 from src.config.models import llm_providers, model_options, default_llm
 from src.agents.agent import get_agent
+from src.agents.memory import get_checkpointer
+from src.agents.warmup import warmup_status
 from datetime import datetime 
 
 def render_sidebar():
@@ -37,11 +39,23 @@ def render_sidebar():
     
     # Debug toggle
     st.session_state.show_debug = st.checkbox("🐛 Show debug chunks")
+    render_warmup_status()
     
     st.divider()
     render_history_panel()
     render_clear_buttons()
 
+def render_warmup_status():
+    """Background warm-up stages with their timings."""
+    status = warmup_status()
+    if not status:
+        return
+    icons = {"pending": "⏳", "running": "🔄", "ready": "✅", "failed": "⚠️"}
+    st.caption("🔥 Warm-up: " + " · ".join(
+        f"{icons.get(s['state'], '')} {name}" + (f" {s['ms']:.0f} ms" if s["ms"] is not None else "")
+        for name, s in status.items()
+    ))
+
 def render_history_panel():
     """Recent queries in sidebar."""
     st.subheader("📋 Recent Queries")
@@ -64,6 +78,8 @@ def render_clear_buttons():
             st.rerun()
     with col2:
         if st.button("🔄 New Thread", use_container_width=True):
+            old_thread = st.session_state.config["configurable"]["thread_id"]
+            get_checkpointer().delete_thread(old_thread)  # abandoned threads would otherwise wait for idle eviction
             timestamp = datetime.now().timestamp()
             st.session_state.config = {"configurable": {"thread_id": f"thread_{timestamp}"}}  # [!code highlight]
             st.session_state.messages = []
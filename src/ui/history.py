@@ -2,12 +2,20 @@
 import streamlit as st
 from datetime import datetime
 from src.config.prompt import QUERY_EXAMPLES
+from src.telemetry.metrics import REGISTRY
+
+def _avg_seconds(histogram: str) -> str:
+    series = REGISTRY.histogram(histogram).to_dict()
+    count = sum(s["count"] for s in series)
+    return f"{sum(s['sum'] for s in series) / count:.1f}s" if count else "-"
 
 def render_footer():    
     """Metrics and status footer."""
-    col1, col2 = st.columns(2)
+    col1, col2, col3, col4 = st.columns(4)
     col1.metric("Queries", len(st.session_state.get('query_history', [])))
     col2.metric("Chunks Processed", st.session_state.get('chunk_count', 0)) 
+    col3.metric("LLM Tokens", int(REGISTRY.counter("nldbq_llm_tokens_total").total()))
+    col4.metric("Avg Answer", _avg_seconds("nldbq_question_seconds"))
 
     col1, col2 = st.columns([3, 1])
     with col1:
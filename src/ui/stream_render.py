@@ -0,0 +1,182 @@
+# Streaming render pipeline: chunk -> typed events (once) -> coalesced, frame-capped UI updates
+import time
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+
+from src.agents.events import chunk_events
+from src.config.settings import UI_STREAM_BLOCK_CHARS, UI_STREAM_FPS
+from src.db.db_schema_wrapper import result_store
+from src.db.result_store import RESULT_ID_RE
+from src.db.sql_stream import CONTINUATION_RE
+from src.telemetry.metrics import REGISTRY
+
+RESULT_TOOLS = ("execute_sql", "fetch_more_rows")
+CURSOR = "▌"
+
+
+def track_result(results: list, content: str):
+    """Keep one entry per streamed query; fetch_more_rows pages extend the latest one.
+
+    Rows live in result_store under the result id; "text" is the LLM summary, used if the frame was evicted.
+    """
+    match = CONTINUATION_RE.search(content)
+    handle = match.group(1) if match else None
+    result_id = RESULT_ID_RE.search(content)
+    if results and content.startswith("✅ **More rows:**"):
+        results[-1]["text"] += "\n" + content
+        results[-1]["handle"] = handle
+        results[-1]["pages"] += 1
+    else:
+        results.append({
+            "result_id": result_id.group(1) if result_id else None, "text": content, "handle": handle, "pages": 1,
+        })
+
+
+def format_plan(todos: List[Dict[str, str]]) -> str:
+    return "\n".join(f"{'✅' if t['status'] == 'completed' else '⏳'} **{t['content']}**" for t in todos)
+
+
+def _split_at_paragraph(text: str) -> int:
+    """Index just past the last blank line outside a ``` fence (0 = nothing safe to freeze)."""
+    cut, fenced, pos = 0, False, 0
+    for line in text.splitlines(keepends=True):
+        pos += len(line)
+        if line.lstrip().startswith("```"):
+            fenced = not fenced
+        elif not fenced and not line.strip():
+            cut = pos
+    return cut
+
+
+class StreamRenderer:
+    """Renders one assistant turn from stream_agent chunks without re-drawing per token.
+
+    - every chunk is dispatched once through chunk_events (no recursive re-parsing)
+    - token deltas collect in a list and are drawn at most `fps` times a second
+    - finished paragraphs are frozen into their own element, so a frame only re-renders the tail
+    - plans, tool steps and result pages have their own placeholders and update only on change
+    """
+
+    def __init__(self, container, fps: float = UI_STREAM_FPS, block_chars: int = UI_STREAM_BLOCK_CHARS):
+        self.container = container
+        self.frame_interval = 1.0 / fps if fps > 0 else 0.0
+        self.block_chars = block_chars
+        self.plan_placeholder = container.empty()
+        self.status_placeholder = container.empty()
+        self.results_placeholder = container.empty()
+        self._tail_placeholder = container.empty()
+        self._frozen: List[str] = []
+        self._frozen_placeholders: List[Any] = []
+        self._tail = ""
+        self._pending: List[str] = []
+        self._answer: Optional[str] = None  # full text of the last non-tool AI message
+        self._last_frame = 0.0
+        self.plan = ""
+        self.results: List[Dict[str, Any]] = []
+        self.chunks = 0
+        self.frames = 0
+        self.started = time.perf_counter()
+
+    # --- dispatch ---
+    def feed(self, chunk: Any):
+        self.chunks += 1
+        for event in chunk_events(chunk):
+            kind = event["type"]
+            if kind == "token":
+                self._pending.append(event["text"])
+            elif kind == "tool_call":
+                self._on_tool_call(event)
+            elif kind == "tool_result":
+                self._on_tool_result(event)
+            elif kind == "plan":
+                self._on_plan(event["todos"])
+            elif kind == "answer":
+                self._answer = event["text"]
+        if self._pending and time.perf_counter() - self._last_frame >= self.frame_interval:
+            self._flush()
+
+    def _on_tool_call(self, event: Dict[str, Any]):
+        # Text streamed before a tool call is the model thinking aloud, not the answer
+        self._pending.clear()
+        self._tail = ""
+        self._frozen.clear()
+        for placeholder in self._frozen_placeholders:
+            placeholder.empty()
+        self._frozen_placeholders.clear()
+        self._tail_placeholder.empty()
+        self.status_placeholder.caption(f"🔧 {event['name']}…")
+
+    def _on_tool_result(self, event: Dict[str, Any]):
+        self.status_placeholder.caption(f"✅ {event['name']} done")
+        if event["name"] not in RESULT_TOOLS:
+            return
+        track_result(self.results, event["content"])
+        with self.results_placeholder.container():
+            for result in self.results:
+                stored = result_store.get(result["result_id"]) if result["result_id"] else None
+                if stored is not None:
+                    st.dataframe(stored.frame, use_container_width=True, hide_index=True)
+                else:
+                    st.text(result["text"])
+
+    def _on_plan(self, todos: List[Dict[str, str]]):
+        plan = format_plan(todos)
+        if plan == self.plan:
+            return
+        self.plan = plan
+        with self.plan_placeholder.container():
+            with st.expander(f"📋 **Agent Plan** (updated {self.chunks} chunks in)", expanded=True):
+                st.markdown(plan)
+
+    # --- coalesced token rendering ---
+    def _flush(self, final: bool = False):
+        self._tail += "".join(self._pending)
+        self._pending.clear()
+        if len(self._tail) > self.block_chars and not final:
+            cut = _split_at_paragraph(self._tail)
+            if cut:
+                # Freeze the finished paragraphs in the current element and start a new tail below
+                self._tail_placeholder.markdown(self._tail[:cut])
+                self._frozen.append(self._tail[:cut])
+                self._frozen_placeholders.append(self._tail_placeholder)
+                self._tail = self._tail[cut:]
+                self._tail_placeholder = self.container.empty()
+        self._tail_placeholder.markdown(self._tail if final else self._tail + CURSOR)
+        self._last_frame = time.perf_counter()
+        self.frames += 1
+
+    @property
+    def text(self) -> str:
+        return "".join(self._frozen) + self._tail + "".join(self._pending)
+
+    def finish(self) -> str:
+        """Final answer text; falls back to the last full AI message for non-streaming models."""
+        streamed = self.text.strip()
+        final = streamed or (self._answer or "")
+        if streamed:
+            self._flush(final=True)
+        else:
+            self._tail_placeholder.markdown(final or "*(No content extracted)*")
+        self.status_placeholder.empty()
+        if self.plan:
+            with self.plan_placeholder.container():
+                with st.expander("📋 **Final Agent Plan**", expanded=False):
+                    st.markdown(self.plan)
+        stats = self.stats()
+        REGISTRY.counter("nldbq_ui_chunks_total", "Stream chunks rendered by the UI").inc(self.chunks)
+        REGISTRY.counter("nldbq_ui_frames_total", "UI re-renders of streamed answers").inc(self.frames)
+        REGISTRY.histogram(
+            "nldbq_ui_chunks_per_second", "UI streaming throughput",
+            buckets=(10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+        ).observe(stats["chunks_per_sec"])
+        return final
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            "chunks": self.chunks,
+            "frames": self.frames,
+            "seconds": round(elapsed, 2),
+            "chunks_per_sec": round(self.chunks / elapsed, 1),
+        }
@@ -0,0 +1,42 @@
+"""
+Text - Word normalization shared by the hashing embedder and the schema renderer.
+"""
+import re
+from typing import List
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "by", "with", "and", "or", "is", "are",
+    "was", "were", "be", "me", "my", "our", "us", "show", "list", "give", "get", "find",
+    "display", "what", "which", "who", "whose", "please", "all", "from", "their", "there",
+}
+
+# Cheap synonym folding so near-duplicate phrasings land on the same features
+_SYNONYMS = {
+    "largest": "top", "biggest": "top", "highest": "top", "greatest": "top", "most": "top", "best": "top",
+    "smallest": "bottom", "lowest": "bottom", "least": "bottom", "worst": "bottom",
+    "staff": "employee", "worker": "employee", "people": "person", "client": "customer",
+    "revenue": "sale", "amount": "total", "count": "number", "dept": "department",
+}
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("es") and word[-3] in "sxz":
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, stop-word-free, lightly stemmed and synonym-folded words."""
+    words = []
+    for word in _WORD_RE.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        word = _stem(word)
+        words.append(_SYNONYMS.get(word, word))
+    return words